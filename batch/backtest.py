@@ -0,0 +1,21 @@
+from util.candle import CandleStore
+from util.backtest import Backtest, RuleStrategy
+import json
+import sys
+
+### 로컬 캔들 저장소의 데이터로 오프라인 백테스트 실행
+### 실행 : python backtest.py [ticker] [interval] [candle 수]
+### 저장소에 데이터가 부족하면 CandleStore().sync(ticker, interval, count) 로 먼저 채움
+
+if __name__ == "__main__":
+    ticker = sys.argv[1] if len(sys.argv) > 1 else "KRW-BTC"
+    interval = sys.argv[2] if len(sys.argv) > 2 else "minute60"
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 24 * 365 * 3
+
+    df = CandleStore().load(ticker, interval, count)
+    if df.empty:
+        print(f"No candles stored for {ticker} {interval}")
+        sys.exit(1)
+
+    result = Backtest(df, RuleStrategy(), ticker=ticker).run()
+    print(json.dumps(result.summary(), indent=2))
@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# 벤치마크용 시장 데이터 fixture 생성
+# 실행 : python bench/make_fixtures.py          (고정 seed 로 생성한 데이터)
+#        python bench/make_fixtures.py --live   (Upbit / alternative.me / blockchain.info 에서 기록, 네트워크 필요)
+
+TICKER = "KRW-BTC"
+DAILY_COUNT = 50
+HOURLY_COUNT = 174
+
+AI_RESPONSE = """```json
+{
+  "decision": "buy",
+  "percentage": 30,
+  "reason": "RSI recovered from oversold levels on the hourly chart while price reclaimed the middle Bollinger band. Orderbook depth is balanced and the spread is tight, so a partial entry is justified."
+}
+```"""
+
+
+### 고정 seed 랜덤 워크 캔들 (pyupbit.get_ohlcv 와 같은 컬럼)
+def synthetic_candles(count, freq, end, seed, volatility):
+    rng = np.random.default_rng(seed)
+    close = 140_000_000 * np.exp(np.cumsum(rng.normal(0, volatility, count)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, volatility, count))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, volatility, count))
+    volume = rng.uniform(50, 500, count) if freq == "D" else rng.uniform(2, 30, count)
+    index = pd.date_range(end=end, periods=count, freq=freq)
+    df = pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": volume}, index=index)
+    df[["open", "high", "low", "close"]] = df[["open", "high", "low", "close"]].round(-3)
+    df["value"] = df["close"] * df["volume"]
+    return df
+
+
+def synthetic_market(close, seed=0):
+    rng = np.random.default_rng(seed)
+    units = [
+        {
+            "ask_price": close + 1000 * (i + 1), "ask_size": round(float(rng.uniform(0.01, 0.5)), 8),
+            "bid_price": close - 1000 * i, "bid_size": round(float(rng.uniform(0.01, 0.5)), 8),
+        }
+        for i in range(15)
+    ]
+    days = pd.date_range(end="2025-01-31", periods=31, freq="D")
+    return {
+        "orderbook": {
+            "market": TICKER, "timestamp": 1738281600000,
+            "total_ask_size": sum(unit["ask_size"] for unit in units),
+            "total_bid_size": sum(unit["bid_size"] for unit in units),
+            "orderbook_units": units,
+        },
+        "balances": [
+            {"currency": "KRW", "balance": "1000000.0", "locked": "0", "avg_buy_price": "0", "unit_currency": "KRW"},
+            {"currency": "BTC", "balance": "0.01", "locked": "0", "avg_buy_price": str(close * 0.97), "unit_currency": "KRW"},
+        ],
+        "fear_greed": {"name": "Fear and Greed Index", "data": [{"value": "61", "value_classification": "Greed", "timestamp": "1738281600"}]},
+        "hash_rate": {"values": [{"x": int(day.timestamp()), "y": float(rng.uniform(7e8, 8e8))} for day in days]},
+        "transaction_volume": {"values": [{"x": int(day.timestamp()), "y": float(rng.uniform(5e9, 9e9))} for day in days]},
+        "ai_response": AI_RESPONSE,
+    }
+
+
+def live_market():
+    import pyupbit
+    import requests
+
+    return {
+        "orderbook": pyupbit.get_orderbook(TICKER),
+        "balances": synthetic_market(pyupbit.get_current_price(TICKER))["balances"],
+        "fear_greed": requests.get("https://api.alternative.me/fng/", timeout=10).json(),
+        "hash_rate": requests.get("https://api.blockchain.info/charts/hash-rate?timespan=1months&format=json", timeout=10).json(),
+        "transaction_volume": requests.get("https://api.blockchain.info/charts/estimated-transaction-volume?timespan=1months&format=json", timeout=10).json(),
+        "ai_response": AI_RESPONSE,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    if args.live:
+        import pyupbit
+        daily = pyupbit.get_ohlcv(TICKER, interval="day", count=DAILY_COUNT)
+        hourly = pyupbit.get_ohlcv(TICKER, interval="minute60", count=HOURLY_COUNT)
+        market = live_market()
+    else:
+        daily = synthetic_candles(DAILY_COUNT, "D", "2025-01-31 09:00", seed=1, volatility=0.03)
+        hourly = synthetic_candles(HOURLY_COUNT, "h", "2025-01-31 08:00", seed=2, volatility=0.006)
+        market = synthetic_market(float(hourly["close"].iloc[-1]))
+
+    os.makedirs(FIXTURES, exist_ok=True)
+    daily.to_csv(os.path.join(FIXTURES, "daily.csv"), float_format="%.8f")
+    hourly.to_csv(os.path.join(FIXTURES, "hourly.csv"), float_format="%.8f")
+    with open(os.path.join(FIXTURES, "market.json"), "w") as f:
+        json.dump(market, f, indent=1)
+    print(f"fixtures written to {FIXTURES}", file=sys.stderr)
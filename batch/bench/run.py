@@ -0,0 +1,335 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# 투자 판단 파이프라인 오프라인 벤치마크 (AWS / Upbit / OpenAI / 외부 API 는 fixture 로 대체)
+# 실행 : python bench/run.py [--repeat N] [--only 이름,...] [--output 결과.json]
+# 결과는 JSON 으로 출력하여 커밋 간 비교에 사용
+# DB.log_trade 는 BENCH_DB_HOST (BENCH_DB_USER / BENCH_DB_PASSWORD / BENCH_DB_NAME) 를 지정한 경우에만 측정
+#   -> 측정용 데이터베이스를 따로 사용 (trades 테이블에 행이 추가됨)
+
+BATCH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+ENV = "bench"
+
+# 저장소 경로는 모듈 import 시점에 정해지므로 먼저 임시 디렉터리로 지정
+WORKDIR = tempfile.mkdtemp(prefix="bench-")
+os.environ["PYTHON_ENV"] = ENV
+os.environ["CANDLE_STORE_PATH"] = os.path.join(WORKDIR, "candles.db")
+os.environ["LLM_CACHE_PATH"] = os.path.join(WORKDIR, "llm_cache")
+os.environ["TRADE_JOURNAL_PATH"] = os.path.join(WORKDIR, "journal.db")
+os.environ["TRACE_PATH"] = os.path.join(WORKDIR, "trace")
+os.environ["TRADE_MEMORY_PATH"] = os.path.join(WORKDIR, "memory.db")
+os.environ["LOG_FILE"] = os.path.join(WORKDIR, "autotrade.log")
+sys.path.insert(0, BATCH)
+
+from cryptography.fernet import Fernet
+import pandas as pd
+import pyupbit
+import requests
+from util.aws import AWS
+from util.chatgpt import ChatGPT
+from util.db import DB
+from util.indicator import add_indicators
+from util.journal import Journal
+from util.log import Log
+from util.memory import TradeMemory
+from util.order import OrderTracker
+
+
+def load_fixtures():
+    def candles(name):
+        return pd.read_csv(os.path.join(FIXTURES, name), index_col=0, parse_dates=True)
+
+    with open(os.path.join(FIXTURES, "market.json")) as f:
+        market = json.load(f)
+    market["daily"] = candles("daily.csv")
+    market["hourly"] = candles("hourly.csv")
+    return market
+
+
+def series(payload, column):
+    return pd.DataFrame(payload["values"]).rename(columns={"x": "Timestamp", "y": column})
+
+
+### 반복 측정 (밀리초)
+def measure(func, repeat, warmup=1):
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": round(samples[0], 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+    }
+
+
+### 캐시를 거치지 않도록 하는 응답 캐시 (매번 프롬프트를 조립하고 요청)
+class NoCache:
+    def get(self, key):
+        return None
+
+    def put(self, key, content, model=None):
+        pass
+
+    def stats(self):
+        return {}
+
+
+### OpenAI chat completion 대체 (고정 응답, stream=True 이면 몇 글자씩 나누어 전달)
+class FakeOpenAI:
+    CHUNK_SIZE = 8
+
+    def __init__(self, content):
+        self.api_key = "bench"
+        self.requests = 0
+        self.content = content
+        message = type("Message", (), {"content": content})
+        choice = type("Choice", (), {"message": message})
+        self.response = type("Response", (), {"choices": [choice]})
+        completions = type("Completions", (), {"create": lambda _, **kwargs: self._create(**kwargs)})
+        self.chat = type("Chat", (), {"completions": completions()})()
+
+    def _create(self, stream=False, **kwargs):
+        self.requests += 1
+        if not stream:
+            return self.response
+        return (
+            type("Chunk", (), {"usage": None, "choices": [type("Choice", (), {"delta": type("Delta", (), {"content": self.content[i:i + FakeOpenAI.CHUNK_SIZE]})})]})
+            for i in range(0, len(self.content), FakeOpenAI.CHUNK_SIZE)
+        )
+
+
+### Upbit 대체 (fixture 잔고, 주문은 최우선 매도 호가에 즉시 체결)
+class FakeUpbit:
+    def __init__(self, market):
+        self.market = market
+        self.orders = {}
+
+    def get_balances(self):
+        return [dict(balance) for balance in self.market["balances"]]
+
+    def get_balance(self, ticker="KRW"):
+        currency = ticker.split("-")[-1]
+        return next((float(balance["balance"]) for balance in self.market["balances"] if balance["currency"] == currency), 0.0)
+
+    def _order(self, side, volume, funds):
+        uuid = f"bench-{len(self.orders) + 1}"
+        self.orders[uuid] = {
+            "uuid": uuid, "side": side, "state": "done", "paid_fee": str(funds * 0.0005),
+            "trades": [{"price": str(funds / volume), "volume": str(volume), "funds": str(funds)}],
+        }
+        return {"uuid": uuid, "side": side, "state": "wait"}
+
+    def buy_market_order(self, ticker, price):
+        ask = self.market["orderbook"]["orderbook_units"][0]["ask_price"]
+        return self._order("bid", price / ask, price)
+
+    def sell_market_order(self, ticker, volume):
+        bid = self.market["orderbook"]["orderbook_units"][0]["bid_price"]
+        return self._order("ask", volume, volume * bid)
+
+    def get_order(self, uuid):
+        return self.orders[uuid]
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+### SSM Parameter Store 대체
+class FakeSession:
+    def __init__(self, parameters):
+        self.parameters = parameters
+
+    def client(self, name):
+        parameters = self.parameters
+
+        class SSM:
+            def get_parameters(self, Names, WithDecryption=True):
+                found = [{"Name": name, "Value": parameters[name]} for name in Names if name in parameters]
+                return {"Parameters": found, "InvalidParameters": [name for name in Names if name not in parameters]}
+
+        return SSM()
+
+
+### 외부 서비스 호출을 fixture 로 대체
+def install_stubs(market):
+    key = Fernet.generate_key()
+    fernet = Fernet(key)
+    values = {
+        "key/upbit-access": "bench-access",
+        "key/upbit-secret": "bench-secret",
+        "key/openai": "bench-openai",
+        # 연결이 즉시 거절되는 주소 : RDS 가 중지된 경우와 같이 저널에만 기록됨
+        "db/url": os.getenv("BENCH_DB_HOST", "127.0.0.1"),
+        "db/password": os.getenv("BENCH_DB_PASSWORD", "bench"),
+    }
+    parameters = {f"/{ENV}/{name}": fernet.encrypt(value.encode()).decode() for name, value in values.items()}
+    parameters[f"/{ENV}/key/fernet"] = key.decode()
+
+    AWS.clear_cache()
+    AWS._sessions[ENV] = (FakeSession(parameters), datetime.max.replace(tzinfo=timezone.utc))
+
+    pyupbit.Upbit = lambda access, secret: FakeUpbit(market)
+    pyupbit.get_ohlcv = lambda ticker, interval="day", count=200: (market["daily"] if interval == "day" else market["hourly"]).tail(count)
+    pyupbit.get_orderbook = lambda ticker: market["orderbook"]
+    pyupbit.get_current_price = lambda ticker: float(market["hourly"]["close"].iloc[-1])
+
+    responses = {
+        "api.alternative.me": market["fear_greed"],
+        "hash-rate": market["hash_rate"],
+        "estimated-transaction-volume": market["transaction_volume"],
+    }
+    requests.get = lambda url, **kwargs: FakeResponse(next(payload for key, payload in responses.items() if key in url))
+
+    client = FakeOpenAI(market["ai_response"])
+    ChatGPT.init = lambda self: client
+    ChatGPT.cache = NoCache()
+    # 모의 주문은 즉시 체결되므로 첫 조회 전 대기 없음
+    OrderTracker.INITIAL_DELAY = 0.0
+    return client
+
+
+def bench_add_indicators(market, repeat):
+    return {
+        "add_indicators_daily": measure(lambda: add_indicators(market["daily"].copy()), repeat),
+        "add_indicators_hourly": measure(lambda: add_indicators(market["hourly"].copy()), repeat),
+    }
+
+
+def prompt_inputs(market):
+    daily = add_indicators(market["daily"].copy()).dropna().tail(30)
+    hourly = add_indicators(market["hourly"].copy()).dropna().tail(168)
+    return (
+        market["balances"], market["orderbook"], daily, hourly, market["fear_greed"]["data"][0],
+        series(market["hash_rate"], "Hashrate"), series(market["transaction_volume"], "Volumes"),
+    )
+
+
+def bench_prompt(market, repeat):
+    inputs = prompt_inputs(market)
+    chatgpt = ChatGPT(None, ENV)
+    client = FakeOpenAI(market["ai_response"])
+    return {
+        "build_trade_data": measure(lambda: ChatGPT.build_trade_data(ChatGPT.TRADE_MODEL, "KRW-BTC", *inputs), repeat),
+        "generate_trade": measure(lambda: chatgpt.generate_trade(client, *inputs, "KRW-BTC"), repeat),
+    }
+
+
+def bench_parse(market, repeat):
+    chatgpt = ChatGPT(None, ENV)
+    return {"parse_ai_response": measure(lambda: chatgpt.parse_ai_response(market["ai_response"]), repeat)}
+
+
+def trade_args(market):
+    return ("buy", 30, "bench", 0.01, 1000000.0, 140000000.0, float(market["hourly"]["close"].iloc[-1]), "", "KRW-BTC")
+
+
+def bench_log_trade(market, repeat):
+    journal = Journal(os.path.join(WORKDIR, "bench-journal.db"))
+    results = {"journal_append": measure(lambda: journal.append(DB.trade_record(*trade_args(market))), repeat)}
+    memory = TradeMemory(os.path.join(WORKDIR, "bench-memory.db"))
+    results["memory_record"] = measure(lambda: memory.record("KRW-BTC", "buy", 30, trade_args(market)[6], "up_low_vol"), repeat)
+    results["memory_context"] = measure(lambda: memory.context("KRW-BTC", "up_low_vol"), repeat)
+
+    host = os.getenv("BENCH_DB_HOST")
+    if not host:
+        results["log_trade"] = {"skipped": "BENCH_DB_HOST not set"}
+        return results
+
+    import mysql.connector
+    conn = mysql.connector.connect(
+        host=host,
+        user=os.getenv("BENCH_DB_USER", "application"),
+        password=os.getenv("BENCH_DB_PASSWORD", ""),
+        database=os.getenv("BENCH_DB_NAME", "bitcoin_trades_bench"),
+    )
+    try:
+        DB.create_tables(conn)
+        results["log_trade"] = measure(lambda: DB.log_trade(conn, *trade_args(market)), repeat)
+        records = [dict(DB.trade_record(*trade_args(market)), journal_id=os.urandom(16).hex()) for _ in range(Journal.BATCH_SIZE)]
+        results["insert_trades_batch"] = measure(lambda: DB.insert_trades(conn, [dict(r, journal_id=os.urandom(16).hex()) for r in records]), repeat)
+    finally:
+        conn.close()
+    return results
+
+
+def bench_ai_trading(market, repeat):
+    import o1_autotrade
+
+    client = install_stubs(market)
+    Log.set_level(logging.WARNING)
+    result = measure(lambda: o1_autotrade.ai_trading(ENV, "KRW-BTC"), repeat)
+    result["llm_requests"] = client.requests
+    return {"ai_trading": result}
+
+
+BENCHMARKS = {
+    "indicators": bench_add_indicators,
+    "prompt": bench_prompt,
+    "parse": bench_parse,
+    "log_trade": bench_log_trade,
+    "ai_trading": bench_ai_trading,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BATCH, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", default=",".join(BENCHMARKS))
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    Log.setup()
+    Log.set_level(logging.WARNING)
+    market = load_fixtures()
+    results = {}
+    for name in args.only.split(","):
+        # ai_trading 은 한 번 실행에 수십 ms 이상 걸리므로 반복 횟수를 줄임
+        repeat = max(args.repeat // 4, 3) if name == "ai_trading" else args.repeat
+        results.update(BENCHMARKS[name](market, repeat))
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
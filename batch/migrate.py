@@ -0,0 +1,23 @@
+from util.init import Init
+from util.log import Log
+from util.aws import AWS
+from util.crypt import Crypt
+from util.db import DB
+from util.migration import Migration
+
+### trades 테이블 스키마 마이그레이션 실행 (적용되지 않은 단계만 순서대로 실행)
+### 실행 : python migrate.py
+### 컬럼 교체 단계가 있으므로 트레이딩 스케줄 사이(11시 / 23시 이외)에 실행
+
+if __name__ == "__main__":
+    Log.setup()
+    env = Init.set_env()
+    assume_session = AWS.bootstrap(env)
+    Crypt.init(assume_session, env)
+
+    dbUrlParameter = AWS.get_parameter(assume_session, env, 'db/url')
+    dbPasswordParameter = AWS.get_parameter(assume_session, env, 'db/password')
+
+    with DB.connection(dbUrlParameter, dbPasswordParameter) as conn:
+        DB.create_tables(conn)
+        Migration.run(conn)
@@ -3,13 +3,25 @@ from util.crypt import Crypt
 from util.aws import AWS
 from util.db import DB
 from util.chatgpt import ChatGPT
+from util.fetcher import Fetcher
+from util.candle import CandleStore
+from util.indicator import IndicatorStore
+from util.ratelimit import RateLimiter
+from util.rule import Rule
+from util.journal import Journal
+from util.memory import TradeMemory
+from util.execution import ExecutionEngine, UpbitExchange
+from util.order import OrderTracker
+from util.scheduler import Scheduler
+from util.feed import TickFeed, ReplaySource
+from util.trace import Trace
+from concurrent.futures import ProcessPoolExecutor
 from util.log import Log
 import pandas as pd
 import pyupbit
-import time
+import os
 import requests
-import schedule
-import ta
+import signal
 from ta.utils import dropna
 
 ### 로깅 설정
@@ -18,41 +30,28 @@ logger = Log()
 # 환경변수 로드
 env = Init.set_env()
 
-### TA 라이브러리를 이용하여 df 데이터에 보조지표 추가
-### 추가한 보조 지표 : 볼린저 밴드, RSI, MACD, 이동평균선 
-def add_indicators(df):
-    # 볼린저 밴드 추가
-    # window 값 만큼의 데이터가 있어야 산출이 가능
-    # window dev는 표준편차 값 설정
-    indicator_bb = ta.volatility.BollingerBands(close=df['close'], window=20, window_dev=2)
-    df['bb_bbm'] = indicator_bb.bollinger_mavg()
-    df['bb_bbh'] = indicator_bb.bollinger_hband()
-    df['bb_bbl'] = indicator_bb.bollinger_lband()
-
-    # RSI (Relative Strength Index) 추가
-    # 최소 14일치의 데이터가 있어야 조회 가능
-    df['rsi'] = ta.momentum.RSIIndicator(close=df['close'], window=14).rsi()
-
-    # 이동평균선 
-    # sma : 단순 이동평균선
-    # ema : 지수 이동평균선
-    # window 값 만큼의 데이터가 있어야 산출이 가능
-    df['sma_5'] = ta.trend.SMAIndicator(close=df['close'], window=5).sma_indicator()
-    df['ema_7'] = ta.trend.EMAIndicator(close=df['close'], window=7).ema_indicator()
-
-    # # MACD (Moving Average Convergence Divergence) 추가
-    # macd = ta.trend.MACD(close=df['close'])
-    # df['macd'] = macd.macd()
-    # df['macd_signal'] = macd.macd_signal()
-    # df['macd_diff'] = macd.macd_diff()
-
-    #  # Stochastic Oscillator 추가
-    # stoch = ta.momentum.StochasticOscillator(
-    #     high=df['high'], low=df['low'], close=df['close'], window=14, smooth_window=3)
-    # df['stoch_k'] = stoch.stoch()
-    # df['stoch_d'] = stoch.stoch_signal()
-    
-    return df
+### 프로세스 종료 전 저널 반영을 기다리는 최대 시간 (초), 남은 기록은 다음 실행에서 반영
+JOURNAL_FLUSH_TIMEOUT = 15
+
+### 투자 판단 후 reason 수신 완료까지 기다리는 최대 시간 (초)
+REASON_TIMEOUT = 60
+
+### 현재가 조회 (실시간 수신기가 있으면 메모리 값 사용)
+def get_current_price(ticker):
+    feed = TickFeed.active()
+    price = feed.price(ticker) if feed else None
+    if price is not None:
+        return price
+    RateLimiter.wait("quotation")
+    return pyupbit.get_current_price(ticker)
+
+### 캔들 조회 (실시간 수신기가 만든 분봉이 있으면 저장소 캔들과 이어 붙여 사용)
+def get_ohlcv(candle_store, ticker, interval="day", count=200):
+    feed = TickFeed.active()
+    df = feed.get_ohlcv(candle_store, ticker, interval, count) if feed else None
+    if df is not None:
+        return df
+    return candle_store.get_ohlcv(ticker, interval=interval, count=count)
 
 ### 공포 탐욕 지수 API 호출
 def get_fear_and_greed_index():
@@ -72,7 +71,7 @@ def get_transaction_volume():
     url = "https://api.blockchain.info/charts/estimated-transaction-volume?timespan=1months&format=json"
 
     # API 호출
-    response = requests.get(url)
+    response = requests.get(url, timeout=10)
 
     # 응답 상태 코드 확인
     if response.status_code == 200:  # 200은 요청 성공
@@ -93,7 +92,7 @@ def get_hash_rate():
     url = "https://api.blockchain.info/charts/hash-rate?timespan=1months&format=json"
 
     # API 호출
-    response = requests.get(url)
+    response = requests.get(url, timeout=10)
 
     # 응답 상태 코드 확인
     if response.status_code == 200:  # 200은 요청 성공
@@ -109,11 +108,30 @@ def get_hash_rate():
         logger.recordLog(Log.ERROR, "Error getting btc hash rate", f"{response.status_code}")
         return None
 
+### 미리 생성된 최근 반성 일기 (reflect.py)
+def get_reflection(dbUrlParameter, dbPasswordParameter, ticker):
+    with DB.connection(dbUrlParameter, dbPasswordParameter) as conn:
+        return DB.get_latest_reflection(conn, ticker)
+
 ### 자동 트레이드 메서드
-def ai_trading(env):
+### krw_budget : 여러 종목을 동시에 거래할 때 이 종목에 배정된 KRW (None 이면 보유 KRW 전체 기준)
+### 실행 단계별 소요 시간과 호출 수는 TRACE_ENABLED=1 일 때 TRACE_PATH 에 저장
+### 실행 중 로그에는 같은 run_id 와 ticker, 현재 단계(stage)가 함께 기록됨
+def ai_trading(env, ticker="KRW-BTC", krw_budget=None):
+    Trace.start_run(Log.start_run(ticker=ticker), ticker=ticker)
+    try:
+        return trade_market(env, ticker, krw_budget)
+    finally:
+        Trace.finish_run(f"autotrade_{ticker}")
+        # 워커 프로세스에서는 이 실행의 로그를 부모 프로세스로 모두 전달한 뒤 반환
+        Log.flush()
 
-    # AWS Assume Role로 접근
-    assume_session = AWS.get_assume_role(env)
+def trade_market(env, ticker, krw_budget):
+    currency = ticker.split("-")[1]
+
+    # AWS Assume Role로 접근 및 필요한 파라미터 일괄 로드 (프로세스 내에서는 캐시 재사용)
+    with Trace.span("bootstrap"):
+        assume_session = AWS.bootstrap(env)
 
     ### AWS Parameter Store에 접근하여 암호화 키 가져오기
     upbitAccessParameter = AWS.get_parameter(assume_session, env, 'key/upbit-access')
@@ -122,13 +140,17 @@ def ai_trading(env):
     ### 암호화 키 호출
     Crypt.init(assume_session, env)
 
-    # 데이터베이스 초기화
-    DB.init_db(assume_session, env)
-
-    # 데이터 베이스 연결
+    # 데이터 베이스 연결 정보 (연결은 사용 시점에 풀에서 빌림)
     dbUrlParameter = AWS.get_parameter(assume_session, env, 'db/url')
     dbPasswordParameter = AWS.get_parameter(assume_session, env, 'db/password')
-    conn = DB.get_db_connection(dbUrlParameter, dbPasswordParameter)
+
+    # 데이터베이스 초기화 (RDS 가 중지되어 있어도 거래는 계속 진행)
+    # 연결 가능하면 이전 실행에서 반영하지 못한 거래 기록을 백그라운드로 반영
+    journal = Journal()
+    with Trace.span("db_init"):
+        db_available = DB.init_db(assume_session, env)
+    if db_available:
+        journal.flush_async(DB.journal_writer(dbUrlParameter, dbPasswordParameter))
 
     # Upbit 객체 생성
     accessKey = Crypt.decrypt_env_value(upbitAccessParameter)
@@ -142,18 +164,52 @@ def ai_trading(env):
         logger.recordLog(Log.ERROR, "Error", "OpenAI API key is missing or invalid.")
         return None
     
-    # 1. 차트 데이터 조회 및 보조지표 추가
-    # 30일 일봉 데이터
-    df_daily = pyupbit.get_ohlcv("KRW-BTC", interval="day", count=50)  ## RSI 데이터 제공으로 인해 14일 추가하여 호출
-    df_daily = add_indicators(df_daily)
-    df_daily = dropna(df_daily) 
-    df_daily.rename(columns={'value': 'value_krw'}, inplace=True)  
-
-    # 7일 시간봉 데이터
-    df_hourly = pyupbit.get_ohlcv("KRW-BTC", interval="minute60", count=174) ## RSI 데이터 제공으로 인해 14시간 추가하여 호출
-    df_hourly = add_indicators(df_hourly)
-    df_hourly = dropna(df_hourly)
-    df_hourly.rename(columns={'value': 'value_krw'}, inplace=True)
+    # 1~6. 시장 데이터 동시 조회
+    # 소스별로 deadline 을 두고, 필수가 아닌 소스는 실패하더라도 나머지 데이터로 진행
+    # 캔들은 로컬 저장소에 없는 구간만 조회
+    fetcher = Fetcher()
+    candle_store = CandleStore()
+    # 30일 일봉 데이터 (RSI 데이터 제공으로 인해 14일 추가하여 호출)
+    fetcher.add("daily_ohlcv", get_ohlcv, candle_store, ticker, interval="day", count=50, timeout=10, required=True)
+    # 7일 시간봉 데이터 (RSI 데이터 제공으로 인해 14시간 추가하여 호출)
+    fetcher.add("hourly_ohlcv", get_ohlcv, candle_store, ticker, interval="minute60", count=174, timeout=10, required=True)
+    # 공포 탐욕 지수
+    fetcher.add("fear_greed_index", get_fear_and_greed_index, timeout=10)
+    # 현재 투자 상태
+    fetcher.add("balances", RateLimiter.limited("exchange", upbit.get_balances), timeout=5, required=True)
+    # 오더북 (호가 데이터)
+    fetcher.add("orderbook", RateLimiter.limited("quotation", pyupbit.get_orderbook), ticker, timeout=5)
+    # BTC의 Hash rate (채굴량)
+    fetcher.add("hash_rate", get_hash_rate, timeout=10)
+    # BTC의 Estimated Transaction Volume (전체 예상 거래량)
+    fetcher.add("transaction_volume", get_transaction_volume, timeout=10)
+    # 반성 일기 (reflect.py 에서 미리 생성해 둔 내용만 조회)
+    if db_available:
+        fetcher.add("reflection", get_reflection, dbUrlParameter, dbPasswordParameter, ticker, timeout=5)
+    with Trace.span("market_data"):
+        market_data = fetcher.gather()
+
+    missing = fetcher.missing_required()
+    if missing:
+        logger.recordLog(Log.ERROR, "Error", f"Required market data is missing : {missing}")
+        return
+
+    # 보조지표 추가
+    # 이전 실행까지 계산된 지표는 저장된 값을 쓰고, 새 캔들만 증분 계산
+    with Trace.span("indicators"):
+        indicator_store = IndicatorStore(candle_store.path)
+        df_daily = indicator_store.apply(ticker, "day", market_data["daily_ohlcv"])
+        df_daily = dropna(df_daily).tail(30)
+        df_daily.rename(columns={'value': 'value_krw'}, inplace=True)
+
+        df_hourly = indicator_store.apply(ticker, "minute60", market_data["hourly_ohlcv"])
+        df_hourly = dropna(df_hourly).tail(168)
+        df_hourly.rename(columns={'value': 'value_krw'}, inplace=True)
+
+    # 거래 기억 : 지난 판단과 결과의 고정 크기 요약 (현재 시장 국면 표시)
+    memory = TradeMemory()
+    regime = TradeMemory.regime(df_daily)
+    memory_context = memory.context(ticker, regime)
 
     # df_hourly.to_csv('output.csv', index=True)
 
@@ -161,21 +217,20 @@ def ai_trading(env):
     # df_daily_recent = df_daily.tail(30)
     # df_hourly_recent = df_hourly.tail(24)
 
-    # 2. 공포 탐욕 지수 가져오기
-    fear_greed_index = get_fear_and_greed_index()
+    fear_greed_index = market_data["fear_greed_index"]
 
-    # 3. 현재 투자 상태 조회 (KRW, BTC 만 조회)
-    all_balances = upbit.get_balances()
-    filtered_balances = [balance for balance in all_balances if balance['currency'] in ['BTC','KRW']]
+    # 현재 투자 상태 (KRW, 거래 종목만 조회)
+    # 배정된 KRW 가 있으면 AI 에게도 배정된 금액만 보여줌
+    all_balances = market_data["balances"]
+    filtered_balances = [dict(balance) for balance in all_balances if balance['currency'] in [currency,'KRW']]
+    if krw_budget is not None:
+        for balance in filtered_balances:
+            if balance['currency'] == 'KRW':
+                balance['balance'] = str(min(float(balance['balance']), krw_budget))
     
-    # 4. KRW-BTC 오더북 (호가 데이터) 조회
-    orderbook = pyupbit.get_orderbook("KRW-BTC")
-
-    # 5. BTC의 Hash rate (채굴량) 조회
-    hash_rate_data = get_hash_rate()
-
-    # 6. BTC의 Estimated Transaction Volume (전체 예상 거래량) 조회
-    transaction_volumes = get_transaction_volume()
+    orderbook = market_data["orderbook"]
+    hash_rate_data = market_data["hash_rate"]
+    transaction_volumes = market_data["transaction_volume"]
 
     # # # 5. 최근 거래 내역 가져오기
     # recent_trades = DB.get_recent_trades(conn)
@@ -188,106 +243,194 @@ def ai_trading(env):
     #     "hourly_ohlcv": df_hourly.to_dict()
     # }
 
-    # 반성 및 개선 내용 생성
-    reflection = ''
-    # reflection = openAi.generate_reflection(openAiClient, recent_trades, current_market_data)
+    # 반성 및 개선 내용 : 거래 실행 중에는 생성하지 않고 reflect.py 가 미리 기록한 내용을 사용
+    reflection = market_data.get("reflection") or ''
     
-    # AI에 투자 판단 요청
-    response_text = openAi.generate_trade(
-        openAiClient, 
-        filtered_balances, 
-        orderbook, 
-        df_daily, 
-        df_hourly, 
-        fear_greed_index,
-        hash_rate_data,
-        transaction_volumes
-        )
+    # AI에 투자 판단 요청 (스트리밍 응답에서 decision, percentage 가 확정되는 즉시 진행)
+    with Trace.span("llm"):
+        ai_decision = openAi.decide_trade(
+            openAiClient,
+            filtered_balances,
+            orderbook,
+            df_daily,
+            df_hourly,
+            fear_greed_index,
+            hash_rate_data,
+            transaction_volumes,
+            ticker,
+            reflection,
+            memory_context,
+            )
     # response_text = openAi.generate_trade(openAiClient, filtered_balances, orderbook, df_daily_recent, df_hourly_recent, fear_greed_index, reflection)
 
-    # AI의 응답내용 파싱
-    parsed_response = openAi.parse_ai_response(response_text)
-    logger.recordLog(Log.INFO, "INFO", parsed_response)
-    if not parsed_response:
+    if ai_decision is None:
         logger.recordLog(Log.ERROR, "Error", "Failed to parse AI response")
         return 
 
-    decision = parsed_response.get('decision')
-    percentage = parsed_response.get('percentage')
-    reason = parsed_response.get('reason')
-
-    if not decision or reason is None:
-        logger.recordLog(Log.ERROR, "Error", "Incomplete data in AI response.")
-        return
+    decision = ai_decision.decision
+    percentage = ai_decision.percentage
 
     order_executed = False
+    fill = None
 
     if decision == "buy":
+        RateLimiter.wait("exchange")
         my_krw = upbit.get_balance("KRW")
         if my_krw is None:
             logger.recordLog(Log.ERROR, "Error", "Failed to retrieve KRW balance.")
             return
-        buy_amount = my_krw * (percentage / 100) * 0.9995
-        if buy_amount > 5000:
+        if krw_budget is not None:
+            my_krw = min(my_krw, krw_budget)
+        buy_amount = Rule.buy_amount(my_krw, percentage)
+        if Rule.is_orderable(buy_amount):
             logger.recordLog(Log.INFO, "Buy Order Executed", f"{percentage}% of available KRW")
-            try:                
-                order = upbit.buy_market_order("KRW-BTC", buy_amount)
-                time.sleep(5) # 거래 데이터가 반영되지 않는 것이 확인되어 sleep코드 추가
-                if order:
-                    logger.recordLog(Log.INFO, "Buy order executed successfullly", f"{order}")
+            try:
+                # 호가 잔량에 맞추어 나누어 주문하고 체결 완료까지 대기
+                with Trace.span("order", side="buy"):
+                    fill = ExecutionEngine(UpbitExchange(upbit)).execute(ticker, "buy", buy_amount)
+                if OrderTracker.is_filled(fill):
+                    logger.recordLog(Log.INFO, "Buy order executed successfullly", fill, latency=fill["elapsed"])
                     order_executed = True
                 else:
-                    logger.recordLog(Log.ERROR, "Error", "Buy order failed.")
+                    logger.recordLog(Log.ERROR, "Error", f"Buy order failed. {fill}")
             except Exception as e:
                 logger.recordLog(Log.ERROR, "Error executing buy order", f"{e}")
         else:
             logger.recordLog(Log.WARNING, "Buy Order Failed", "Insufficient KRW (less than 5000 KRW)")
     elif decision == "sell":
-        my_btc = upbit.get_balance("KRW-BTC")
-        if my_btc is None:
-            logger.ERROR(Log.ERROR, "Error", "Failed to retrieve BTC balance.")
+        RateLimiter.wait("exchange")
+        my_coin = upbit.get_balance(ticker)
+        if my_coin is None:
+            logger.recordLog(Log.ERROR, "Error", f"Failed to retrieve {currency} balance.")
             return
-        sell_amount = my_btc * (percentage / 100)
-        current_price = pyupbit.get_current_price("KRW-BTC")
-        if sell_amount * current_price > 5000:
-            logger.recordLog(Log.INFO, "Sell Order Executed", f"{percentage}% of held BTC")
+        sell_amount = Rule.sell_volume(my_coin, percentage)
+        current_price = get_current_price(ticker)
+        if Rule.is_orderable(sell_amount * current_price):
+            logger.recordLog(Log.INFO, "Sell Order Executed", f"{percentage}% of held {currency}")
             try:
-                order = upbit.sell_market_order("KRW-BTC", sell_amount)
-                time.sleep(5) # 거래 데이터가 반영되지 않는 것이 확인되어 sleep코드 추가
-                if order:
+                with Trace.span("order", side="sell"):
+                    fill = ExecutionEngine(UpbitExchange(upbit)).execute(ticker, "sell", sell_amount)
+                if OrderTracker.is_filled(fill):
+                    logger.recordLog(Log.INFO, "Sell order executed successfullly", fill, latency=fill["elapsed"])
                     order_executed = True
                 else:
-                    logger.recordLog(Log.ERROR, "Error", "Sell order failed.")
+                    logger.recordLog(Log.ERROR, "Error", f"Sell order failed. {fill}")
             except Exception as e:
                 logger.recordLog(Log.ERROR, "Error executing sell order", f"{e}")
         else:
-            logger.recordLog(Log.WARNING, "Sell Order Failed", "Insufficient BTC (less than 5000 KRW worth)")
+            logger.recordLog(Log.WARNING, "Sell Order Failed", f"Insufficient {currency} (less than 5000 KRW worth)")
     elif decision == "hold":
         logger.recordLog(Log.INFO, "INFO", "### Hold Position ###")
     else:
         logger.recordLog(Log.ERROR, "ERROR", "Invalid decision received from AI.")
     
+    if fill is not None and fill["status"] != ExecutionEngine.DONE:
+        logger.recordLog(Log.WARNING, "Order not completed", f"{fill['status']} {fill['progress']:.1%} of target after {fill['elapsed']}s")
+
     # 거래 실행 여부와 관계없이 현재 잔고 조회
-    balances = upbit.get_balances()
-    btc_balance = next((float(balance['balance']) for balance in balances if balance['currency'] == 'BTC'), 0)
+    with Trace.span("balances"):
+        RateLimiter.wait("exchange")
+        balances = upbit.get_balances()
+        current_btc_price = get_current_price(ticker)
+    btc_balance = next((float(balance['balance']) for balance in balances if balance['currency'] == currency), 0)
     krw_balance = next((float(balance['balance']) for balance in balances if balance['currency'] == 'KRW'), 0)
-    btc_avg_buy_price = next((float(balance['avg_buy_price']) for balance in balances if balance['currency'] == 'BTC'), 0)
-    current_btc_price = pyupbit.get_current_price("KRW-BTC")
-
-    # 거래 정보 로깅
-    DB.log_trade(conn, decision, percentage if order_executed else 0, reason, 
-              btc_balance, krw_balance, btc_avg_buy_price, current_btc_price, reflection)
-
-    conn.close()
-
-# ai_trading(env)
-
-# 주기를 12시간 마다 인것을 고려
-# schedule.every().day.at("05:00").do(ai_trading, env)    # Trigger at 14:00 (KST)
-schedule.every().day.at("11:00").do(ai_trading, env)    # Trigger at 20:00 (KST)
-# schedule.every().day.at("17:00").do(ai_trading, env)    # Trigger at 02:00 (KST)
-schedule.every().day.at("23:00").do(ai_trading, env)    # Trigger at 08:00 (KST)
+    btc_avg_buy_price = next((float(balance['avg_buy_price']) for balance in balances if balance['currency'] == currency), 0)
+
+    # 거래 정보 로깅 : 로컬 저널에 먼저 기록한 뒤 DB 에는 백그라운드로 반영
+    with Trace.span("journal"):
+        # 판단 근거(reason)는 주문과 별도로 수신되므로 기록 직전에 대기
+        reason = ai_decision.reason(REASON_TIMEOUT)
+        if not ai_decision.finished:
+            logger.recordLog(Log.WARNING, "AI reason pending", f"not finished within {REASON_TIMEOUT}s")
+        journal.wait(JOURNAL_FLUSH_TIMEOUT)
+        # reflection 은 reflect.py 가 이 거래까지의 기록으로 생성하여 나중에 채움
+        journal.append(DB.trade_record(decision, percentage if order_executed else 0, reason,
+                      btc_balance, krw_balance, btc_avg_buy_price, current_btc_price, '', ticker, fill))
+    with Trace.span("db_flush"):
+        journal.flush_async(DB.journal_writer(dbUrlParameter, dbPasswordParameter))
+        flushed = journal.wait(JOURNAL_FLUSH_TIMEOUT)
+    if not flushed:
+        logger.recordLog(Log.WARNING, "Journal flush pending", f"{journal.count_pending()} records kept in {journal.path}")
+
+    # 거래 기억 갱신 : 체결되지 않은 buy / sell 은 포지션 변화가 없으므로 hold 로 기록
+    # 기록에 실패해도 (SQLite 잠금, 디스크 오류 등) 거래 기록 반영에는 영향 없음
+    try:
+        memory.record(ticker, decision if order_executed else "hold", percentage if order_executed else 0, current_btc_price, regime)
+    except Exception as e:
+        logger.recordLog(Log.WARNING, "Trade memory update failed", f"{e}")
+    logger.recordLog(Log.INFO, "DB pool", DB.pool.stats())
+
+### 여러 종목 동시 거래
+### 보유 KRW 를 종목 수만큼 나누어 배정한 뒤 종목별로 워커 프로세스에서 ai_trading 실행
+### 모든 워커는 하나의 RateLimiter 를 공유하여 Upbit 요청 제한을 함께 지킴
+### 워커의 로그는 부모 프로세스로 전달되어 부모만 로그 파일에 기록
+MAX_WORKERS = 8
+
+def init_worker(limiter, log_pipe):
+    RateLimiter.install(limiter)
+    Log.setup_worker(log_pipe)
+
+def run_markets(env, tickers):
+    if len(tickers) == 1:
+        return ai_trading(env, tickers[0])
+
+    # 배정 금액 계산을 위한 KRW 잔고 조회
+    # 워커 프로세스는 부모에서 로드한 세션 / 파라미터 캐시를 그대로 물려받음
+    assume_session = AWS.bootstrap(env)
+    Crypt.init(assume_session, env)
+    accessKey = Crypt.decrypt_env_value(AWS.get_parameter(assume_session, env, 'key/upbit-access'))
+    secretKey = Crypt.decrypt_env_value(AWS.get_parameter(assume_session, env, 'key/upbit-secret'))
+    my_krw = pyupbit.Upbit(accessKey, secretKey).get_balance("KRW")
+    if my_krw is None:
+        logger.recordLog(Log.ERROR, "Error", "Failed to retrieve KRW balance.")
+        return
 
-while 1:
-    schedule.run_pending()
-    time.sleep(1)
\ No newline at end of file
+    # 종목별 배정 금액의 합이 보유 KRW 를 넘지 않도록 균등 배분
+    krw_budget = my_krw / len(tickers)
+    logger.recordLog(Log.INFO, "Multi-market run", f"{len(tickers)} markets, {krw_budget:,.0f} KRW each")
+
+    limiter = RateLimiter()
+    with ProcessPoolExecutor(
+        max_workers=min(len(tickers), MAX_WORKERS),
+        initializer=init_worker,
+        initargs=(limiter, Log.worker_pipe()),
+    ) as executor:
+        futures = {ticker: executor.submit(ai_trading, env, ticker, krw_budget) for ticker in tickers}
+        for ticker, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                logger.recordLog(Log.ERROR, f"Error trading {ticker}", f"{e}")
+
+tickers = Init.get_tickers()
+
+# run_markets(env, tickers)
+
+if __name__ == "__main__":
+    # 로그 출력 시작 (stderr 와 LOG_FILE)
+    Log.setup()
+
+    # 기본 주기는 12시간 (11:00 / 23:00, KST 20:00 / 08:00), TRADE_SCHEDULE 로 변경 가능 (예: "*/15 * * * *")
+    # 재시작 중 놓친 실행은 TRADE_CATCHUP 정책에 따라 처리 (기본 : TRADE_CATCHUP_WINDOW 이내의 최근 1회만 실행)
+    scheduler = Scheduler()
+    scheduler.add(
+        "trade", Init.get_schedule(), run_markets, env, tickers,
+        catchup=os.getenv("TRADE_CATCHUP", Scheduler.ONCE),
+        catchup_window=int(os.getenv("TRADE_CATCHUP_WINDOW", "3600")),
+        jitter=int(os.getenv("TRADE_JITTER", "0")),
+    )
+
+    # 실시간 체결 수신 (TICK_FEED_ENABLED=1), TICK_FEED_REPLAY 를 지정하면 기록된 메시지를 재생
+    # TICK_FEED_RECORD 를 지정하면 수신한 메시지를 JSON lines 로 기록
+    if os.getenv("TICK_FEED_ENABLED", "0") == "1":
+        feed = TickFeed(tickers, record_path=os.getenv("TICK_FEED_RECORD"))
+        replay = os.getenv("TICK_FEED_REPLAY")
+        feed.start(ReplaySource(replay) if replay else None)
+
+    # 컨테이너 종료 시 진행 중인 거래는 마친 뒤 종료
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop())
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.stop()
+    logger.recordLog(Log.INFO, "Scheduler stopped", scheduler.stats())
@@ -0,0 +1,45 @@
+from util.init import Init
+from util.log import Log
+from util.aws import AWS
+from util.crypt import Crypt
+from util.chatgpt import ChatGPT
+from util.db import DB
+from util.memory import TradeMemory
+from util.reflection import ReflectionBatch
+import os
+import sys
+
+### 반성 일기 오프라인 생성 (거래 실행과 별도로 실행)
+### 실행 : python reflect.py <env> [submit | poll | run]
+###   submit : batch 제출 후 종료
+###   poll   : 제출한 batch 가 끝났으면 결과를 trades.reflection 에 기록
+###   run    : poll 후 제출, REFLECTION_WAIT 초 동안 완료 대기 (기본값)
+### 거래 실행 사이에 주기적으로 실행 (예: 거래 1시간 전 submit, 거래 직전 poll)
+
+REFLECTION_WAIT = int(os.getenv("REFLECTION_WAIT", "0"))
+
+MODES = ("submit", "poll", "run")
+USAGE = "Usage : python reflect.py <env> [submit | poll | run]"
+
+if __name__ == "__main__":
+    mode = sys.argv[2] if len(sys.argv) > 2 else "run"
+    if mode not in MODES:
+        print(f"Unknown mode : {mode}\n{USAGE}", file=sys.stderr)
+        sys.exit(2)
+
+    Log.setup()
+    env = Init.set_env()
+    assume_session = AWS.bootstrap(env)
+    Crypt.init(assume_session, env)
+
+    dbUrlParameter = AWS.get_parameter(assume_session, env, 'db/url')
+    dbPasswordParameter = AWS.get_parameter(assume_session, env, 'db/password')
+
+    job = ReflectionBatch(ChatGPT(assume_session, env).init(), memory=TradeMemory())
+    with DB.connection(dbUrlParameter, dbPasswordParameter) as conn:
+        if mode in ("poll", "run"):
+            job.poll(conn)
+        if mode == "submit":
+            job.submit(conn, Init.get_tickers())
+        elif mode == "run":
+            job.run(conn, Init.get_tickers(), wait=REFLECTION_WAIT)
@@ -1,33 +1,100 @@
+from util.log import Log
+from datetime import datetime, timezone
 import boto3
+import threading
+import time
 
+### 로컬 대체 서버(moto 등)로 테스트할 때는 boto3 표준 환경변수로 endpoint 지정
+### AWS_ENDPOINT_URL_STS, AWS_ENDPOINT_URL_SSM (test/fake_aws_server.py, 확인 : python test/aws_check.py)
 class AWS:
     AWS_DEFAULT_REGION = "ap-northeast-2"
 
+    ### 임시 자격 증명 만료 전 갱신 여유 시간 (초)
+    REFRESH_MARGIN = 300
+
+    ### SSM get_parameters 한 번에 조회 가능한 최대 개수
+    PARAMETER_BATCH_SIZE = 10
+
+    ### 트레이딩 실행에 필요한 파라미터 목록
+    PARAMETERS = [
+        'key/upbit-access',
+        'key/upbit-secret',
+        'key/fernet',
+        'key/openai',
+        'db/url',
+        'db/password',
+    ]
+
+    ### 프로세스 단위 캐시 (Assume Role 세션, 파라미터 값)
+    _lock = threading.RLock()
+    _sessions = {}
+    _parameters = {}
+
+    ### 최근 bootstrap 소요 시간 (초)
+    bootstrap_seconds = None
+
     ### AWS Assume 권한 획득
+    ### 자격 증명이 만료되기 전까지는 이전 세션을 재사용
     def get_assume_role(env):
-        if env == "local":
-            boto3_session = boto3.Session(profile_name='choon')
-        else:
-            boto3_session = boto3.Session()    
-            
-        sts_client = boto3_session.client('sts')
-        assume_role_client = sts_client.assume_role(
-            RoleArn="arn:aws:iam::879780444466:role/choon-assume-role",
-            RoleSessionName="choon-session"
-        )
-
-        assume_session = boto3.Session(
-            aws_access_key_id=assume_role_client['Credentials']['AccessKeyId'],
-            aws_secret_access_key=assume_role_client['Credentials']['SecretAccessKey'],
-            aws_session_token=assume_role_client['Credentials']['SessionToken'],
-            region_name=AWS.AWS_DEFAULT_REGION
-        )
+        with AWS._lock:
+            cached = AWS._sessions.get(env)
+            if cached and (cached[1] - datetime.now(timezone.utc)).total_seconds() > AWS.REFRESH_MARGIN:
+                return cached[0]
 
-        return assume_session
+            if env == "local":
+                boto3_session = boto3.Session(profile_name='choon')
+            else:
+                boto3_session = boto3.Session()
+
+            sts_client = boto3_session.client('sts')
+            assume_role_client = sts_client.assume_role(
+                RoleArn="arn:aws:iam::879780444466:role/choon-assume-role",
+                RoleSessionName="choon-session"
+            )
+
+            assume_session = boto3.Session(
+                aws_access_key_id=assume_role_client['Credentials']['AccessKeyId'],
+                aws_secret_access_key=assume_role_client['Credentials']['SecretAccessKey'],
+                aws_session_token=assume_role_client['Credentials']['SessionToken'],
+                region_name=AWS.AWS_DEFAULT_REGION
+            )
+
+            AWS._sessions[env] = (assume_session, assume_role_client['Credentials']['Expiration'])
+            return assume_session
+
+    ### AWS Parameter Store에서 여러 값을 한 번에 조회 (이미 조회한 값은 캐시 사용)
+    def get_parameters(session, env, keyPaths):
+        with AWS._lock:
+            missing = [keyPath for keyPath in keyPaths if (env, keyPath) not in AWS._parameters]
+            if missing:
+                ssm_client = session.client('ssm')
+                for i in range(0, len(missing), AWS.PARAMETER_BATCH_SIZE):
+                    names = [f'/{env}/{keyPath}' for keyPath in missing[i:i + AWS.PARAMETER_BATCH_SIZE]]
+                    response = ssm_client.get_parameters(Names=names, WithDecryption=True)
+                    for parameter in response['Parameters']:
+                        keyPath = parameter['Name'][len(f'/{env}/'):]
+                        AWS._parameters[(env, keyPath)] = parameter['Value']
+                    if response.get('InvalidParameters'):
+                        raise KeyError(f"Parameters not found : {response['InvalidParameters']}")
+
+            return {keyPath: AWS._parameters[(env, keyPath)] for keyPath in keyPaths}
 
     ### AWS Parameter Store에 저장
     def get_parameter(session, env, keyPath):
-        ssm_client = session.client('ssm')
-        parameter = ssm_client.get_parameter(Name=f'/{env}/{keyPath}', WithDecryption=True)
-        
-        return parameter['Parameter']['Value']
\ No newline at end of file
+        return AWS.get_parameters(session, env, [keyPath])[keyPath]
+
+    ### 실행 준비 : Assume Role 세션 획득 후 필요한 파라미터를 한 번에 로드
+    def bootstrap(env, keyPaths=PARAMETERS):
+        start = time.monotonic()
+        assume_session = AWS.get_assume_role(env)
+        AWS.get_parameters(assume_session, env, keyPaths)
+        AWS.bootstrap_seconds = time.monotonic() - start
+        Log.recordLog(Log.INFO, "AWS bootstrap", f"{AWS.bootstrap_seconds:.3f}s")
+
+        return assume_session
+
+    ### 캐시 초기화 (자격 증명 / 파라미터 변경 시)
+    def clear_cache():
+        with AWS._lock:
+            AWS._sessions.clear()
+            AWS._parameters.clear()
@@ -0,0 +1,152 @@
+from util.indicator import add_indicators
+from util.rule import Rule
+import numpy as np
+import pandas as pd
+
+
+### 규칙 기반 전략 (RSI + 볼린저 밴드)
+### 과매도 구간에서 매수, 과매수 구간에서 매도
+class RuleStrategy:
+    def __init__(self, rsi_low=30, rsi_high=70, percentage=50):
+        self.rsi_low = rsi_low
+        self.rsi_high = rsi_high
+        self.percentage = percentage
+
+    def __call__(self, features, balances):
+        last = features.iloc[-1]
+        if last["rsi"] < self.rsi_low and last["close"] < last["bb_bbl"]:
+            return {"decision": "buy", "percentage": self.percentage, "reason": f"RSI {last['rsi']:.1f} below lower band"}
+        if last["rsi"] > self.rsi_high and last["close"] > last["bb_bbh"]:
+            return {"decision": "sell", "percentage": self.percentage, "reason": f"RSI {last['rsi']:.1f} above upper band"}
+        return {"decision": "hold", "percentage": 0, "reason": "No signal"}
+
+
+### 기록된 AI 판단 재생 (trades 테이블 조회 결과 또는 같은 컬럼을 가진 DataFrame)
+### 각 판단 시점에서 아직 사용하지 않은 가장 최근 기록을 적용하고, 없으면 hold
+class ReplayStrategy:
+    def __init__(self, trades_df):
+        trades_df = trades_df.sort_values("timestamp")
+        self.times = pd.to_datetime(trades_df["timestamp"]).to_numpy()
+        self.records = trades_df[["decision", "percentage", "reason"]].to_dict("records")
+        self.used = -1
+
+    def __call__(self, features, balances):
+        position = np.searchsorted(self.times, features.index[-1].to_datetime64(), side="right") - 1
+        if position <= self.used:
+            return {"decision": "hold", "percentage": 0, "reason": "No recorded decision"}
+        self.used = position
+        return self.records[position]
+
+
+class Backtest:
+    ### decide(features, balances) -> {"decision", "percentage", "reason"}
+    ###   features : 판단 시점까지의 캔들 + 보조지표 (최근 lookback 개)
+    ###   balances : upbit.get_balances() 와 같은 형태의 잔고 목록
+    ### every : 판단 주기 (캔들 수), 판단은 해당 캔들 종가에 체결된 것으로 계산
+    def __init__(self, df, decide, ticker="KRW-BTC", initial_krw=1_000_000, every=12, lookback=168):
+        self.df = df
+        self.decide = decide
+        self.currency = ticker.split("-")[1]
+        self.initial_krw = initial_krw
+        self.every = every
+        self.lookback = lookback
+
+    ### 잔고 목록 생성 (실제 거래와 같은 형태)
+    def _balances(self, krw, volume, avg_price):
+        return [
+            {"currency": "KRW", "balance": str(krw), "avg_buy_price": "0"},
+            {"currency": self.currency, "balance": str(volume), "avg_buy_price": str(avg_price)},
+        ]
+
+    def run(self):
+        features = add_indicators(self.df.copy())
+        close = features["close"].to_numpy(dtype=np.float64)
+
+        # 보조지표가 모두 산출된 시점부터 판단
+        start = int(np.argmax(features.notna().all(axis=1).to_numpy()))
+        decision_index = np.arange(start, len(features), self.every)
+
+        krw = float(self.initial_krw)
+        volume = 0.0
+        avg_price = 0.0
+        krw_after = np.empty(len(decision_index))
+        volume_after = np.empty(len(decision_index))
+        decisions = []
+
+        # 잔고가 이전 판단 결과에 따라 달라지므로 판단 자체는 순차 실행
+        for i, index in enumerate(decision_index):
+            window = features.iloc[max(0, index - self.lookback + 1):index + 1]
+            response = self.decide(window, self._balances(krw, volume, avg_price)) or {}
+            decision = response.get("decision")
+            percentage = response.get("percentage") or 0
+            price = close[index]
+            executed = False
+
+            if decision == "buy":
+                amount = Rule.buy_amount(krw, percentage)
+                if Rule.is_orderable(amount):
+                    bought = amount / price
+                    avg_price = (avg_price * volume + amount) / (volume + bought)
+                    volume += bought
+                    krw -= amount * (1 + Rule.FEE_RATE)
+                    executed = True
+            elif decision == "sell":
+                sold = Rule.sell_volume(volume, percentage)
+                if Rule.is_orderable(sold * price):
+                    volume -= sold
+                    krw += sold * price * (1 - Rule.FEE_RATE)
+                    avg_price = avg_price if volume > 0 else 0.0
+                    executed = True
+
+            krw_after[i] = krw
+            volume_after[i] = volume
+            decisions.append({
+                "timestamp": features.index[index],
+                "decision": decision,
+                "percentage": percentage if executed else 0,
+                "reason": response.get("reason"),
+                "price": price,
+            })
+
+        return BacktestResult(features.index[start:], close[start:], decision_index - start, krw_after, volume_after, decisions, self.initial_krw)
+
+
+class BacktestResult:
+    ### 판단 시점의 잔고를 캔들 단위로 펼쳐서 자산 곡선 / 손익 / 낙폭을 벡터 연산으로 계산
+    def __init__(self, index, close, decision_index, krw_after, volume_after, decisions, initial_krw):
+        self.decisions = pd.DataFrame(decisions)
+
+        # 각 캔들에서 마지막으로 적용된 판단의 위치
+        position = np.searchsorted(decision_index, np.arange(len(close)), side="right") - 1
+        krw = np.where(position >= 0, krw_after[np.maximum(position, 0)], initial_krw)
+        volume = np.where(position >= 0, volume_after[np.maximum(position, 0)], 0.0)
+
+        self.equity = krw + volume * close
+        self.pnl = self.equity - initial_krw
+        self.drawdown = self.equity / np.maximum.accumulate(self.equity) - 1
+        self.benchmark = initial_krw * close / close[0]
+        self.index = index
+        self.initial_krw = initial_krw
+
+    ### 캔들별 자산 / 손익 / 낙폭
+    def curve(self):
+        return pd.DataFrame({
+            "equity": self.equity,
+            "pnl": self.pnl,
+            "drawdown": self.drawdown,
+            "buy_and_hold": self.benchmark,
+        }, index=self.index)
+
+    ### 요약 지표
+    def summary(self):
+        executed = self.decisions[self.decisions["percentage"] > 0] if not self.decisions.empty else self.decisions
+        return {
+            "start": str(self.index[0]) if len(self.index) else None,
+            "end": str(self.index[-1]) if len(self.index) else None,
+            "final_equity": float(self.equity[-1]) if len(self.equity) else float(self.initial_krw),
+            "return_pct": float(self.pnl[-1] / self.initial_krw * 100) if len(self.pnl) else 0.0,
+            "buy_and_hold_pct": float((self.benchmark[-1] / self.initial_krw - 1) * 100) if len(self.benchmark) else 0.0,
+            "max_drawdown_pct": float(self.drawdown.min() * 100) if len(self.drawdown) else 0.0,
+            "decisions": len(self.decisions),
+            "trades": len(executed),
+        }
@@ -0,0 +1,125 @@
+from util.log import Log
+from util.ratelimit import RateLimiter
+from datetime import datetime, timedelta, timezone
+import math
+import os
+import sqlite3
+import pandas as pd
+import pyupbit
+
+
+class CandleStore:
+    ### 캔들 저장소 기본 경로 (컨테이너 재시작 후에도 유지하려면 볼륨으로 마운트)
+    DEFAULT_PATH = os.getenv("CANDLE_STORE_PATH", os.path.join("data", "candles.db"))
+
+    ### Upbit 캔들 시간은 KST 기준
+    KST = timezone(timedelta(hours=9))
+
+    COLUMNS = ["open", "high", "low", "close", "volume", "value"]
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute('''
+                    CREATE TABLE IF NOT EXISTS candles (
+                        ticker TEXT NOT NULL,
+                        interval TEXT NOT NULL,
+                        ts TEXT NOT NULL,
+                        open REAL,
+                        high REAL,
+                        low REAL,
+                        close REAL,
+                        volume REAL,
+                        value REAL,
+                        PRIMARY KEY (ticker, interval, ts)
+                    ) WITHOUT ROWID
+                ''')
+        conn.commit()
+        conn.close()
+
+    ### 스레드마다 별도 연결을 사용 (동시 조회 단계에서 호출됨)
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    ### 캔들 간격 (분/일/주 단위만 증분 조회 가능)
+    def interval_delta(interval):
+        if interval.startswith("minute"):
+            return timedelta(minutes=int(interval[len("minute"):] or 1))
+        if interval in ("day", "days"):
+            return timedelta(days=1)
+        if interval in ("week", "weeks"):
+            return timedelta(weeks=1)
+        return None
+
+    ### 저장된 마지막 캔들 시각
+    def last_timestamp(self, ticker, interval):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT MAX(ts) FROM candles WHERE ticker = ? AND interval = ?", (ticker, interval)
+        ).fetchone()
+        conn.close()
+        return pd.Timestamp(row[0]) if row and row[0] else None
+
+    ### 마지막 저장 시각 이후의 캔들만 조회하여 저장
+    ### 마지막 캔들은 아직 마감되지 않았을 수 있으므로 다시 받아 덮어씀
+    def sync(self, ticker, interval="day", count=200):
+        last = self.last_timestamp(ticker, interval)
+        delta = CandleStore.interval_delta(interval)
+
+        if last is None or delta is None:
+            fetch_count = count
+        else:
+            now = datetime.now(CandleStore.KST).replace(tzinfo=None)
+            # 새로 생긴 캔들 수 + 진행 중이던 마지막 캔들
+            fetch_count = min(int((now - last.to_pydatetime()) / delta) + 1, count)
+            fetch_count = max(fetch_count, 1)
+
+        # pyupbit 은 200개 단위로 나누어 요청
+        RateLimiter.wait("quotation", math.ceil(fetch_count / 200))
+        df = pyupbit.get_ohlcv(ticker, interval=interval, count=fetch_count)
+        if df is None or df.empty:
+            Log.recordLog(Log.WARNING, "Candle sync failed", f"{ticker} {interval}, using stored candles")
+            return 0
+
+        self.save(ticker, interval, df)
+        return len(df)
+
+    ### 캔들 저장 (같은 시각의 캔들은 최신 값으로 교체)
+    def save(self, ticker, interval, df):
+        rows = [
+            (ticker, interval, index.isoformat(), *(float(row[column]) for column in CandleStore.COLUMNS))
+            for index, row in df[CandleStore.COLUMNS].iterrows()
+        ]
+        conn = self._connect()
+        conn.executemany('''
+                    INSERT OR REPLACE INTO candles
+                    (ticker, interval, ts, open, high, low, close, volume, value)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+        conn.commit()
+        conn.close()
+
+    ### 저장된 최근 캔들 조회 (pyupbit.get_ohlcv 와 같은 형태의 DataFrame)
+    def load(self, ticker, interval="day", count=200):
+        conn = self._connect()
+        rows = conn.execute('''
+                    SELECT ts, open, high, low, close, volume, value FROM candles
+                    WHERE ticker = ? AND interval = ?
+                    ORDER BY ts DESC LIMIT ?
+                ''', (ticker, interval, count)).fetchall()
+        conn.close()
+
+        df = pd.DataFrame.from_records(rows[::-1], columns=["ts"] + CandleStore.COLUMNS)
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("ts")), name=None)
+        return df
+
+    ### 증분 조회 후 저장소에서 읽기
+    def get_ohlcv(self, ticker, interval="day", count=200):
+        self.sync(ticker, interval, count)
+        df = self.load(ticker, interval, count)
+        return df if not df.empty else None
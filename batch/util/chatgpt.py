@@ -1,23 +1,209 @@
 from util.crypt import Crypt
 from util.aws import AWS
+from util.decision import DecisionError, DecisionStream, parse_decision
+from util.llm import LLMRequest
 from util.log import Log
+from util.prompt import Prompt
+from util.trace import Trace
 from openai import OpenAI
+from collections import OrderedDict
+import hashlib
 import json
-import re
+import os
+import threading
+import time
+
+
+class ResponseCache:
+    ### 디스크 캐시 기본 경로와 유효 시간 (초)
+    DEFAULT_PATH = os.getenv("LLM_CACHE_PATH", os.path.join("data", "llm_cache"))
+    DEFAULT_TTL = int(os.getenv("LLM_CACHE_TTL", "3600"))
+
+    ### 메모리 LRU 최대 항목 수
+    MAX_ENTRIES = 128
+
+    ### 만료된 디스크 항목 정리 주기 (초), put 할 때 주기가 지났으면 정리
+    ### 투자 판단 프롬프트는 실시간 시세를 포함하여 같은 키로 다시 조회되지 않으므로 get 에서의 삭제만으로는 정리되지 않음
+    SWEEP_INTERVAL = int(os.getenv("LLM_CACHE_SWEEP_INTERVAL", "3600"))
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=MAX_ENTRIES, sweep_interval=SWEEP_INTERVAL):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self.last_sweep = 0.0
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    ### 모델, 메시지, 파라미터로 만든 캐시 키 (내용이 같으면 같은 키)
+    def key(model, messages, params=None):
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params or {}},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], f"{key}.json")
+
+    ### 메모리 -> 디스크 순서로 조회, 만료된 항목은 삭제
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry and entry[0] > now:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+            if entry:
+                del self.memory[key]
+
+        try:
+            with open(self._file(key), encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            record = None
+
+        with self.lock:
+            if record and record["created"] + self.ttl > now:
+                self._remember(key, record["content"], record["created"] + self.ttl)
+                self.disk_hits += 1
+                return record["content"]
+            self.misses += 1
+
+        if record:
+            self._remove(self._file(key))
+        return None
+
+    def put(self, key, content, model=None):
+        now = time.time()
+        with self.lock:
+            self._remember(key, content, now + self.ttl)
+
+        # 임시 파일에 쓴 뒤 교체하여 다른 프로세스가 쓰다 만 파일을 읽지 않도록 함
+        file = self._file(key)
+        try:
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            temp = f"{file}.{os.getpid()}.tmp"
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump({"created": now, "model": model, "content": content}, f, ensure_ascii=False)
+            os.replace(temp, file)
+        except OSError as e:
+            Log.recordLog(Log.WARNING, "LLM cache write failed", f"{e}")
+
+        with self.lock:
+            due = now - self.last_sweep >= self.sweep_interval
+            if due:
+                self.last_sweep = now
+        if due:
+            removed = self.sweep()
+            if removed:
+                Log.recordLog(Log.INFO, "LLM cache sweep", f"{removed} expired entries removed")
+
+    def _remember(self, key, content, expires):
+        self.memory[key] = (expires, content)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def _remove(self, file):
+        try:
+            os.remove(file)
+        except OSError:
+            pass
+
+    ### 만료된 디스크 항목 정리
+    def sweep(self):
+        now = time.time()
+        removed = 0
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                file = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(file) + self.ttl <= now:
+                        os.remove(file)
+                        removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def stats(self):
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self.memory),
+        }
 
 
 class ChatGPT:
 
+    # 조회에 실패한 데이터 소스 표기
+    UNAVAILABLE = "unavailable"
+
+    # 투자 판단 모델
+    TRADE_MODEL = "o4-mini"
+
+    # 반성 일기 모델
+    REFLECTION_MODEL = "o4-mini"
+
+    # 반성 일기에 포함할 최근 거래 수와 컬럼
+    REFLECTION_TRADES = 10
+    REFLECTION_COLUMNS = ["timestamp", "decision", "percentage", "reason", "btc_balance", "krw_balance", "btc_krw_price"]
+
+    # 같은 요청의 응답 캐시 (재시도, 백테스트 재생 시 API 재호출 방지)
+    cache = ResponseCache()
+
+    # 요청 deadline / hedging / 재시도 설정 (LLM_DEADLINE, LLM_HEDGE_DELAY, LLM_HEDGE_MODEL, LLM_MAX_RETRIES)
+    llm = LLMRequest()
+
     def __init__(self, assume_session, env):
         self.assume_session = assume_session
         self.env = env
 
     # OpenAI 의 API 키 이용하여 초기화
+    # 재시도는 LLMRequest 에서 처리하므로 클라이언트 자체 재시도는 사용하지 않음
+    # OPENAI_BASE_URL 을 지정하면 해당 주소로 요청 (로컬 테스트 서버 등)
     def init(self):
         self.openAIParameter = AWS.get_parameter(
             self.assume_session, self.env, "key/openai"
         )
-        return OpenAI(api_key=Crypt.decrypt_env_value(self.openAIParameter))
+        return OpenAI(api_key=Crypt.decrypt_env_value(self.openAIParameter), max_retries=0)
+
+    # 캐시를 거쳐 chat completion 요청 (응답 본문만 반환)
+    def complete(self, openAiClient, model, messages, **params):
+        key = ResponseCache.key(model, messages, params)
+        content = ChatGPT.cache.get(key)
+        if content is not None:
+            Trace.count("llm_cache", result="hit")
+            Log.recordLog(Log.INFO, "LLM cache hit", ChatGPT.cache.stats())
+            return content
+
+        Trace.count("llm_cache", result="miss")
+
+        # 캐시 키는 요청한 모델 기준이므로 hedge 모델(LLM_HEDGE_MODEL)의 응답은 캐시하지 않음
+        def call(request_model, timeout, cancel):
+            response = openAiClient.chat.completions.create(model=request_model, messages=messages, timeout=timeout, **params)
+            ChatGPT._count_usage(getattr(response, "usage", None), request_model)
+            content = response.choices[0].message.content
+            if not content:
+                raise ValueError("Empty completion")
+            if request_model == model:
+                ChatGPT.cache.put(key, content, model)
+            return content
+
+        with Trace.span("llm_request", model=model):
+            return ChatGPT.llm.run(call, model)
+
+    def _count_usage(usage, model):
+        if usage is not None:
+            Trace.count("llm_tokens", getattr(usage, "prompt_tokens", 0) or 0, model=model, kind="prompt")
+            Trace.count("llm_tokens", getattr(usage, "completion_tokens", 0) or 0, model=model, kind="completion")
 
     # 최근 투자 기록을 기반으로 퍼포먼스 계산 (초기 잔고 대비 최종 잔고)
     def calculate_performance(trades_df):
@@ -36,47 +222,125 @@ class ChatGPT:
         )
         return (final_balance - initial_balance) / initial_balance * 100
 
-    # AI 모델을 사용하여 최근 투자 기록과 시장 데이터를 기반으로 분석 및 반성을 생성하는 함수
-    def generate_reflection(self, openAiClient, trades_df, current_market_data):
+    # 반성 일기 요청 메시지 구성 (최근 투자 기록과 시장 데이터)
+    # 전체 기록 대신 최근 REFLECTION_TRADES 건과 거래 기억 요약만 포함 (기록이 늘어도 크기 고정)
+    def reflection_messages(trades_df, current_market_data, memory=None):
         performance = ChatGPT.calculate_performance(trades_df)  # 투자 퍼포먼스 계산
+        columns = [column for column in ChatGPT.REFLECTION_COLUMNS if column in trades_df.columns]
+        recent_trades = trades_df.head(ChatGPT.REFLECTION_TRADES)[columns].to_csv(index=False)
+
+        return [
+            {
+                "role": "system",
+                "content": "You are an AI trading assistant tasked with analyzing recent trading performance and current market conditions to generate insights and improvements for future trading decisions.",
+            },
+            {
+                "role": "user",
+                "content": f"""
+                Recent trading data (latest {ChatGPT.REFLECTION_TRADES} trades, CSV):
+                {recent_trades}
+                Trade memory (decision counts, hit rate and return until the next trade):
+                {memory or ChatGPT.UNAVAILABLE}
+                
+                Current market data:
+                {current_market_data}
+                
+                Overall performance in the last 7 days: {performance:.2f}%
+                
+                Please analyze this data and provide:
+                1. A brief reflection on the recent trading decisions
+                2. Insights on what worked well and what didn't
+                3. Suggestions for improvement in future trading decisions
+                4. Any patterns or trends you notice in the market data
+                
+                Limit your response to 250 words or less.
+                """,
+            },
+        ]
 
+    # AI 모델을 사용하여 최근 투자 기록과 시장 데이터를 기반으로 분석 및 반성을 생성하는 함수
+    # 거래 실행 중에는 호출하지 않고 reflect.py 에서 Batch API 로 미리 생성 (util/reflection.py)
+    def generate_reflection(self, openAiClient, trades_df, current_market_data):
         # OpenAI API 호출로 AI의 반성 일기 및 개선 사항 생성 요청
-        response = openAiClient.chat.completions.create(
-            model="o4-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an AI trading assistant tasked with analyzing recent trading performance and current market conditions to generate insights and improvements for future trading decisions.",
-                },
-                {
-                    "role": "user",
-                    "content": f"""
-                    Recent trading data:
-                    {trades_df.to_json(orient='records')}
-                    
-                    Current market data:
-                    {current_market_data}
-                    
-                    Overall performance in the last 7 days: {performance:.2f}%
-                    
-                    Please analyze this data and provide:
-                    1. A brief reflection on the recent trading decisions
-                    2. Insights on what worked well and what didn't
-                    3. Suggestions for improvement in future trading decisions
-                    4. Any patterns or trends you notice in the market data
-                    
-                    Limit your response to 250 words or less.
-                    """,
-                },
-            ],
+        return self.complete(
+            openAiClient,
+            model=ChatGPT.REFLECTION_MODEL,
+            messages=ChatGPT.reflection_messages(trades_df, current_market_data),
         )
 
-        return response.choices[0].message.content
+    # 투자 판단용 시장 데이터 섹션 구성 (앞쪽 섹션일수록 우선순위가 높음)
+    def build_trade_data(
+        model,
+        ticker,
+        filtered_balances,
+        orderbook,
+        df_daily,
+        df_hourly,
+        fear_greed_index,
+        hash_rate_data,
+        transaction_volumes,
+        reflection=None,
+        memory=None,
+    ):
+        def rows(df):
+            return len(df) if df is not None else None
+
+        # 보유 KRW 전액을 시장가 매수할 때의 예상 슬리피지를 호가 요약에 포함
+        notional = next((float(balance['balance']) for balance in filtered_balances if balance['currency'] == 'KRW'), None)
 
-    # AI에 데이터들을 제공하여 투자 판단 결과를 받음
-    def generate_trade(
-        self,
-        openAiClient,
+        sections = [
+            {
+                "name": "status",
+                "render": lambda _: f"Market: {ticker}\nCurrent investment status: {Prompt.balances_summary(filtered_balances)}",
+            },
+            {
+                "name": "reflection",
+                "render": lambda _: f"Reflection on recent trades: {reflection.strip() if reflection else ChatGPT.UNAVAILABLE}",
+            },
+            {
+                "name": "memory",
+                "render": lambda _: f"Trade memory (decision counts, hit rate and return until the next trade):\n{memory or ChatGPT.UNAVAILABLE}",
+            },
+            {
+                "name": "fear_greed",
+                "render": lambda _: "Fear and Greed Index: "
+                + (json.dumps({key: fear_greed_index.get(key) for key in ("value", "value_classification")}) if fear_greed_index else ChatGPT.UNAVAILABLE),
+            },
+            {
+                "name": "orderbook",
+                "render": lambda _: f"Orderbook summary: {Prompt.orderbook_summary(orderbook, notional=notional)}",
+            },
+            {
+                "name": "daily",
+                "rows": rows(df_daily),
+                "min_rows": 7,
+                "render": lambda n: f"Daily OHLCV with indicators (recent {n} days, CSV, t=days from last row):\n{Prompt.table(df_daily.tail(n), 'd')}",
+            },
+            {
+                "name": "hourly",
+                "rows": rows(df_hourly),
+                "min_rows": 24,
+                "render": lambda n: f"Hourly OHLCV with indicators (recent {n} hours, CSV, t=hours from last row):\n{Prompt.table(df_hourly.tail(n), 'h')}",
+            },
+            {
+                "name": "hash_rate",
+                "rows": rows(hash_rate_data),
+                "min_rows": 7,
+                "render": lambda n: "Total Hash Rate (CSV, t=days from last row):\n"
+                + (Prompt.series_table(hash_rate_data.tail(n), 'd') if hash_rate_data is not None else ChatGPT.UNAVAILABLE),
+            },
+            {
+                "name": "transaction_volume",
+                "rows": rows(transaction_volumes),
+                "min_rows": 7,
+                "render": lambda n: "Estimated Transaction Value (CSV, t=days from last row):\n"
+                + (Prompt.series_table(transaction_volumes.tail(n), 'd') if transaction_volumes is not None else ChatGPT.UNAVAILABLE),
+            },
+        ]
+        return Prompt.build(sections, model)
+
+    # 투자 판단 요청 메시지 구성
+    def trade_messages(
         filtered_balances,
         orderbook,
         df_daily,
@@ -84,6 +348,9 @@ class ChatGPT:
         fear_greed_index,
         hash_rate_data,
         transaction_volumes,
+        ticker="KRW-BTC",
+        reflection=None,
+        memory=None,
     ):
 
         # AI 모델에 반성 내용 제공
@@ -114,9 +381,24 @@ class ChatGPT:
             }
             """
 
-        response = openAiClient.chat.completions.create(
-            model="o4-mini",
-            messages=[
+        # 시장 데이터는 토큰 예산에 맞추어 압축 (표는 CSV, 시간은 마지막 행 기준 상대 시간)
+        data_content, report = ChatGPT.build_trade_data(
+            ChatGPT.TRADE_MODEL,
+            ticker,
+            filtered_balances,
+            orderbook,
+            df_daily,
+            df_hourly,
+            fear_greed_index,
+            hash_rate_data,
+            transaction_volumes,
+            reflection,
+            memory,
+        )
+        Log.recordLog(Log.INFO, "Prompt tokens", report)
+        Trace.count("prompt_tokens_estimated", report["total"], model=ChatGPT.TRADE_MODEL)
+
+        return [
                 {
                     "role": "user",
                     "content": f"""
@@ -137,42 +419,118 @@ class ChatGPT:
                 },
                 {
                     "role": "user",
-                    "content": f"""
-                    Current investment status: {json.dumps(filtered_balances)}
-                    Orderbook: {json.dumps(orderbook)}
-                    Total Hash Rate (recent 30 days): {hash_rate_data.to_json()}
-                    Estimated Transaction Value (recent 30 days): {transaction_volumes.to_json()}
-                    Daily OHLCV with indicators (recent 30 days): {df_daily.to_json()}
-                    Hourly OHLCV with indicators (recent 168 hours): {df_hourly.to_json()}
-                    Fear and Greed Index: {json.dumps(fear_greed_index)}
-                """,
+                    "content": data_content,
                 },
-            ],
+            ]
+
+    # AI에 데이터들을 제공하여 투자 판단 결과를 받음
+    def generate_trade(
+        self,
+        openAiClient,
+        filtered_balances,
+        orderbook,
+        df_daily,
+        df_hourly,
+        fear_greed_index,
+        hash_rate_data,
+        transaction_volumes,
+        ticker="KRW-BTC",
+        reflection=None,
+        memory=None,
+    ):
+        messages = ChatGPT.trade_messages(
+            filtered_balances,
+            orderbook,
+            df_daily,
+            df_hourly,
+            fear_greed_index,
+            hash_rate_data,
+            transaction_volumes,
+            ticker,
+            reflection,
+            memory,
+        )
+        return self.complete(openAiClient, model=ChatGPT.TRADE_MODEL, messages=messages)
+
+    # 스트리밍으로 투자 판단 요청
+    # decision, percentage 가 확정되면 바로 Decision 반환 (reason 은 백그라운드에서 계속 수신하여 로그에 기록)
+    # 응답이 스키마에 맞지 않으면 생성 도중이라도 요청을 닫음
+    # deadline 안에 유효한 판단을 받지 못하면 None 반환 (ChatGPT.llm 설정)
+    def decide_trade(
+        self,
+        openAiClient,
+        filtered_balances,
+        orderbook,
+        df_daily,
+        df_hourly,
+        fear_greed_index,
+        hash_rate_data,
+        transaction_volumes,
+        ticker="KRW-BTC",
+        reflection=None,
+        memory=None,
+    ):
+        messages = ChatGPT.trade_messages(
+            filtered_balances,
+            orderbook,
+            df_daily,
+            df_hourly,
+            fear_greed_index,
+            hash_rate_data,
+            transaction_volumes,
+            ticker,
+            reflection,
+            memory,
         )
+        return self.decide(openAiClient, ChatGPT.TRADE_MODEL, messages)
+
+    # 캐시를 거쳐 스트리밍 투자 판단 요청 (Decision 또는 None)
+    def decide(self, openAiClient, model, messages):
+        key = ResponseCache.key(model, messages, {})
+        content = ChatGPT.cache.get(key)
+        if content is not None:
+            Trace.count("llm_cache", result="hit")
+            try:
+                return DecisionStream([content]).decide()
+            except DecisionError as e:
+                Log.recordLog(Log.ERROR, "Invalid AI response", e)
+                return None
 
-        return response.choices[0].message.content
+        # 스키마에 맞지 않는 응답은 해당 요청의 실패로 처리 (다른 경로의 응답을 기다림)
+        Trace.count("llm_cache", result="miss")
 
-    # AI 응답 파싱
+        # 캐시 키는 요청한 모델 기준이므로 hedge 모델(LLM_HEDGE_MODEL)의 응답은 캐시하지 않음
+        def call(request_model, timeout, cancel):
+            chunks = ChatGPT._stream_text(openAiClient, request_model, messages, timeout)
+            on_finish = (lambda text: ChatGPT.cache.put(key, text, model)) if request_model == model else None
+            try:
+                return DecisionStream(chunks, on_finish, cancel).decide()
+            except DecisionError as e:
+                Log.recordLog(Log.ERROR, "Invalid AI response", e, model=request_model)
+                raise
+
+        with Trace.span("llm_request", model=model):
+            return ChatGPT.llm.run(call, model)
+
+    # 스트리밍 응답의 텍스트 조각 (마지막 조각의 usage 로 토큰 수 기록)
+    def _stream_text(openAiClient, model, messages, timeout=None):
+        response = openAiClient.chat.completions.create(
+            model=model, messages=messages, stream=True, stream_options={"include_usage": True}, timeout=timeout
+        )
+        try:
+            for chunk in response:
+                ChatGPT._count_usage(getattr(chunk, "usage", None), model)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            close = getattr(response, "close", None)
+            if close is not None:
+                close()
+
+    # AI 응답 파싱 (스키마에 맞지 않으면 None)
     def parse_ai_response(self, response_text):
         try:
-            # Extract JSON part from the response
-            json_match = re.search(r"\{.*?\}", response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                # Parse JSON
-                parsed_json = json.loads(json_str)
-                decision = parsed_json.get("decision")
-                percentage = parsed_json.get("percentage")
-                reason = parsed_json.get("reason")
-                return {
-                    "decision": decision,
-                    "percentage": percentage,
-                    "reason": reason,
-                }
-            else:
-                Log.recordLog(Log.ERROR, "Error", "No JSON found in AI response.")
-                return None
-        except json.JSONDecodeError as e:
-            Log.recordLog(Log.ERROR, "JSON parsing error", f"{e}")
-            # ChatGPT.logger.error(f"JSON parsing error: {e}")
+            return parse_decision(response_text)
+        except DecisionError as e:
+            Log.recordLog(Log.ERROR, "JSON parsing error", e)
             return None
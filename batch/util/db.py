@@ -1,12 +1,22 @@
 from util.crypt import Crypt
 from util.aws import AWS
+from util.pool import ConnectionPool
+from util.log import Log
 from datetime import datetime, timedelta
 import mysql.connector
+from mysql.connector import errorcode
 import mysql
+import os
 import pandas as pd
 
 
 class DB:
+    ### 연결 풀 최대 연결 수
+    POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '2'))
+
+    ### 프로세스 단위 연결 풀 (fork 된 워커는 부모의 연결을 쓰지 않도록 새로 생성)
+    pool = None
+
     ### SQLite DB 연결
     def get_db_connection(dbUrlParameter, dbPasswordParameter):
         
@@ -17,17 +27,40 @@ class DB:
             database="bitcoin_trades"
         )
 
+    ### 연결 풀 조회 (없으면 생성)
+    def get_pool(dbUrlParameter, dbPasswordParameter):
+        if DB.pool is None or DB.pool.pid != os.getpid():
+            DB.pool = ConnectionPool(
+                lambda: DB.get_db_connection(dbUrlParameter, dbPasswordParameter),
+                size=DB.POOL_SIZE,
+            )
+        return DB.pool
+
+    ### 풀에서 연결을 빌려 사용 후 반납 (with 문으로 사용)
+    def connection(dbUrlParameter, dbPasswordParameter):
+        return DB.get_pool(dbUrlParameter, dbPasswordParameter).connection()
+
     ### DB 초기화
+    ### RDS 가 중지된 시간에도 거래는 진행되도록 실패는 경고로만 남김 (거래 기록은 util/journal.py 에 보관)
     def init_db(assume_session, env):
         dbUrlParameter = AWS.get_parameter(assume_session, env, 'db/url')
         dbPasswordParameter = AWS.get_parameter(assume_session, env, 'db/password')
 
-        conn = DB.get_db_connection(dbUrlParameter, dbPasswordParameter)
+        try:
+            with DB.connection(dbUrlParameter, dbPasswordParameter) as conn:
+                DB.create_tables(conn)
+            return True
+        except Exception as e:
+            Log.recordLog(Log.WARNING, "DB unavailable", f"{e}")
+            return False
+
+    ### 테이블 생성
+    def create_tables(conn):
         c = conn.cursor()
         c.execute('''
                     CREATE TABLE IF NOT EXISTS trades (
                         id INT AUTO_INCREMENT PRIMARY KEY,
-                        timestamp VARCHAR(255),
+                        timestamp DATETIME(6) NOT NULL,
                         decision VARCHAR(10),
                         percentage INT,
                         reason TEXT,
@@ -35,21 +68,86 @@ class DB:
                         krw_balance DECIMAL(18,2),
                         btc_avg_buy_price DECIMAL(18,2),
                         btc_krw_price DECIMAL(18,2),
-                        reflection TEXT
+                        reflection TEXT,
+                        ticker VARCHAR(20) NOT NULL DEFAULT 'KRW-BTC',
+                        journal_id CHAR(32) NULL,
+                        executed_volume DECIMAL(24,8) NULL,
+                        executed_price DECIMAL(18,2) NULL,
+                        paid_fee DECIMAL(18,2) NULL,
+                        UNIQUE KEY uq_trades_journal_id (journal_id),
+                        INDEX idx_trades_timestamp (timestamp),
+                        INDEX idx_trades_ticker_timestamp (ticker, timestamp),
+                        INDEX idx_trades_decision_timestamp (decision, timestamp)
                     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
                 ''')
         conn.commit()
 
+        # 이전에 생성된 테이블에 컬럼 추가
+        # ticker : 여러 종목 거래 (btc_* 컬럼에는 해당 종목의 잔고 / 평균 매수가 / 가격이 저장됨)
+        # journal_id : 저널 기록 식별자 (저널 반영 시 중복 저장 방지)
+        # executed_* / paid_fee : 주문 체결 결과 (util/order.py)
+        DB._add_column(conn, 'ticker', "ADD COLUMN ticker VARCHAR(20) NOT NULL DEFAULT 'KRW-BTC'")
+        DB._add_column(conn, 'journal_id', "ADD COLUMN journal_id CHAR(32) NULL, ADD UNIQUE KEY uq_trades_journal_id (journal_id)")
+        DB._add_column(conn, 'executed_volume', "ADD COLUMN executed_volume DECIMAL(24,8) NULL, "
+                       "ADD COLUMN executed_price DECIMAL(18,2) NULL, ADD COLUMN paid_fee DECIMAL(18,2) NULL")
+
+    def _add_column(conn, column, definition):
+        c = conn.cursor()
+        c.execute(f"SHOW COLUMNS FROM trades LIKE '{column}'")
+        if not c.fetchall():
+            try:
+                c.execute(f"ALTER TABLE trades {definition}")
+                conn.commit()
+            except mysql.connector.Error as e:
+                # 다른 워커가 먼저 추가한 경우
+                if e.errno != errorcode.ER_DUP_FIELDNAME:
+                    raise
+
+    ### 거래 기록 컬럼 (저널 기록의 키와 동일)
+    TRADE_COLUMNS = ['timestamp', 'decision', 'percentage', 'reason', 'btc_balance', 'krw_balance',
+                     'btc_avg_buy_price', 'btc_krw_price', 'reflection', 'ticker',
+                     'executed_volume', 'executed_price', 'paid_fee']
+
+    ### 저널에 기록할 거래 정보 (거래 시점의 timestamp 를 함께 보관)
+    ### fill : OrderTracker.track 결과 (주문하지 않은 경우 None)
+    def trade_record(decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, reflection='', ticker='KRW-BTC', fill=None):
+        fill = fill or {}
+        return dict(zip(DB.TRADE_COLUMNS, (datetime.now().isoformat(), decision, percentage, reason, btc_balance,
+                                           krw_balance, btc_avg_buy_price, btc_krw_price, reflection, ticker,
+                                           fill.get('executed_volume'), fill.get('avg_price'), fill.get('paid_fee'))))
+
     ### DB에 거래 정보 로깅 
-    def log_trade(conn, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, reflection=''):
+    ### timestamp 는 ISO 문자열로 전달 (VARCHAR / DATETIME(6) 컬럼 모두 같은 값으로 저장됨, util/migration.py 참고)
+    def log_trade(conn, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, reflection='', ticker='KRW-BTC'):
         c = conn.cursor()
         timestamp = datetime.now().isoformat()
         c.execute("""INSERT INTO trades 
-                    (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, reflection) 
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, reflection))
+                    (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, reflection, ticker) 
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+                (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, reflection, ticker))
         conn.commit()
 
+    ### 저널 기록 일괄 저장 (multi-row INSERT, 이미 반영된 journal_id 는 무시)
+    ### INSERT IGNORE 는 잘림 / NOT NULL / 잘못된 값 오류도 경고로 바꾸어 변형된 행을 저장하므로
+    ### 중복 journal_id 만 ON DUPLICATE KEY UPDATE 로 흡수하고 나머지 오류는 그대로 발생 (기록은 저널에 남음)
+    def insert_trades(conn, records):
+        columns = DB.TRADE_COLUMNS + ['journal_id']
+        placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        c = conn.cursor()
+        c.execute(f"""INSERT INTO trades ({', '.join(columns)})
+                    VALUES {', '.join([placeholders] * len(records))}
+                    ON DUPLICATE KEY UPDATE journal_id = journal_id""",
+                [record.get(column) for record in records for column in columns])
+        conn.commit()
+        return c.rowcount
+
+    ### 저널 반영 함수 (Journal.flush / flush_async 에 전달)
+    def journal_writer(dbUrlParameter, dbPasswordParameter):
+        def write(records):
+            with DB.connection(dbUrlParameter, dbPasswordParameter) as conn:
+                DB.insert_trades(conn, records)
+        return write
+
     # 최근 투자 기록 조회
     def get_recent_trades(conn, days=7):
         c = conn.cursor()
@@ -57,3 +155,19 @@ class DB:
         c.execute("SELECT * FROM trades WHERE timestamp > %s ORDER BY timestamp DESC", (seven_days_ago,))
         columns = [column[0] for column in c.description]
         return pd.DataFrame.from_records(data=c.fetchall(), columns=columns)
+
+    ### 종목의 가장 최근 반성 일기 (reflect.py 에서 미리 생성하여 기록, 없으면 빈 문자열)
+    def get_latest_reflection(conn, ticker='KRW-BTC'):
+        c = conn.cursor()
+        c.execute("""SELECT reflection FROM trades
+                    WHERE ticker = %s AND reflection IS NOT NULL AND reflection != ''
+                    ORDER BY timestamp DESC, id DESC LIMIT 1""", (ticker,))
+        row = c.fetchone()
+        return row[0] if row else ''
+
+    ### 반성 일기 기록
+    def update_reflection(conn, trade_id, reflection):
+        c = conn.cursor()
+        c.execute("UPDATE trades SET reflection = %s WHERE id = %s", (reflection, trade_id))
+        conn.commit()
+        return c.rowcount
@@ -0,0 +1,304 @@
+from util.log import Log
+from util.trace import Trace
+import contextvars
+import json
+import re
+import threading
+import time
+
+
+### 투자 판단 응답이 스키마에 맞지 않을 때 발생
+class DecisionError(ValueError):
+    pass
+
+
+### 투자 판단 JSON 증분 파서
+### 스트리밍 응답을 조각 단위로 받아 최상위 객체의 필드를 완성되는 즉시 검증
+### 스키마 : {"decision": "buy" | "sell" | "hold", "percentage": 정수, "reason": 문자열} (다른 필드 불가)
+### percentage 는 hold 이면 0, buy / sell 이면 1 ~ 100
+class DecisionParser:
+    FIELDS = {"decision": str, "percentage": int, "reason": str}
+    DECISIONS = ("buy", "sell", "hold")
+
+    ### JSON 시작 전 허용하는 문자 수 (```json 등)
+    MAX_PREFIX = 200
+
+    START, KEY, COLON, VALUE, NEXT, END = range(6)
+
+    NUMBER = re.compile(r"-?\d+(\.\d+)?([eE][+-]?\d+)?")
+    WHITESPACE = " \t\r\n"
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.state = DecisionParser.START
+        self.key = None
+        self.values = {}
+        ### 아직 닫히지 않은 문자열의 검색 위치 (긴 reason 을 매번 처음부터 검사하지 않도록)
+        self._string_start = None
+        self._string_scan = None
+
+    ### 응답 조각 추가 후 가능한 만큼 파싱 (스키마 위반 시 DecisionError)
+    def feed(self, text):
+        if text:
+            self.buffer += text
+            self._parse()
+        return self
+
+    ### decision, percentage 가 모두 확정되었는지 여부
+    @property
+    def decided(self):
+        return "decision" in self.values and "percentage" in self.values
+
+    @property
+    def complete(self):
+        return self.state == DecisionParser.END
+
+    ### 스트리밍 중인 reason (이스케이프 처리 전 원문)
+    def partial_reason(self):
+        if "reason" in self.values:
+            return self.values["reason"]
+        if self.key == "reason" and self._string_start is not None:
+            return self.buffer[self._string_start + 1:self._string_scan]
+        return None
+
+    ### 응답 종료 : 객체가 닫히지 않았거나 필드가 빠져 있으면 DecisionError
+    def finish(self):
+        if self.state != DecisionParser.END:
+            raise DecisionError("AI response ended before the JSON object was complete")
+        missing = [field for field in DecisionParser.FIELDS if field not in self.values]
+        if missing:
+            raise DecisionError(f"AI response is missing {missing}")
+        return dict(self.values)
+
+    def _skip_whitespace(self):
+        while self.pos < len(self.buffer) and self.buffer[self.pos] in DecisionParser.WHITESPACE:
+            self.pos += 1
+        return self.pos < len(self.buffer)
+
+    def _parse(self):
+        while self.state != DecisionParser.END and self._skip_whitespace():
+            char = self.buffer[self.pos]
+            if self.state == DecisionParser.START:
+                start = self.buffer.find("{", self.pos)
+                if start < 0:
+                    if len(self.buffer) > DecisionParser.MAX_PREFIX:
+                        raise DecisionError("No JSON object found in AI response")
+                    self.pos = len(self.buffer)
+                    return
+                self.pos = start + 1
+                self.state = DecisionParser.KEY
+            elif self.state == DecisionParser.KEY:
+                if char == "}" and not self.values:
+                    raise DecisionError("AI response is an empty object")
+                if char != '"':
+                    raise DecisionError(f"Expected a field name at offset {self.pos}")
+                key = self._string()
+                if key is None:
+                    return
+                if key not in DecisionParser.FIELDS:
+                    raise DecisionError(f"Unexpected field '{key}' in AI response")
+                if key in self.values:
+                    raise DecisionError(f"Duplicate field '{key}' in AI response")
+                self.key = key
+                self.state = DecisionParser.COLON
+            elif self.state == DecisionParser.COLON:
+                if char != ":":
+                    raise DecisionError(f"Expected ':' after '{self.key}'")
+                self.pos += 1
+                self.state = DecisionParser.VALUE
+            elif self.state == DecisionParser.VALUE:
+                value = self._value(char)
+                if value is None:
+                    return
+                self._set(self.key, value)
+                self.key = None
+                self.state = DecisionParser.NEXT
+            elif self.state == DecisionParser.NEXT:
+                self.pos += 1
+                if char == ",":
+                    self.state = DecisionParser.KEY
+                elif char == "}":
+                    self.state = DecisionParser.END
+                else:
+                    raise DecisionError(f"Expected ',' or '}}' at offset {self.pos - 1}")
+
+    ### 문자열 토큰 (닫히지 않았으면 None)
+    def _string(self):
+        if self._string_start != self.pos:
+            self._string_start = self.pos
+            self._string_scan = self.pos + 1
+        index = self._string_scan
+        while index < len(self.buffer):
+            char = self.buffer[index]
+            if char == "\\":
+                # 이스케이프 문자가 조각 경계에서 잘린 경우 다음 조각에서 다시 검사
+                if index + 1 >= len(self.buffer):
+                    break
+                index += 2
+                continue
+            if char == '"':
+                try:
+                    value = json.loads(self.buffer[self.pos:index + 1])
+                except json.JSONDecodeError as e:
+                    raise DecisionError(f"Invalid string in AI response : {e}")
+                self.pos = index + 1
+                self._string_start = None
+                return value
+            index += 1
+        self._string_scan = index
+        return None
+
+    ### 값 토큰 (아직 완성되지 않았으면 None)
+    def _value(self, char):
+        expected = DecisionParser.FIELDS[self.key]
+        if expected is str:
+            if char != '"':
+                raise DecisionError(f"'{self.key}' must be a string")
+            return self._string()
+
+        match = DecisionParser.NUMBER.match(self.buffer, self.pos)
+        if match is None:
+            raise DecisionError(f"'{self.key}' must be an integer")
+        # 숫자 뒤에 다른 문자가 올 때까지는 값이 끝났는지 알 수 없음
+        if match.end() >= len(self.buffer):
+            return None
+        if match.group(1) or match.group(2):
+            raise DecisionError(f"'{self.key}' must be an integer")
+        self.pos = match.end()
+        return int(match.group(0))
+
+    ### 필드 값 검증 후 저장
+    def _set(self, key, value):
+        if key == "decision" and value not in DecisionParser.DECISIONS:
+            raise DecisionError(f"Invalid decision '{value}'")
+        if key == "percentage" and not 0 <= value <= 100:
+            raise DecisionError(f"Percentage {value} out of range")
+        self.values[key] = value
+        if self.decided:
+            decision, percentage = self.values["decision"], self.values["percentage"]
+            if decision == "hold" and percentage != 0:
+                raise DecisionError(f"Percentage must be 0 for hold, got {percentage}")
+            if decision != "hold" and percentage < 1:
+                raise DecisionError(f"Percentage must be 1-100 for {decision}, got {percentage}")
+
+
+### 투자 판단 결과 (decision / percentage 는 확정, reason 은 백그라운드에서 계속 수신)
+class Decision:
+    def __init__(self, decision, percentage, partial=None):
+        self.decision = decision
+        self.percentage = percentage
+        self.partial = partial
+        self.error = None
+        self._reason = None
+        self._done = threading.Event()
+
+    def _finish(self, reason, error=None):
+        self._reason = reason
+        self.error = error
+        self._done.set()
+
+    ### reason 수신 완료까지 대기 (timeout 을 넘기면 그때까지 받은 내용)
+    def reason(self, timeout=None):
+        if self._done.wait(timeout):
+            return self._reason
+        return (self.partial() if self.partial is not None else None) or ""
+
+    @property
+    def finished(self):
+        return self._done.is_set()
+
+    def __repr__(self):
+        return f"Decision({self.decision}, {self.percentage})"
+
+
+### 스트리밍 응답에서 투자 판단을 읽음
+### decision, percentage 가 확정되면 바로 Decision 을 반환하고 나머지 응답(reason)은 백그라운드 스레드에서 수신
+### chunks : 응답 텍스트 조각 iterator (close() 가 있으면 스키마 위반 시 호출하여 생성을 중단)
+### on_finish(text) : 전체 응답이 스키마에 맞게 끝났을 때 호출 (캐시 저장 등)
+### cancel : 설정되면 다음 조각을 받을 때 응답을 닫고 중단 (hedging 에서 진 요청)
+class DecisionStream:
+    ### 스트리밍 중인 reason 을 로그로 남기는 간격 (초, DEBUG 레벨)
+    REASON_LOG_INTERVAL = 1.0
+
+    def __init__(self, chunks, on_finish=None, cancel=None):
+        self.chunks = iter(chunks)
+        self.on_finish = on_finish
+        self.cancel = cancel
+        self.parser = DecisionParser()
+        self.text = []
+        self._thread = None
+
+    def _feed(self, text):
+        if text:
+            self.text.append(text)
+            self.parser.feed(text)
+
+    def _cancelled(self):
+        return self.cancel is not None and self.cancel.is_set()
+
+    def _close(self):
+        close = getattr(self.chunks, "close", None)
+        if close is not None:
+            close()
+
+    ### 판단 확정까지 수신 (스키마 위반 시 응답을 닫고 DecisionError)
+    def decide(self):
+        start = time.monotonic()
+        try:
+            for text in self.chunks:
+                if self._cancelled():
+                    self._close()
+                    raise InterruptedError("Decision request cancelled")
+                self._feed(text)
+                if self.parser.decided:
+                    break
+            else:
+                self.parser.finish()
+        except DecisionError:
+            Trace.count("llm_decisions", result="invalid")
+            self._close()
+            raise
+
+        elapsed = time.monotonic() - start
+        Trace.observe("llm_time_to_decision_seconds", elapsed)
+        Trace.count("llm_decisions", result="early" if not self.parser.complete else "full")
+        values = self.parser.values
+        decision = Decision(values["decision"], values["percentage"], self.parser.partial_reason)
+        Log.recordLog(Log.INFO, "AI decision", f"{decision.decision} {decision.percentage}%", latency=round(elapsed, 6))
+
+        self._thread = threading.Thread(
+            target=contextvars.copy_context().run, args=(self._drain, decision), name="decision-reason", daemon=True
+        )
+        self._thread.start()
+        return decision
+
+    ### 남은 응답 수신 후 reason 확정
+    def _drain(self, decision):
+        logged = time.monotonic()
+        try:
+            for text in self.chunks:
+                if self._cancelled():
+                    self._close()
+                    decision._finish(self.parser.partial_reason() or "")
+                    return
+                self._feed(text)
+                if time.monotonic() - logged >= DecisionStream.REASON_LOG_INTERVAL:
+                    logged = time.monotonic()
+                    Log.recordLog(Log.DEBUG, "AI reason (streaming)", self.parser.partial_reason())
+            values = self.parser.finish()
+        except Exception as e:
+            self._close()
+            decision._finish(self.parser.partial_reason() or "", e)
+            Log.recordLog(Log.WARNING, "AI reason incomplete", e)
+            return
+
+        decision._finish(values["reason"])
+        Log.recordLog(Log.INFO, "AI reason", values["reason"])
+        if self.on_finish is not None:
+            self.on_finish("".join(self.text))
+
+
+### 전체 응답 텍스트에서 투자 판단 파싱 (스키마 위반 시 DecisionError)
+def parse_decision(text):
+    return DecisionParser().feed(text).finish()
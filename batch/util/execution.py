@@ -0,0 +1,208 @@
+from util.log import Log
+from util.order import OrderTracker
+from util.orderbook import OrderBook
+from util.ratelimit import RateLimiter
+from util.rule import Rule
+import os
+import time
+import numpy as np
+import pyupbit
+
+
+### Upbit 주문 (OrderBook 조회, 시장가 주문 후 체결 결과 반환)
+class UpbitExchange:
+    def __init__(self, upbit):
+        self.upbit = upbit
+
+    def orderbook(self, ticker):
+        return OrderBook.parse(RateLimiter.limited("quotation", pyupbit.get_orderbook)(ticker))
+
+    ### 시장가 매수 (krw : 주문 금액)
+    def buy(self, ticker, krw):
+        RateLimiter.wait("order")
+        return OrderTracker(self.upbit).track(self.upbit.buy_market_order(ticker, krw))
+
+    ### 시장가 매도 (volume : 주문 수량)
+    def sell(self, ticker, volume):
+        RateLimiter.wait("order")
+        return OrderTracker(self.upbit).track(self.upbit.sell_market_order(ticker, volume))
+
+
+### 호가 기반 모의 거래소 (오프라인 테스트용)
+### 시장가 주문은 호가를 순서대로 소진하며, 소진된 잔량은 호가를 조회할 때마다 resilience 비율만큼 회복
+class SimulatedExchange:
+    def __init__(self, book, resilience=0.5, fee_rate=Rule.FEE_RATE):
+        self.initial = book
+        self.ask_size = book.ask_size.copy()
+        self.bid_size = book.bid_size.copy()
+        self.resilience = resilience
+        self.fee_rate = fee_rate
+        self.orders = 0
+
+    def orderbook(self, ticker):
+        self.ask_size += (self.initial.ask_size - self.ask_size) * self.resilience
+        self.bid_size += (self.initial.bid_size - self.bid_size) * self.resilience
+        return OrderBook(self.initial.ask_price, self.ask_size, self.initial.bid_price, self.bid_size, market=ticker)
+
+    def buy(self, ticker, krw):
+        price, size = self.initial.ask_price, self.ask_size
+        level_krw = price * size
+        # 앞 단계부터 전량 체결, 마지막 단계는 남은 금액만큼
+        take_krw = np.clip(krw - np.concatenate(([0.0], np.cumsum(level_krw)[:-1])), 0, level_krw)
+        volume = take_krw / price
+        self.ask_size = size - volume
+        return self._fill("bid", volume.sum(), take_krw.sum())
+
+    def sell(self, ticker, volume):
+        price, size = self.initial.bid_price, self.bid_size
+        take = np.clip(volume - np.concatenate(([0.0], np.cumsum(size)[:-1])), 0, size)
+        self.bid_size = size - take
+        return self._fill("ask", take.sum(), (take * price).sum())
+
+    def _fill(self, side, volume, funds):
+        self.orders += 1
+        return {
+            "uuid": f"sim-{self.orders}",
+            "side": side,
+            "status": OrderTracker.DONE,
+            "executed_volume": float(volume),
+            "avg_price": float(funds / volume) if volume else None,
+            "executed_funds": float(funds),
+            "paid_fee": float(funds * self.fee_rate),
+            "polls": 0,
+            "elapsed": 0.0,
+            "error": None,
+        }
+
+
+### 큰 주문을 여러 개의 시장가 주문으로 나누어 실행
+### twap : 같은 크기로 interval 초 간격 주문 (호가 기준 허용 슬리피지를 넘으면 그만큼 줄임)
+### depth : 매 주문마다 허용 슬리피지 안에서 체결 가능한 호가 잔량만큼 주문
+### 모든 주문은 최소 주문 금액(5000 KRW) 이상이며, 남은 금액이 최소 금액보다 작아지면 마지막 주문에 합침
+class ExecutionEngine:
+    TWAP = "twap"
+    DEPTH = "depth"
+
+    DONE = "done"
+    PARTIAL = "partial"
+    ERROR = "error"
+
+    STRATEGY = os.getenv("EXECUTION_STRATEGY", DEPTH)
+
+    ### twap 분할 수
+    SLICES = int(os.getenv("EXECUTION_SLICES", "4"))
+
+    ### 분할 주문 간격 (초)
+    INTERVAL = float(os.getenv("EXECUTION_INTERVAL", "10"))
+
+    ### 분할 주문 최대 횟수 (호가가 회복되지 않아도 이 횟수 이후에는 중단)
+    MAX_CHILDREN = int(os.getenv("EXECUTION_MAX_CHILDREN", "20"))
+
+    def __init__(self, exchange, strategy=STRATEGY, slices=SLICES, interval=INTERVAL,
+                 max_slippage_bps=Rule.MAX_SLIPPAGE_BPS, max_children=MAX_CHILDREN, sleep=time.sleep):
+        if strategy not in (ExecutionEngine.TWAP, ExecutionEngine.DEPTH):
+            raise ValueError(f"Invalid execution strategy : {strategy}")
+        self.exchange = exchange
+        self.strategy = strategy
+        self.slices = slices
+        self.interval = interval
+        self.max_slippage_bps = max_slippage_bps
+        self.max_children = max_children
+        self.sleep = sleep
+
+    ### 허용 슬리피지 안에서 한 번에 주문할 수 있는 최대 크기 (매수 KRW / 매도 수량), 최소 첫 호가 잔량
+    def capacity(self, book, side):
+        if side == "buy":
+            limit = book.best_ask * (1 + self.max_slippage_bps / 10000)
+            return float(book.ask_krw[max(np.searchsorted(book.ask_price, limit, side="right") - 1, 0)])
+        limit = book.best_bid * (1 - self.max_slippage_bps / 10000)
+        return float(book.bid_volume[max(np.searchsorted(-book.bid_price, -limit, side="right") - 1, 0)])
+
+    ### 다음 분할 주문 크기 (0 이면 이번에는 주문하지 않음)
+    def child_size(self, book, side, remaining, children_left):
+        if self.strategy == ExecutionEngine.TWAP:
+            size = remaining / max(children_left, 1)
+            size = min(size, self.capacity(book, side))
+        else:
+            size = min(remaining, self.capacity(book, side))
+
+        # 최소 주문 금액 이상, 남는 금액이 최소 금액보다 작으면 함께 주문
+        price = book.mid
+        min_size = Rule.MIN_ORDER_KRW / (1 if side == "buy" else price)
+        if size < min_size:
+            size = min_size if remaining >= 2 * min_size else remaining
+        if remaining - size < min_size:
+            size = remaining
+        return min(size, remaining)
+
+    ### 주문 실행
+    ### side : "buy" (amount = KRW) / "sell" (amount = 수량)
+    def execute(self, ticker, side, amount):
+        start = time.monotonic()
+        book = self.exchange.orderbook(ticker)
+        if book is None:
+            return ExecutionEngine._result(side, amount, None, [], ExecutionEngine.ERROR, start)
+
+        arrival = book.mid
+        children = []
+        remaining = amount
+        min_remaining = Rule.MIN_ORDER_KRW / (1 if side == "buy" else arrival)
+        status = ExecutionEngine.DONE
+
+        while remaining >= min_remaining:
+            if len(children) >= self.max_children:
+                status = ExecutionEngine.PARTIAL
+                break
+            if children:
+                self.sleep(self.interval)
+                book = self.exchange.orderbook(ticker) or book
+
+            slots = self.slices - len(children) if self.strategy == ExecutionEngine.TWAP else 1
+            size = self.child_size(book, side, remaining, slots)
+            # 주문 요청 중 오류(연결 오류 등)가 나도 앞서 체결된 주문은 결과에 포함 (PARTIAL)
+            try:
+                fill = self.exchange.buy(ticker, size) if side == "buy" else self.exchange.sell(ticker, size)
+            except Exception as e:
+                Log.recordLog(Log.ERROR, f"Child {side} order {len(children) + 1} failed", f"size={size:.8g} : {e}")
+                fill = OrderTracker._result({"side": "bid" if side == "buy" else "ask", "error": str(e)}, OrderTracker.ERROR, time.monotonic(), 0)
+            children.append(dict(fill, size=size))
+
+            if fill["status"] == OrderTracker.ERROR:
+                status = ExecutionEngine.ERROR
+                break
+            done = fill["executed_funds"] if side == "buy" else fill["executed_volume"]
+            # 체결 정보가 아직 없는 주문(TIMEOUT)은 주문 크기만큼 진행된 것으로 봄
+            remaining -= done if done else size
+            Log.recordLog(Log.INFO, f"Child {side} order {len(children)}",
+                          f"size={size:.8g} filled={done:.8g} remaining={max(remaining, 0):.8g} price={fill['avg_price']}")
+
+        return ExecutionEngine._result(side, amount, arrival, children, status, start)
+
+    ### 부모 주문 결과 (OrderTracker 결과와 같은 키 + 진행 / 슬리피지)
+    def _result(side, amount, arrival, children, status, start):
+        volume = sum(child["executed_volume"] for child in children)
+        funds = sum(child["executed_funds"] for child in children)
+        avg_price = funds / volume if volume else None
+        slippage = None
+        if avg_price and arrival:
+            # 도착 시점 중간 가격 대비 불리한 정도 (양수 : 비용)
+            slippage = (avg_price - arrival) / arrival * 10000 * (1 if side == "buy" else -1)
+        filled = funds if side == "buy" else volume
+        if status == ExecutionEngine.ERROR and volume:
+            status = ExecutionEngine.PARTIAL
+
+        return {
+            "side": side,
+            "status": status,
+            "target": amount,
+            "progress": filled / amount if amount else 0.0,
+            "arrival_price": arrival,
+            "executed_volume": volume,
+            "avg_price": avg_price,
+            "executed_funds": funds,
+            "paid_fee": sum(child["paid_fee"] for child in children),
+            "slippage_bps": slippage,
+            "children": len(children),
+            "uuids": [child["uuid"] for child in children],
+            "elapsed": round(time.monotonic() - start, 3),
+        }
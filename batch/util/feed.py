@@ -0,0 +1,265 @@
+from util.candle import CandleStore
+from util.log import Log
+from collections import deque
+from datetime import datetime
+import json
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pyupbit
+
+
+### 고정 크기 체결 버퍼 (numpy 배열 기반 ring buffer)
+class TickRing:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ts = np.zeros(capacity, dtype=np.int64)
+        self.price = np.zeros(capacity, dtype=np.float64)
+        self.volume = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+
+    def append(self, ts, price, volume):
+        i = self.count % self.capacity
+        self.ts[i] = ts
+        self.price[i] = price
+        self.volume[i] = volume
+        self.count += 1
+
+    ### 최근 n 개 체결 (오래된 순) : (ts, price, volume)
+    def last(self, n=None):
+        size = min(self.count, self.capacity)
+        n = size if n is None else min(n, size)
+        end = self.count % self.capacity
+        index = (np.arange(end - n, end) + self.capacity) % self.capacity
+        return self.ts[index], self.price[index], self.volume[index]
+
+    ### since_ms 이후 체결의 거래량 가중 평균가
+    def vwap(self, since_ms):
+        ts, price, volume = self.last()
+        mask = ts >= since_ms
+        total = volume[mask].sum()
+        return float((price[mask] * volume[mask]).sum() / total) if total else None
+
+
+### 체결로부터 분봉 생성 (Upbit 캔들과 같은 KST 기준 시작 시각)
+class CandleBuilder:
+    def __init__(self, minutes, maxlen=500):
+        self.minutes = minutes
+        self.span = minutes * 60 * 1000
+        self.bars = deque(maxlen=maxlen)  # [bucket, open, high, low, close, volume, value]
+
+    def update(self, ts, price, volume):
+        bucket = ts - ts % self.span
+        if not self.bars or bucket > self.bars[-1][0]:
+            self.bars.append([bucket, price, price, price, price, volume, price * volume])
+            return
+
+        # 늦게 도착한 체결은 해당 캔들에 반영 (보관 범위 밖이면 무시)
+        for bar in reversed(self.bars):
+            if bar[0] == bucket:
+                bar[2] = max(bar[2], price)
+                bar[3] = min(bar[3], price)
+                if bar is self.bars[-1]:
+                    bar[4] = price
+                bar[5] += volume
+                bar[6] += price * volume
+                return
+            if bar[0] < bucket:
+                return
+
+    ### pyupbit.get_ohlcv 와 같은 형태의 DataFrame (마지막 행은 진행 중인 캔들)
+    def frame(self):
+        rows = [bar[1:] for bar in self.bars]
+        index = pd.DatetimeIndex([
+            datetime.fromtimestamp(bar[0] / 1000, CandleStore.KST).replace(tzinfo=None) for bar in self.bars
+        ])
+        return pd.DataFrame(rows, index=index, columns=CandleStore.COLUMNS)
+
+
+### Upbit 웹소켓 구독 (pyupbit WebSocketManager, 메시지 종류마다 별도 프로세스)
+class UpbitSource:
+    def __init__(self, tickers, types=("trade", "ticker")):
+        self.managers = [pyupbit.WebSocketManager(type, tickers) for type in types]
+
+    def readers(self):
+        return [manager.get for manager in self.managers]
+
+    def close(self):
+        for manager in self.managers:
+            manager.terminate()
+
+
+### 기록된 메시지(JSON lines) 재생 (오프라인 테스트용)
+### speed : None 이면 대기 없이 재생, 1.0 이면 기록된 시간 간격 그대로
+class ReplaySource:
+    def __init__(self, path, speed=None):
+        self.path = path
+        self.speed = speed
+
+    def readers(self):
+        return [self._read]
+
+    def _read_all(self):
+        previous = None
+        with open(self.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                message = json.loads(line)
+                ts = TickFeed.timestamp(message)
+                if self.speed and previous is not None and ts is not None:
+                    time.sleep(max(ts - previous, 0) / 1000 / self.speed)
+                previous = ts if ts is not None else previous
+                yield message
+
+    def _read(self):
+        if not hasattr(self, "_messages"):
+            self._messages = self._read_all()
+        return next(self._messages)
+
+    def close(self):
+        pass
+
+
+### 실시간 체결 / 현재가 수신기
+### 체결은 종목별 ring buffer 와 1분 / 5분 / 60분봉에 반영하여 ai_trading 이 요청 없이 메모리에서 읽도록 함
+class TickFeed:
+    ### 종목별 체결 버퍼 크기
+    CAPACITY = int(os.getenv("TICK_FEED_CAPACITY", "65536"))
+
+    ### 이 시간(초)보다 오래 갱신되지 않은 현재가는 사용하지 않음
+    MAX_AGE = float(os.getenv("TICK_FEED_MAX_AGE", "10"))
+
+    ### 로컬에서 생성하는 분봉 (분 단위)
+    INTERVALS = (1, 5, 60)
+
+    ### 실행 중인 수신기 (같은 프로세스에서만 사용, fork 된 워커에서는 None)
+    current = None
+
+    def __init__(self, tickers, capacity=CAPACITY, record_path=None):
+        self.tickers = list(tickers)
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.rings = {ticker: TickRing(capacity) for ticker in self.tickers}
+        self.candles = {ticker: {minutes: CandleBuilder(minutes) for minutes in TickFeed.INTERVALS} for ticker in self.tickers}
+        self.prices = {}
+        self.received = 0
+        self.record_path = record_path
+        self._record = None
+        self._source = None
+        self._threads = []
+        self._stop = threading.Event()
+
+    ### 메시지의 체결 시각 (ms)
+    def timestamp(message):
+        if not isinstance(message, dict):
+            return None
+        return message.get("trade_timestamp") or message.get("timestamp")
+
+    ### 수신 시작 (source 를 지정하지 않으면 Upbit 웹소켓)
+    def start(self, source=None):
+        self._source = source or UpbitSource(self.tickers)
+        if self.record_path:
+            self._record = open(self.record_path, "a")
+        for read in self._source.readers():
+            thread = threading.Thread(target=self._consume, args=(read,), name="tick-feed", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        TickFeed.current = self
+        Log.recordLog(Log.INFO, "Tick feed started", f"{self.tickers}")
+        return self
+
+    def _consume(self, read):
+        while not self._stop.is_set():
+            try:
+                message = read()
+            except StopIteration:
+                break
+            except Exception as e:
+                Log.recordLog(Log.WARNING, "Tick feed read failed", f"{e}")
+                self._stop.wait(1)
+                continue
+            self.on_message(message)
+
+    ### 재생이 끝날 때까지 대기 (ReplaySource)
+    def join(self, timeout=None):
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def stop(self):
+        self._stop.set()
+        if self._source is not None:
+            self._source.close()
+        if self._record is not None:
+            self._record.close()
+            self._record = None
+        if TickFeed.current is self:
+            TickFeed.current = None
+
+    def on_message(self, message):
+        # 연결이 끊기면 WebSocketManager 가 문자열을 넣고 재연결함
+        if not isinstance(message, dict) or message.get("code") not in self.rings:
+            return
+
+        code = message["code"]
+        price = float(message["trade_price"])
+        ts = TickFeed.timestamp(message)
+        with self.lock:
+            self.received += 1
+            self.prices[code] = (price, time.monotonic())
+            if message.get("type") == "trade":
+                volume = float(message["trade_volume"])
+                self.rings[code].append(ts, price, volume)
+                for builder in self.candles[code].values():
+                    builder.update(ts, price, volume)
+            if self._record is not None:
+                self._record.write(json.dumps(message, separators=(",", ":")) + "\n")
+
+    ### 실행 중인 수신기 (현재 프로세스에서 시작된 경우만)
+    def active():
+        feed = TickFeed.current
+        if feed is None or feed.pid != os.getpid():
+            return None
+        return feed
+
+    ### 현재가 (최근 MAX_AGE 초 이내에 갱신되지 않았으면 None)
+    def price(self, ticker, max_age=MAX_AGE):
+        with self.lock:
+            value = self.prices.get(ticker)
+        if value is None or time.monotonic() - value[1] > max_age:
+            return None
+        return value[0]
+
+    ### 로컬 분봉 (interval : minute1 / minute5 / minute60)
+    def ohlcv(self, ticker, interval):
+        minutes = int(interval[len("minute"):]) if interval.startswith("minute") else None
+        builders = self.candles.get(ticker, {})
+        if minutes not in builders:
+            return None
+        with self.lock:
+            return builders[minutes].frame()
+
+    ### 저장소의 캔들 뒤에 로컬 분봉을 이어 붙여 조회 (REST 요청 없음)
+    ### 수신 시작 시점의 첫 캔들은 일부 체결만 반영되어 있으므로 저장소 값을 사용
+    ### 저장소와 이어지지 않거나 로컬 분봉이 부족하면 None
+    def get_ohlcv(self, store, ticker, interval, count):
+        live = self.ohlcv(ticker, interval)
+        if live is None or len(live) < 2:
+            return None
+        stored = store.load(ticker, interval, count)
+        if stored.empty or stored.index[-1] < live.index[0]:
+            return None
+
+        # 마감된 로컬 분봉은 저장소에도 반영
+        store.save(ticker, interval, live.iloc[1:-1])
+        df = pd.concat([stored[stored.index < live.index[1]], live.iloc[1:]])
+        return df.tail(count)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "received": self.received,
+                "ticks": {ticker: ring.count for ticker, ring in self.rings.items()},
+            }
@@ -0,0 +1,109 @@
+from util.log import Log
+from util.trace import Trace
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import contextvars
+import time
+
+
+class Fetcher:
+    ### 소스별 기본 deadline (초)
+    DEFAULT_TIMEOUT = 10
+
+    OK = "ok"
+    EMPTY = "empty"
+    TIMEOUT = "timeout"
+    ERROR = "error"
+
+    def __init__(self):
+        self.sources = {}
+        self.results = {}
+        self.latencies = {}
+        self.status = {}
+
+    ### 조회 소스 등록
+    ### timeout : 수집 시작 시점 기준 해당 소스의 deadline (초)
+    ### required : 해당 소스가 없으면 이번 실행을 진행할 수 없는지 여부
+    def add(self, name, func, *args, timeout=DEFAULT_TIMEOUT, required=False, **kwargs):
+        self.sources[name] = {
+            "func": func,
+            "args": args,
+            "kwargs": kwargs,
+            "timeout": timeout,
+            "required": required,
+        }
+        return self
+
+    ### 호출 함수 실행 및 소요 시간 측정 (예외도 소요 시간과 함께 반환)
+    def _timed(func, args, kwargs):
+        start = time.monotonic()
+        try:
+            return func(*args, **kwargs), time.monotonic() - start, None
+        except Exception as e:
+            return None, time.monotonic() - start, e
+
+    ### 등록된 소스들을 동시에 조회
+    ### deadline 을 넘기거나 예외가 발생한 소스는 None 으로 채우고 나머지 결과로 진행
+    def gather(self):
+        if not self.sources:
+            return self.results
+
+        start = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=len(self.sources), thread_name_prefix="fetcher")
+        # 작업 스레드의 로그에도 run_id / stage 가 남도록 현재 context 를 복사해서 실행
+        futures = {
+            name: executor.submit(contextvars.copy_context().run, Fetcher._timed, source["func"], source["args"], source["kwargs"])
+            for name, source in self.sources.items()
+        }
+
+        # deadline 이 짧은 소스부터 대기해야 각 소스의 deadline 이 지켜짐
+        for name in sorted(futures, key=lambda n: self.sources[n]["timeout"]):
+            source = self.sources[name]
+            remaining = start + source["timeout"] - time.monotonic()
+            try:
+                value, elapsed, error = futures[name].result(timeout=max(remaining, 0))
+                self.results[name] = value
+                self.latencies[name] = elapsed
+                if error is not None:
+                    self.status[name] = Fetcher.ERROR
+                    Log.recordLog(Log.ERROR, f"Error fetching {name}", error, latency=round(elapsed, 6))
+                else:
+                    self.status[name] = Fetcher.EMPTY if Fetcher._is_empty(value) else Fetcher.OK
+            except FutureTimeoutError:
+                futures[name].cancel()
+                self.results[name] = None
+                self.latencies[name] = time.monotonic() - start
+                self.status[name] = Fetcher.TIMEOUT
+                Log.recordLog(Log.WARNING, "Market data timeout", f"{name} exceeded {source['timeout']}s deadline")
+
+        for name, elapsed in self.latencies.items():
+            Trace.observe("source_seconds", elapsed, source=name)
+            Trace.count("source_results", source=name, status=self.status[name])
+
+        # 응답이 없는 스레드는 기다리지 않고 버림
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        Log.recordLog(Log.INFO, "Market data latency", self.report())
+        return self.results
+
+    ### 빈 응답 여부 (None, 빈 DataFrame, 빈 list/dict)
+    def _is_empty(value):
+        if value is None:
+            return True
+        if hasattr(value, "empty"):
+            return value.empty
+        if isinstance(value, (list, dict)):
+            return len(value) == 0
+        return False
+
+    ### 필수 소스 중 조회에 실패한 소스 목록
+    def missing_required(self):
+        return [
+            name for name, source in self.sources.items()
+            if source["required"] and self.status.get(name) != Fetcher.OK
+        ]
+
+    ### 소스별 지연 시간 리포트 (느린 순)
+    def report(self):
+        ordered = sorted(self.latencies.items(), key=lambda item: item[1], reverse=True)
+        return ", ".join(f"{name}={elapsed:.3f}s({self.status[name]})" for name, elapsed in ordered)
@@ -0,0 +1,423 @@
+from util.candle import CandleStore
+from collections import deque
+import json
+import math
+import sqlite3
+import pandas as pd
+import ta
+
+
+### TA 라이브러리를 이용하여 df 데이터에 보조지표 추가
+### 추가한 보조 지표 : 볼린저 밴드, RSI, MACD, 이동평균선 
+def add_indicators(df):
+    # 볼린저 밴드 추가
+    # window 값 만큼의 데이터가 있어야 산출이 가능
+    # window dev는 표준편차 값 설정
+    indicator_bb = ta.volatility.BollingerBands(close=df['close'], window=20, window_dev=2)
+    df['bb_bbm'] = indicator_bb.bollinger_mavg()
+    df['bb_bbh'] = indicator_bb.bollinger_hband()
+    df['bb_bbl'] = indicator_bb.bollinger_lband()
+
+    # RSI (Relative Strength Index) 추가
+    # 최소 14일치의 데이터가 있어야 조회 가능
+    df['rsi'] = ta.momentum.RSIIndicator(close=df['close'], window=14).rsi()
+
+    # 이동평균선 
+    # sma : 단순 이동평균선
+    # ema : 지수 이동평균선
+    # window 값 만큼의 데이터가 있어야 산출이 가능
+    df['sma_5'] = ta.trend.SMAIndicator(close=df['close'], window=5).sma_indicator()
+    df['ema_7'] = ta.trend.EMAIndicator(close=df['close'], window=7).ema_indicator()
+
+    # # MACD (Moving Average Convergence Divergence) 추가
+    # macd = ta.trend.MACD(close=df['close'])
+    # df['macd'] = macd.macd()
+    # df['macd_signal'] = macd.macd_signal()
+    # df['macd_diff'] = macd.macd_diff()
+
+    #  # Stochastic Oscillator 추가
+    # stoch = ta.momentum.StochasticOscillator(
+    #     high=df['high'], low=df['low'], close=df['close'], window=14, smooth_window=3)
+    # df['stoch_k'] = stoch.stoch()
+    # df['stoch_d'] = stoch.stoch_signal()
+    
+    return df
+
+
+### 보조지표 증분 계산기
+### commit(close) : 마감된 캔들을 상태에 반영
+### value(close)  : 상태를 바꾸지 않고 다음 캔들(진행 중인 캔들 포함)의 지표 값 계산
+### 두 연산 모두 window 크기와 무관하게 O(1)
+
+
+### 단순 이동평균 / 볼린저 밴드 공용 rolling 합계
+### 값의 기준점(shift)을 빼서 합산해야 제곱합 계산 시 자릿수 손실이 적음
+class _Rolling:
+    # 누적 오차 정리를 위해 합계를 다시 계산하는 주기
+    RESYNC = 512
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.shift = None
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.commits = 0
+
+    def _resync(self):
+        self.shift = self.values[-1] if self.values else None
+        self.total = sum(v - self.shift for v in self.values) if self.values else 0.0
+        self.total_sq = sum((v - self.shift) ** 2 for v in self.values) if self.values else 0.0
+
+    def commit(self, close):
+        if self.shift is None:
+            self.shift = close
+        self.values.append(close)
+        self.total += close - self.shift
+        self.total_sq += (close - self.shift) ** 2
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            self.total -= old - self.shift
+            self.total_sq -= (old - self.shift) ** 2
+
+        self.commits += 1
+        if self.commits % _Rolling.RESYNC == 0:
+            self._resync()
+
+    ### close 를 추가했을 때의 (평균, 표준편차(ddof=0)), window 미달이면 None
+    def stats(self, close):
+        if len(self.values) + 1 < self.window:
+            return None
+        shift = self.shift if self.shift is not None else close
+        total = self.total + (close - shift)
+        total_sq = self.total_sq + (close - shift) ** 2
+        if len(self.values) + 1 > self.window:
+            old = self.values[0]
+            total -= old - shift
+            total_sq -= (old - shift) ** 2
+        mean = total / self.window
+        variance = max(total_sq / self.window - mean ** 2, 0.0)
+        return mean + shift, math.sqrt(variance)
+
+    def to_state(self):
+        return {"values": list(self.values), "commits": self.commits}
+
+    def load_state(self, state):
+        self.values = deque(state["values"])
+        self.commits = state["commits"]
+        self._resync()
+
+
+### 단순 이동평균 (ta.trend.SMAIndicator 와 동일)
+class SMA:
+    def __init__(self, window):
+        self.rolling = _Rolling(window)
+
+    def commit(self, close):
+        self.rolling.commit(close)
+
+    def value(self, close):
+        stats = self.rolling.stats(close)
+        return {"": stats[0] if stats else math.nan}
+
+    def to_state(self):
+        return self.rolling.to_state()
+
+    def load_state(self, state):
+        self.rolling.load_state(state)
+
+
+### 볼린저 밴드 (ta.volatility.BollingerBands 와 동일, 표준편차 ddof=0)
+class Bollinger:
+    def __init__(self, window, window_dev):
+        self.rolling = _Rolling(window)
+        self.window_dev = window_dev
+
+    def commit(self, close):
+        self.rolling.commit(close)
+
+    def value(self, close):
+        stats = self.rolling.stats(close)
+        if not stats:
+            return {"bbm": math.nan, "bbh": math.nan, "bbl": math.nan}
+        mean, std = stats
+        return {
+            "bbm": mean,
+            "bbh": mean + self.window_dev * std,
+            "bbl": mean - self.window_dev * std,
+        }
+
+    def to_state(self):
+        return self.rolling.to_state()
+
+    def load_state(self, state):
+        self.rolling.load_state(state)
+
+
+### 지수 이동평균 (ta.trend.EMAIndicator 와 동일, span=window, adjust=False)
+class EMA:
+    def __init__(self, window):
+        self.window = window
+        self.alpha = 2 / (window + 1)
+        self.ema = None
+        self.count = 0
+
+    def _next(self, close):
+        return close if self.ema is None else self.ema + self.alpha * (close - self.ema)
+
+    def commit(self, close):
+        self.ema = self._next(close)
+        self.count += 1
+
+    def value(self, close):
+        return {"": self._next(close) if self.count + 1 >= self.window else math.nan}
+
+    def to_state(self):
+        return {"ema": self.ema, "count": self.count}
+
+    def load_state(self, state):
+        self.ema = state["ema"]
+        self.count = state["count"]
+
+
+### RSI (ta.momentum.RSIIndicator 와 동일, Wilder 평활 alpha=1/window)
+class RSI:
+    def __init__(self, window):
+        self.window = window
+        self.alpha = 1 / window
+        self.prev_close = None
+        self.ema_up = 0.0
+        self.ema_down = 0.0
+        self.count = 0
+
+    def _next(self, close):
+        # 첫 캔들은 변화량이 없으므로 상승/하락 모두 0 으로 시작
+        if self.prev_close is None:
+            return 0.0, 0.0
+        diff = close - self.prev_close
+        up = diff if diff > 0 else 0.0
+        down = -diff if diff < 0 else 0.0
+        return (
+            self.ema_up + self.alpha * (up - self.ema_up),
+            self.ema_down + self.alpha * (down - self.ema_down),
+        )
+
+    def commit(self, close):
+        self.ema_up, self.ema_down = self._next(close)
+        self.prev_close = close
+        self.count += 1
+
+    def value(self, close):
+        if self.count + 1 < self.window:
+            return {"": math.nan}
+        ema_up, ema_down = self._next(close)
+        if ema_down == 0:
+            return {"": 100.0}
+        return {"": 100 - (100 / (1 + ema_up / ema_down))}
+
+    def to_state(self):
+        return {
+            "prev_close": self.prev_close,
+            "ema_up": self.ema_up,
+            "ema_down": self.ema_down,
+            "count": self.count,
+        }
+
+    def load_state(self, state):
+        self.prev_close = state["prev_close"]
+        self.ema_up = state["ema_up"]
+        self.ema_down = state["ema_down"]
+        self.count = state["count"]
+
+
+class IndicatorEngine:
+    ### add_indicators 와 같은 지표 구성 (컬럼 prefix : 지표)
+    DEFAULT_SPEC = {
+        "bb_": ("bollinger", 20, 2),
+        "rsi": ("rsi", 14),
+        "sma_5": ("sma", 5),
+        "ema_7": ("ema", 7),
+    }
+
+    def __init__(self, ticker, interval, spec=None):
+        self.ticker = ticker
+        self.interval = interval
+        self.spec = spec or IndicatorEngine.DEFAULT_SPEC
+        self.indicators = {
+            prefix: IndicatorEngine._build(*params) for prefix, params in self.spec.items()
+        }
+        # 진행 중(미반영)인 마지막 캔들
+        self.pending_ts = None
+        self.pending_close = None
+
+    def _build(kind, *args):
+        if kind == "bollinger":
+            return Bollinger(*args)
+        if kind == "rsi":
+            return RSI(*args)
+        if kind == "sma":
+            return SMA(*args)
+        if kind == "ema":
+            return EMA(*args)
+        raise ValueError(f"Unknown indicator : {kind}")
+
+    ### 지표 컬럼 목록
+    def columns(self):
+        return [
+            prefix + name
+            for prefix, indicator in self.indicators.items()
+            for name in indicator.value(0.0)
+        ]
+
+    ### 캔들 한 개 반영 후 지표 값 반환
+    ### 같은 시각의 캔들이 다시 들어오면 진행 중인 캔들의 값만 교체 (틱 단위 갱신)
+    def update(self, ts, close):
+        ts = pd.Timestamp(ts)
+        if self.pending_ts is not None and ts < self.pending_ts:
+            raise ValueError(f"Out of order candle : {ts} < {self.pending_ts}")
+
+        if self.pending_ts is not None and ts > self.pending_ts:
+            for indicator in self.indicators.values():
+                indicator.commit(self.pending_close)
+
+        self.pending_ts = ts
+        self.pending_close = float(close)
+
+        values = {}
+        for prefix, indicator in self.indicators.items():
+            for name, value in indicator.value(self.pending_close).items():
+                values[prefix + name] = value
+        return values
+
+    def to_state(self):
+        return {
+            "spec": {prefix: list(params) for prefix, params in self.spec.items()},
+            "pending_ts": self.pending_ts.isoformat() if self.pending_ts is not None else None,
+            "pending_close": self.pending_close,
+            "indicators": {prefix: indicator.to_state() for prefix, indicator in self.indicators.items()},
+        }
+
+    def from_state(ticker, interval, state):
+        spec = {prefix: tuple(params) for prefix, params in state["spec"].items()}
+        engine = IndicatorEngine(ticker, interval, spec)
+        engine.pending_ts = pd.Timestamp(state["pending_ts"]) if state["pending_ts"] else None
+        engine.pending_close = state["pending_close"]
+        for prefix, indicator_state in state["indicators"].items():
+            engine.indicators[prefix].load_state(indicator_state)
+        return engine
+
+
+class IndicatorStore:
+    ### 엔진 상태와 계산된 지표 값을 캔들 저장소와 같은 SQLite 파일에 보관
+    def __init__(self, path=CandleStore.DEFAULT_PATH):
+        self.path = path
+        conn = self._connect()
+        conn.execute('''
+                    CREATE TABLE IF NOT EXISTS indicator_state (
+                        ticker TEXT NOT NULL,
+                        interval TEXT NOT NULL,
+                        state TEXT NOT NULL,
+                        PRIMARY KEY (ticker, interval)
+                    ) WITHOUT ROWID
+                ''')
+        conn.execute('''
+                    CREATE TABLE IF NOT EXISTS indicator_values (
+                        ticker TEXT NOT NULL,
+                        interval TEXT NOT NULL,
+                        ts TEXT NOT NULL,
+                        name TEXT NOT NULL,
+                        value REAL,
+                        PRIMARY KEY (ticker, interval, ts, name)
+                    ) WITHOUT ROWID
+                ''')
+        conn.commit()
+        conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    ### 저장된 엔진 불러오기 (없으면 새 엔진)
+    def load_engine(self, ticker, interval, spec=None):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT state FROM indicator_state WHERE ticker = ? AND interval = ?", (ticker, interval)
+        ).fetchone()
+        conn.close()
+
+        if row:
+            engine = IndicatorEngine.from_state(ticker, interval, json.loads(row[0]))
+            if spec is None or engine.spec == spec:
+                return engine
+        return IndicatorEngine(ticker, interval, spec)
+
+    ### keep_since : 이 시각보다 오래된 지표 값은 삭제 (다음 실행은 엔진 상태만으로 이어서 계산)
+    def save_engine(self, engine, values, keep_since=None):
+        rows = [
+            (engine.ticker, engine.interval, ts.isoformat(), name, None if math.isnan(value) else value)
+            for ts, row in values.items()
+            for name, value in row.items()
+        ]
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO indicator_state (ticker, interval, state) VALUES (?, ?, ?)",
+            (engine.ticker, engine.interval, json.dumps(engine.to_state())),
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO indicator_values (ticker, interval, ts, name, value) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        if keep_since is not None:
+            conn.execute(
+                "DELETE FROM indicator_values WHERE ticker = ? AND interval = ? AND ts < ?",
+                (engine.ticker, engine.interval, keep_since.isoformat()),
+            )
+        conn.commit()
+        conn.close()
+
+    ### 보관 중인 가장 오래된 지표 값의 시각 (없으면 None)
+    def oldest_value(self, ticker, interval):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT MIN(ts) FROM indicator_values WHERE ticker = ? AND interval = ?", (ticker, interval)
+        ).fetchone()
+        conn.close()
+        return pd.Timestamp(row[0]) if row and row[0] else None
+
+    def load_values(self, ticker, interval, since):
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT ts, name, value FROM indicator_values WHERE ticker = ? AND interval = ? AND ts >= ?",
+            (ticker, interval, since.isoformat()),
+        ).fetchall()
+        conn.close()
+        values = {}
+        for ts, name, value in rows:
+            values.setdefault(pd.Timestamp(ts), {})[name] = math.nan if value is None else value
+        return values
+
+    ### 캔들 DataFrame 에 지표 컬럼 추가
+    ### 이미 계산된 캔들은 저장된 값을 사용하고, 새로운 캔들만 엔진에 반영
+    ### 지표 값은 이번 캔들 범위(df 의 첫 캔들 이후)만 보관
+    def apply(self, ticker, interval, df):
+        engine = self.load_engine(ticker, interval)
+        first_ts = df.index[0]
+
+        # 저장된 상태와 이어지지 않는 경우 (최초 실행, 캔들 누락, 보관 범위보다 긴 요청) 처음부터 다시 계산
+        oldest = self.oldest_value(ticker, interval) if engine.pending_ts is not None else None
+        if (engine.pending_ts is None or engine.pending_ts < first_ts or engine.pending_ts not in df.index
+                or oldest is None or oldest > first_ts):
+            engine = IndicatorEngine(ticker, interval, engine.spec)
+            new_rows = df
+        else:
+            new_rows = df[df.index >= engine.pending_ts]
+
+        computed = {ts: engine.update(ts, close) for ts, close in new_rows["close"].items()}
+        self.save_engine(engine, computed, keep_since=first_ts)
+
+        values = self.load_values(ticker, interval, first_ts)
+        values.update(computed)
+
+        df = df.copy()
+        for column in engine.columns():
+            df[column] = [values.get(ts, {}).get(column, math.nan) for ts in df.index]
+        return df
@@ -2,10 +2,23 @@ import os
 import sys
 
 class Init:
-    ### 환경변수 로드
+    ### 환경변수 로드 (PYTHON_ENV 가 없을 때만 실행 인자 사용)
     def set_env():
-        env = os.getenv('PYTHON_ENV', sys.argv[1])
+        env = os.getenv('PYTHON_ENV') or sys.argv[1]
         print(f"Current environment: {env}")
 
         return env
-    
\ No newline at end of file
+
+    ### 거래 종목 목록 로드 (콤마로 구분, 기본값 KRW-BTC)
+    def get_tickers():
+        tickers = [ticker.strip() for ticker in os.getenv('TRADE_TICKERS', 'KRW-BTC').split(',') if ticker.strip()]
+        print(f"Trading markets: {tickers}")
+
+        return tickers
+
+    ### 거래 실행 주기 로드 (cron 형식, 기본값 매일 11시 / 23시)
+    def get_schedule():
+        schedule = os.getenv('TRADE_SCHEDULE', '0 11,23 * * *')
+        print(f"Trading schedule: {schedule}")
+
+        return schedule
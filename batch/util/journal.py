@@ -0,0 +1,132 @@
+from util.log import Log
+from util.trace import Trace
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+### 거래 기록 write-behind 저널
+### 거래 기록은 먼저 로컬 SQLite 에 동기 기록(fsync)하고, MySQL 에는 연결 가능할 때 묶어서 반영
+### 각 기록은 journal_id 로 식별되며 trades.journal_id 유니크 키로 중복 반영을 막음 (재실행해도 한 번만 저장)
+class Journal:
+    ### 저널 기본 경로 (컨테이너 재시작 후에도 유지하려면 볼륨으로 마운트)
+    DEFAULT_PATH = os.getenv("TRADE_JOURNAL_PATH", os.path.join("data", "journal.db"))
+
+    ### 한 번의 INSERT 로 반영할 최대 기록 수
+    BATCH_SIZE = 100
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute('''
+                    CREATE TABLE IF NOT EXISTS journal (
+                        journal_id TEXT PRIMARY KEY,
+                        created_at REAL NOT NULL,
+                        record TEXT NOT NULL,
+                        flushed_at REAL
+                    )
+                ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_journal_pending ON journal (flushed_at, created_at)")
+        conn.commit()
+        conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        # 커밋마다 fsync (주문 체결 후 기록이 유실되지 않도록)
+        conn.execute("PRAGMA synchronous=FULL")
+        return conn
+
+    ### 기록 추가 (로컬 저장만 하고 바로 반환)
+    def append(self, record):
+        journal_id = uuid.uuid4().hex
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO journal (journal_id, created_at, record) VALUES (?, ?, ?)",
+                (journal_id, time.time(), json.dumps(record)),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return journal_id
+
+    ### 아직 반영되지 않은 기록 (오래된 순)
+    def pending(self, limit=None):
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT journal_id, record FROM journal WHERE flushed_at IS NULL ORDER BY created_at LIMIT ?",
+                (limit or -1,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(json.loads(record), journal_id=journal_id) for journal_id, record in rows]
+
+    def _mark_flushed(self, journal_ids):
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "UPDATE journal SET flushed_at = ? WHERE journal_id = ?",
+                [(time.time(), journal_id) for journal_id in journal_ids],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    ### 미반영 기록을 MySQL 에 반영
+    ### write : 기록 목록을 저장하는 함수 (DB 커밋까지 완료해야 함)
+    ### 반영 후 표시하기 전에 중단되어도 다음 반영 시 유니크 키로 중복이 무시됨
+    def flush(self, write):
+        with self._flush_lock:
+            flushed = 0
+            while True:
+                records = self.pending(Journal.BATCH_SIZE)
+                if not records:
+                    break
+                write(records)
+                self._mark_flushed([record["journal_id"] for record in records])
+                flushed += len(records)
+                if len(records) < Journal.BATCH_SIZE:
+                    break
+            return flushed
+
+    ### 백그라운드 스레드에서 반영 (DB 에 연결할 수 없으면 다음 반영 때 다시 시도)
+    def flush_async(self, write):
+        def run():
+            try:
+                flushed = self.flush(write)
+                Trace.count("journal_flushed", flushed)
+                if flushed:
+                    Log.recordLog(Log.INFO, "Journal flushed", f"{flushed} records")
+            except Exception as e:
+                Trace.count("journal_flush_failures")
+                Log.recordLog(Log.WARNING, "Journal flush deferred", f"{self.count_pending()} pending : {e}")
+
+        self._thread = threading.Thread(target=contextvars.copy_context().run, args=(run,), name="journal-flush", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    ### 진행 중인 백그라운드 반영 대기 (프로세스 종료 전 호출)
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+    def count_pending(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM journal WHERE flushed_at IS NULL").fetchone()[0]
+        finally:
+            conn.close()
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+
+class IndicatorKernel:
+    ### 여러 종목 / 여러 window 의 보조지표를 NumPy 로 한 번에 계산
+    ### 입력 : 종가 2차원 배열 (종목 x 시간), 종목별 캔들 시각은 정렬되어 있어야 함
+    ### 출력 : {컬럼명: (종목 x 시간) 배열} 형태의 컬럼 기반 구조
+    ### 계산식은 ta 라이브러리 (add_indicators) 와 동일하며 window 미달 구간은 NaN
+
+    DEFAULT_BB = ((20, 2),)
+    DEFAULT_RSI = (14,)
+    DEFAULT_SMA = (5,)
+    DEFAULT_EMA = (7,)
+
+    def compute(close, bb=DEFAULT_BB, rsi=DEFAULT_RSI, sma=DEFAULT_SMA, ema=DEFAULT_EMA, dtype=np.float64):
+        close = np.asarray(close, dtype=np.float64)
+        if close.ndim == 1:
+            close = close[np.newaxis, :]
+
+        result = {}
+
+        # 이동평균 / 볼린저 밴드 : 누적합 한 번으로 모든 window 계산
+        # 종목별 평균을 빼고 누적해야 제곱합의 자릿수 손실이 적음
+        center = close.mean(axis=1, keepdims=True)
+        shifted = close - center
+        zeros = np.zeros((close.shape[0], 1))
+        cumsum = np.concatenate([zeros, np.cumsum(shifted, axis=1)], axis=1)
+        cumsum_sq = np.concatenate([zeros, np.cumsum(shifted ** 2, axis=1)], axis=1)
+
+        for window in sorted(set(sma) | {w for w, _ in bb}):
+            mean, std = IndicatorKernel._rolling(cumsum, cumsum_sq, window)
+            if window in sma:
+                result[f"sma_{window}"] = (mean + center).astype(dtype)
+            for bb_window, window_dev in bb:
+                if bb_window != window:
+                    continue
+                suffix = f"{window}_{window_dev}"
+                result[f"bb_bbm_{suffix}"] = (mean + center).astype(dtype)
+                result[f"bb_bbh_{suffix}"] = (mean + center + window_dev * std).astype(dtype)
+                result[f"bb_bbl_{suffix}"] = (mean + center - window_dev * std).astype(dtype)
+
+        # EMA / RSI : 시간축은 순차 계산, 종목과 window 는 한 번에 계산
+        if ema:
+            alpha = np.array([2 / (w + 1) for w in ema])
+            values = IndicatorKernel._ewm(close, alpha)
+            for i, window in enumerate(ema):
+                values[i, :, :window - 1] = np.nan
+                result[f"ema_{window}"] = values[i].astype(dtype)
+
+        if rsi:
+            diff = np.diff(close, axis=1, prepend=close[:, :1])
+            up = np.where(diff > 0, diff, 0.0)
+            down = np.where(diff < 0, -diff, 0.0)
+            alpha = np.array([1 / w for w in rsi])
+            ema_up = IndicatorKernel._ewm(up, alpha)
+            ema_down = IndicatorKernel._ewm(down, alpha)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values = np.where(ema_down == 0, 100.0, 100 - 100 / (1 + ema_up / ema_down))
+            for i, window in enumerate(rsi):
+                values[i, :, :window - 1] = np.nan
+                result[f"rsi_{window}"] = values[i].astype(dtype)
+
+        return result
+
+    ### 누적합으로 rolling 평균, 표준편차(ddof=0) 계산
+    def _rolling(cumsum, cumsum_sq, window):
+        length = cumsum.shape[1] - 1
+        mean = np.full((cumsum.shape[0], length), np.nan)
+        std = np.full((cumsum.shape[0], length), np.nan)
+        if window <= length:
+            total = cumsum[:, window:] - cumsum[:, :-window]
+            total_sq = cumsum_sq[:, window:] - cumsum_sq[:, :-window]
+            mean[:, window - 1:] = total / window
+            std[:, window - 1:] = np.sqrt(np.maximum(total_sq / window - (total / window) ** 2, 0.0))
+        return mean, std
+
+    ### adjust=False 지수 평활 (첫 값에서 시작), values : (종목, 시간), alpha : (window,)
+    ### 시간축을 BLOCK 단위로 나누어 블록 안은 행렬곱으로 한 번에 계산 (블록 간에만 순차 계산)
+    BLOCK = 64
+
+    def _ewm(values, alpha):
+        tickers, length = values.shape
+        block = min(IndicatorKernel.BLOCK, max(length - 1, 1))
+        decay = 1 - alpha[:, np.newaxis]
+
+        # weights[w, i, j] = alpha * (1 - alpha)^(i - j) (j <= i), carry[w, i] = (1 - alpha)^(i + 1)
+        steps = np.arange(block)
+        lag = steps[:, np.newaxis] - steps[np.newaxis, :]
+        weights = np.where(lag >= 0, alpha[:, np.newaxis, np.newaxis] * decay[:, :, np.newaxis] ** np.maximum(lag, 0), 0.0)
+        carry = decay ** (steps + 1)
+
+        out = np.empty((len(alpha), tickers, length))
+        out[:, :, 0] = values[:, 0]
+        for start in range(1, length, block):
+            end = min(start + block, length)
+            size = end - start
+            out[:, :, start:end] = (
+                np.einsum("wij,nj->wni", weights[:, :size, :size], values[:, start:end])
+                + carry[:, np.newaxis, :size] * out[:, :, start - 1, np.newaxis]
+            )
+        return out
+
+    ### 특정 종목의 결과를 DataFrame 으로 변환
+    def to_frame(result, row, index=None):
+        return pd.DataFrame({name: values[row] for name, values in result.items()}, index=index)
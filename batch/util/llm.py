@@ -0,0 +1,145 @@
+from util.log import Log
+from util.trace import Trace
+import contextvars
+import os
+import queue
+import random
+import threading
+import time
+
+import openai
+
+
+### deadline 안에서 LLM 요청을 hedging 하여 실행
+### 1. primary : 지정한 모델로 요청
+### 2. hedge : HEDGE_DELAY 초 안에 응답이 없거나 primary 가 실패하면 HEDGE_MODEL (없으면 같은 모델) 로 한 번 더 요청
+### 먼저 도착한 유효한 응답을 사용하고 나머지 요청은 취소
+### 각 요청은 429 / 5xx / 연결 오류일 때 backoff 후 재시도 (Retry-After 가 있으면 따름)
+### DEADLINE 초 안에 유효한 응답이 없으면 None (이번 실행은 판단 없이 종료)
+class LLMRequest:
+    DEADLINE = float(os.getenv("LLM_DEADLINE", "90"))
+    HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "25"))
+    HEDGE_MODEL = os.getenv("LLM_HEDGE_MODEL", "")
+    MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+
+    ### 재시도 대기 시간 (초) : RETRY_BASE * 2^n, 최대 RETRY_MAX
+    RETRY_BASE = 0.5
+    RETRY_MAX = 8.0
+
+    PRIMARY = "primary"
+    HEDGE = "hedge"
+
+    def __init__(self, deadline=DEADLINE, hedge_delay=HEDGE_DELAY, hedge_model=HEDGE_MODEL, max_retries=MAX_RETRIES):
+        self.deadline = deadline
+        self.hedge_delay = hedge_delay
+        self.hedge_model = hedge_model
+        self.max_retries = max_retries
+
+    ### 요청 실행
+    ### call(model, timeout, cancel) : 응답을 반환하거나 예외 발생 (cancel 이 설정되면 가능한 빨리 중단)
+    ### 반환 : 먼저 도착한 유효한 응답 (없으면 None)
+    def run(self, call, model):
+        start = time.monotonic()
+        deadline = start + self.deadline
+        paths = [(LLMRequest.PRIMARY, model)]
+        # hedge_delay 가 음수이거나 deadline 이후이면 hedging 하지 않음
+        if 0 <= self.hedge_delay < self.deadline:
+            paths.append((LLMRequest.HEDGE, self.hedge_model or model))
+        cancels = {name: threading.Event() for name, _ in paths}
+        results = queue.Queue()
+        errors = {}
+
+        def launch(index):
+            name, path_model = paths[index]
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(self._attempt, name, path_model, call, deadline, cancels[name], results),
+                name=f"llm-{name}",
+                daemon=True,
+            ).start()
+
+        launch(0)
+        launched = 1
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            wait_until = deadline if launched == len(paths) else min(deadline, start + self.hedge_delay)
+            try:
+                name, path_model, result, error = results.get(timeout=max(wait_until - now, 0))
+            except queue.Empty:
+                if launched < len(paths) and time.monotonic() < deadline:
+                    launch(launched)
+                    launched += 1
+                continue
+
+            if error is None:
+                for other, event in cancels.items():
+                    if other != name:
+                        event.set()
+                elapsed = time.monotonic() - start
+                Trace.count("llm_path", path=name, model=path_model)
+                Trace.observe("llm_request_seconds", elapsed, path=name)
+                Log.recordLog(Log.INFO, "LLM response", f"{name} ({path_model}) after {elapsed:.2f}s", latency=round(elapsed, 6))
+                return result
+
+            errors[name] = error
+            # primary 가 실패하면 hedge 를 기다리지 않고 바로 시작
+            if launched < len(paths):
+                launch(launched)
+                launched += 1
+            elif len(errors) == launched:
+                break
+
+        for event in cancels.values():
+            event.set()
+        outcome = "failed" if len(errors) == launched else "deadline"
+        Trace.count("llm_path", path="none", model=model, result=outcome)
+        Log.recordLog(Log.ERROR, "LLM request failed", f"{outcome} after {time.monotonic() - start:.2f}s : {errors}")
+        return None
+
+    ### 한 경로의 요청 (재시도 포함), 결과는 results 에 (경로, 모델, 응답, 예외) 로 전달
+    def _attempt(self, name, model, call, deadline, cancel, results):
+        attempt = 0
+        while True:
+            try:
+                result = call(model, max(deadline - time.monotonic(), 0.001), cancel)
+                if not cancel.is_set():
+                    results.put((name, model, result, None))
+                return
+            except Exception as e:
+                if cancel.is_set():
+                    return
+                delay = LLMRequest.backoff(attempt, e)
+                if not LLMRequest.retryable(e) or attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                    results.put((name, model, None, e))
+                    return
+                attempt += 1
+                Trace.count("llm_retries", path=name, status=LLMRequest.status(e))
+                Log.recordLog(Log.WARNING, "LLM request retry", f"{name} ({model}) attempt {attempt} in {delay:.2f}s : {e}")
+                if cancel.wait(delay):
+                    return
+
+    def status(error):
+        status = getattr(error, "status_code", None)
+        if status is not None:
+            return status
+        return type(error).__name__
+
+    ### 재시도할 오류 : 429, 408, 5xx, 연결 오류 / 시간 초과
+    def retryable(error):
+        status = getattr(error, "status_code", None)
+        if isinstance(status, int):
+            return status in (408, 429) or status >= 500
+        return isinstance(error, (openai.APIConnectionError, ConnectionError, TimeoutError))
+
+    ### 재시도 대기 시간 (지수 backoff + jitter, Retry-After 헤더가 더 길면 헤더 값)
+    def backoff(attempt, error=None):
+        delay = min(LLMRequest.RETRY_MAX, LLMRequest.RETRY_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        try:
+            retry_after = float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            retry_after = 0
+        return max(delay, min(retry_after, LLMRequest.RETRY_MAX))
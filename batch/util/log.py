@@ -1,22 +1,265 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import logging.handlers
+import multiprocessing
+import multiprocessing.util
+import os
+import queue
+import sys
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
 
+### 실행 단위 로그 필드 (스레드 / 워커에서 읽을 수 있도록 contextvars 사용)
+_run_id = contextvars.ContextVar("run_id", default=None)
+_stage = contextvars.ContextVar("stage", default=None)
+_fields = contextvars.ContextVar("fields", default={})
+
+
+### JSON lines 형식 : 시각, 레벨, 제목, 내용, 실행 ID, 단계, 추가 필드(latency 등)
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        title, contents = record.args if isinstance(record.args, tuple) and len(record.args) == 2 else (None, record.getMessage())
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "title": title,
+            "message": contents if isinstance(contents, (dict, list, int, float, bool)) or contents is None else str(contents),
+            "run_id": getattr(record, "run_id", None),
+            "stage": getattr(record, "stage", None),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+### 기존 형식 : [시각] 제목 : 내용
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = f"{record.levelname}:[{datetime.fromtimestamp(record.created)}] {record.getMessage()}"
+        fields = dict(getattr(record, "fields", {}))
+        for key in ("run_id", "stage"):
+            if getattr(record, key, None):
+                fields[key] = getattr(record, key)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        elif record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+### 호출한 스레드에서는 큐에 넣기만 함 (메시지 문자열 생성과 출력은 listener 스레드에서 수행)
+### 큐가 가득 차면 기다리지 않고 버림 (주문 처리 중 로그 출력으로 지연되지 않도록)
+class _QueueHandler(logging.handlers.QueueHandler):
+    dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _QueueHandler.dropped += 1
+
+
+### 워커 프로세스 기록을 부모 프로세스로 전달 (pickle 할 수 있도록 내용 / 필드 / 예외를 문자열 등으로 변환)
+class _PipeHandler(logging.Handler):
+    def __init__(self, pipe):
+        super().__init__()
+        self.pipe = pipe
+
+    def portable(record):
+        record = copy.copy(record)
+        if isinstance(record.args, tuple) and len(record.args) == 2:
+            title, contents = record.args
+            if isinstance(contents, (dict, list, tuple)):
+                contents = json.loads(json.dumps(contents, ensure_ascii=False, default=str))
+            elif not isinstance(contents, (str, int, float, bool)) and contents is not None:
+                contents = str(contents)
+            record.args = (str(title), contents)
+        else:
+            record.msg, record.args = record.getMessage(), None
+        if hasattr(record, "fields"):
+            record.fields = json.loads(json.dumps(record.fields, ensure_ascii=False, default=str))
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            self.pipe.put(_PipeHandler.portable(record))
+        except Exception:
+            self.handleError(record)
+
+
+### 부모 프로세스에서 워커 기록을 받아 출력 (multiprocessing.SimpleQueue 는 put_nowait / 대기 시간 지정이 없음)
+class _PipeListener(logging.handlers.QueueListener):
+    def dequeue(self, block):
+        return self.queue.get()
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
 class Log:
 
     INFO = 1
     WARNING = 2
     ERROR = 3
+    DEBUG = 4
+
+    LEVELS = {INFO: logging.INFO, WARNING: logging.WARNING, ERROR: logging.ERROR, DEBUG: logging.DEBUG}
+
+    ### 출력 설정
+    ### LOG_FORMAT : json / text, LOG_FILE : 파일 경로 (빈 값이면 파일 출력 안 함)
+    ### 파일은 LOG_MAX_BYTES 크기마다 교체하고 LOG_BACKUP_COUNT 개까지 보관
+    LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    FORMAT = os.getenv("LOG_FORMAT", "json")
+    FILE = os.getenv("LOG_FILE", os.path.join("data", "logs", "autotrade.log"))
+    MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    QUEUE_SIZE = 10000
 
-    logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger(__name__)
+    logger = logging.getLogger("autotrade")
+    handlers = []
+    listener = None
+    pipe = None
+    pipe_listener = None
+
+    def _formatter():
+        return JsonFormatter() if Log.FORMAT == "json" else TextFormatter()
+
+    def _attach(handler):
+        for existing in list(Log.logger.handlers):
+            Log.logger.removeHandler(existing)
+        Log.logger.addHandler(handler)
+        Log.logger.propagate = False
+
+    ### 기본 출력 : setup 전(import 시점, 테스트 스크립트)에는 stderr 에 바로 출력하고 파일은 만들지 않음
+    def _console():
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(Log._formatter())
+        Log.handlers = [handler]
+        Log._attach(handler)
+
+    def _start(handlers):
+        log_queue = queue.Queue(Log.QUEUE_SIZE)
+        Log._attach(_QueueHandler(log_queue))
+        Log.listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        Log.listener.start()
+
+    ### 실행 진입점(__main__)에서 호출 : 큐 / listener 스레드 시작, stderr 와 LOG_FILE 에 출력
+    ### 파일은 이 프로세스만 기록 (워커 프로세스 기록은 worker_pipe 로 받아 같은 handler 로 출력)
+    def setup(file=FILE):
+        Log.shutdown()
+        formatter = Log._formatter()
+        handlers = [logging.StreamHandler(sys.stderr)]
+        if file:
+            try:
+                os.makedirs(os.path.dirname(file) or ".", exist_ok=True)
+                handlers.append(logging.handlers.RotatingFileHandler(
+                    file, maxBytes=Log.MAX_BYTES, backupCount=Log.BACKUP_COUNT, encoding="utf-8"
+                ))
+            except OSError as e:
+                print(f"Log file unavailable : {e}", file=sys.stderr)
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        Log.handlers = handlers
+        Log._start(handlers)
+
+    ### 워커 프로세스 기록을 받을 파이프 (ProcessPoolExecutor initializer 로 setup_worker 에 전달)
+    def worker_pipe():
+        if Log.pipe is None:
+            Log.pipe = multiprocessing.SimpleQueue()
+            Log.pipe_listener = _PipeListener(Log.pipe, *Log.handlers, respect_handler_level=True)
+            Log.pipe_listener.start()
+        return Log.pipe
+
+    ### 워커 프로세스 초기화 : listener 스레드가 기록을 부모 프로세스의 파이프로 전달
+    ### 워커 종료 시(multiprocessing 종료 처리) 남은 기록도 전달
+    def setup_worker(pipe):
+        Log._reset()
+        Log._start([_PipeHandler(pipe)])
+        multiprocessing.util.Finalize(None, Log.shutdown, exitpriority=10)
+
+    ### 큐에 남은 기록을 모두 출력 (워커에서는 작업이 끝날 때마다 호출하여 부모로 전달)
+    def flush():
+        if Log.listener is not None:
+            Log.listener.stop()
+            Log.listener.start()
+
+    ### 남은 로그 출력 후 listener 종료 (이후 기록은 stderr 에 바로 출력)
+    def shutdown():
+        if Log.listener is None and Log.pipe_listener is None:
+            return
+        for listener in (Log.listener, Log.pipe_listener):
+            if listener is not None:
+                listener.stop()
+        for handler in Log.handlers:
+            handler.close()
+        Log._reset()
+
+    ### fork 된 자식 프로세스 : 부모의 listener 스레드가 없으므로 stderr 직접 출력으로 초기화
+    ### (부모의 로그 파일은 열지 않음, 워커는 setup_worker 로 부모에게 전달)
+    def _reset():
+        Log.listener = None
+        Log.pipe = None
+        Log.pipe_listener = None
+        Log._console()
+
+    def set_level(level):
+        Log.logger.setLevel(level)
 
     @staticmethod
-    def recordLog(type, title, contents):
-        if type == Log.INFO:
-            logging.info(f"[{datetime.now()}] {title} : {contents}")
-        elif type == Log.WARNING:
-            logging.warning(f"[{datetime.now()}] {title} : {contents}")
-        elif type == Log.ERROR:
-            logging.error(f"[{datetime.now()}] {title} : {contents}")
-        else:
-            logging.info(f"[{datetime.now()}] {title} : {contents}")
\ No newline at end of file
+    def recordLog(type, title, contents, **fields):
+        level = Log.LEVELS.get(type, logging.INFO)
+        if not Log.logger.isEnabledFor(level):
+            return
+        context = _fields.get()
+        Log.logger.log(level, "%s : %s", title, contents, extra={
+            "run_id": _run_id.get(),
+            "stage": _stage.get(),
+            "fields": {**context, **fields} if fields else context,
+        })
+
+    ### 새 실행 시작 : 이후 로그에 run_id 와 fields (예: ticker) 를 함께 기록
+    def start_run(**fields):
+        run_id = uuid.uuid4().hex[:12]
+        _run_id.set(run_id)
+        _stage.set(None)
+        _fields.set(fields)
+        return run_id
+
+    def run_id():
+        return _run_id.get()
+
+    ### 실행 단계 표시 (with Log.stage("llm"): ...)
+    @contextmanager
+    def stage(name):
+        token = _stage.set(name)
+        try:
+            yield
+        finally:
+            _stage.reset(token)
+
+    def set_stage(name):
+        return _stage.set(name)
+
+    def reset_stage(token):
+        _stage.reset(token)
+
+
+Log.logger.setLevel(Log.LEVEL)
+Log._console()
+atexit.register(Log.shutdown)
+os.register_at_fork(after_in_child=Log._reset)
@@ -0,0 +1,193 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+### 거래 기억 : 지난 판단과 결과의 누적 요약
+### 거래를 기록할 때마다 직전 판단의 결과(다음 거래까지의 가격 변화)를 평가하고
+### 종목 / 시장 국면(regime) / 판단별 누적 값과 최근 판단 RECENT 개만 갱신 (거래 수와 관계없이 O(1))
+### 프롬프트에는 전체 기록 대신 고정 크기의 요약(context)만 제공
+class TradeMemory:
+    ### 저장 경로 (컨테이너 재시작 후에도 유지하려면 볼륨으로 마운트)
+    DEFAULT_PATH = os.getenv("TRADE_MEMORY_PATH", os.path.join("data", "memory.db"))
+
+    ### 보관할 최근 판단 수
+    RECENT = 5
+
+    ### 지수 가중 평균 수익률의 가중치 (최근 결과 반영 비율)
+    EWM_ALPHA = 0.2
+
+    ### 시장 국면 : 추세(20일 평균 대비) x 변동성(볼린저 밴드 폭)
+    REGIMES = ("up_low_vol", "up_high_vol", "down_low_vol", "down_high_vol")
+    ALL = "*"
+    UNKNOWN = "unknown"
+
+    DECISIONS = ("buy", "sell", "hold")
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute('''
+                    CREATE TABLE IF NOT EXISTS memory_stats (
+                        ticker TEXT NOT NULL,
+                        regime TEXT NOT NULL,
+                        decision TEXT NOT NULL,
+                        count INTEGER NOT NULL DEFAULT 0,
+                        evaluated INTEGER NOT NULL DEFAULT 0,
+                        wins INTEGER NOT NULL DEFAULT 0,
+                        return_sum REAL NOT NULL DEFAULT 0,
+                        return_ewm REAL,
+                        PRIMARY KEY (ticker, regime, decision)
+                    ) WITHOUT ROWID
+                ''')
+        conn.execute('''
+                    CREATE TABLE IF NOT EXISTS memory_recent (
+                        ticker TEXT NOT NULL,
+                        seq INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        decision TEXT NOT NULL,
+                        percentage INTEGER NOT NULL,
+                        price REAL NOT NULL,
+                        regime TEXT NOT NULL,
+                        outcome REAL,
+                        PRIMARY KEY (ticker, seq)
+                    ) WITHOUT ROWID
+                ''')
+        conn.commit()
+        conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    ### 일봉 지표로 시장 국면 판단 (close, bb_bbm, bb_bbh, bb_bbl 필요)
+    def regime(df_daily):
+        if df_daily is None or df_daily.empty or not {"close", "bb_bbm", "bb_bbh", "bb_bbl"} <= set(df_daily.columns):
+            return TradeMemory.UNKNOWN
+        last = df_daily.iloc[-1]
+        width = (df_daily["bb_bbh"] - df_daily["bb_bbl"]) / df_daily["bb_bbm"]
+        trend = "up" if last["close"] >= last["bb_bbm"] else "down"
+        volatility = "high_vol" if width.iloc[-1] > width.median() else "low_vol"
+        return f"{trend}_{volatility}"
+
+    ### 판단 방향 기준 수익률 (buy 는 가격 상승, sell 은 가격 하락이 이익, hold 는 보유 중 가격 변화)
+    def signed_return(decision, price_return):
+        return -price_return if decision == "sell" else price_return
+
+    ### 새 거래 기록 반영
+    ### 1. 같은 종목의 직전 판단을 이번 가격으로 평가하여 누적 값에 반영
+    ### 2. 이번 판단을 최근 목록에 추가하고 RECENT 개를 넘는 오래된 판단 삭제
+    def record(self, ticker, decision, percentage, price, regime=UNKNOWN):
+        if decision not in TradeMemory.DECISIONS or not price:
+            return
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    last = conn.execute(
+                        "SELECT seq, decision, price, regime FROM memory_recent WHERE ticker = ? ORDER BY seq DESC LIMIT 1",
+                        (ticker,),
+                    ).fetchone()
+                    seq = 1
+                    if last is not None:
+                        last_seq, last_decision, last_price, last_regime = last
+                        seq = last_seq + 1
+                        outcome = TradeMemory.signed_return(last_decision, price / last_price - 1)
+                        conn.execute("UPDATE memory_recent SET outcome = ? WHERE ticker = ? AND seq = ?", (outcome, ticker, last_seq))
+                        for key in (TradeMemory.ALL, last_regime):
+                            self._evaluate(conn, ticker, key, last_decision, outcome)
+
+                    for key in (TradeMemory.ALL, regime):
+                        conn.execute('''
+                                INSERT INTO memory_stats (ticker, regime, decision, count) VALUES (?, ?, ?, 1)
+                                ON CONFLICT (ticker, regime, decision) DO UPDATE SET count = count + 1
+                            ''', (ticker, key, decision))
+                    conn.execute(
+                        "INSERT INTO memory_recent (ticker, seq, created_at, decision, percentage, price, regime) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (ticker, seq, time.time(), decision, int(percentage or 0), float(price), regime),
+                    )
+                    conn.execute("DELETE FROM memory_recent WHERE ticker = ? AND seq <= ?", (ticker, seq - TradeMemory.RECENT))
+            finally:
+                conn.close()
+
+    def _evaluate(self, conn, ticker, regime, decision, outcome):
+        alpha = TradeMemory.EWM_ALPHA
+        conn.execute('''
+                UPDATE memory_stats
+                SET evaluated = evaluated + 1,
+                    wins = wins + ?,
+                    return_sum = return_sum + ?,
+                    return_ewm = CASE WHEN return_ewm IS NULL THEN ? ELSE ? * ? + (1 - ?) * return_ewm END
+                WHERE ticker = ? AND regime = ? AND decision = ?
+            ''', (1 if outcome > 0 else 0, outcome, outcome, alpha, outcome, alpha, ticker, regime, decision))
+
+    ### 종목의 누적 값 (regime -> decision -> 값)
+    def stats(self, ticker):
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT regime, decision, count, evaluated, wins, return_sum, return_ewm FROM memory_stats WHERE ticker = ?",
+                (ticker,),
+            ).fetchall()
+        finally:
+            conn.close()
+        stats = {}
+        for regime, decision, count, evaluated, wins, return_sum, return_ewm in rows:
+            stats.setdefault(regime, {})[decision] = {
+                "count": count, "evaluated": evaluated, "wins": wins,
+                "avg_return": return_sum / evaluated if evaluated else None, "ewm_return": return_ewm,
+            }
+        return stats
+
+    def recent(self, ticker):
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT created_at, decision, percentage, price, regime, outcome FROM memory_recent WHERE ticker = ? ORDER BY seq DESC",
+                (ticker,),
+            ).fetchall()
+        finally:
+            conn.close()
+
+    ### 한 줄 요약 : 판단별 횟수, 평가된 판단의 적중률, 평균 / 최근 가중 수익률
+    def _line(stats):
+        parts = []
+        for decision in TradeMemory.DECISIONS:
+            value = stats.get(decision)
+            if not value:
+                continue
+            text = f"{decision} {value['count']}"
+            if value["evaluated"]:
+                if decision != "hold":
+                    text += f" (hit {value['wins'] / value['evaluated']:.0%}"
+                else:
+                    text += " (move"
+                text += f", avg {value['avg_return']:+.2%}, recent {value['ewm_return']:+.2%})"
+            parts.append(text)
+        return ", ".join(parts) if parts else "no trades"
+
+    ### 프롬프트용 고정 크기 요약 (전체, 국면별 최대 4줄, 최근 판단 RECENT 개)
+    ### 수익률은 다음 거래까지의 가격 변화 (sell 은 부호 반대)
+    def context(self, ticker, regime=None):
+        stats = self.stats(ticker)
+        if not stats:
+            return None
+        lines = [f"All regimes: {TradeMemory._line(stats.get(TradeMemory.ALL, {}))}"]
+        for name in TradeMemory.REGIMES + (TradeMemory.UNKNOWN,):
+            if name in stats:
+                marker = " (current)" if name == regime else ""
+                lines.append(f"{name}{marker}: {TradeMemory._line(stats[name])}")
+        recent = [
+            f"{time.strftime('%m-%d %H:%M', time.localtime(created_at))} {decision} {percentage}% @{price:,.0f} {regime_name}"
+            + (f" -> {outcome:+.2%}" if outcome is not None else " -> pending")
+            for created_at, decision, percentage, price, regime_name, outcome in self.recent(ticker)
+        ]
+        if recent:
+            lines.append("Recent decisions: " + "; ".join(recent))
+        return "\n".join(lines)
@@ -0,0 +1,114 @@
+from util.log import Log
+import time
+
+
+class Migration:
+    ### 한 번에 backfill 하는 행 수 (id 범위 기준)
+    CHUNK_SIZE = 5000
+
+    ### trades 테이블 보조 인덱스 (인덱스명 : 컬럼)
+    INDEXES = {
+        "idx_trades_timestamp": "(timestamp)",
+        "idx_trades_ticker_timestamp": "(ticker, timestamp)",
+        "idx_trades_decision_timestamp": "(decision, timestamp)",
+    }
+
+    ### 적용 이력 테이블 생성
+    def ensure_history(conn):
+        c = conn.cursor()
+        c.execute('''
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version INT PRIMARY KEY,
+                        name VARCHAR(100) NOT NULL,
+                        applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+                ''')
+        conn.commit()
+
+    def applied_versions(conn):
+        c = conn.cursor()
+        c.execute("SELECT version FROM schema_migrations")
+        return {row[0] for row in c.fetchall()}
+
+    def _column_type(conn, table, column):
+        c = conn.cursor()
+        c.execute('''
+                    SELECT DATA_TYPE FROM information_schema.COLUMNS
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+                ''', (table, column))
+        row = c.fetchone()
+        return row[0].lower() if row else None
+
+    def _index_exists(conn, table, index):
+        c = conn.cursor()
+        c.execute('''
+                    SELECT COUNT(*) FROM information_schema.STATISTICS
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+                ''', (table, index))
+        return c.fetchone()[0] > 0
+
+    ### 1. timestamp VARCHAR -> DATETIME(6)
+    ### 새 컬럼에 id 범위 단위로 나누어 backfill 한 뒤 컬럼을 교체 (한 번에 큰 UPDATE 를 하지 않음)
+    def timestamp_to_datetime(conn):
+        if Migration._column_type(conn, "trades", "timestamp") == "datetime":
+            return
+
+        c = conn.cursor()
+        if Migration._column_type(conn, "trades", "traded_at") is None:
+            c.execute("ALTER TABLE trades ADD COLUMN traded_at DATETIME(6) NULL")
+            conn.commit()
+
+        c.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM trades")
+        first_id, last_id = c.fetchone()
+        for start in range(first_id, last_id + 1, Migration.CHUNK_SIZE):
+            end = start + Migration.CHUNK_SIZE - 1
+            c.execute('''
+                        UPDATE trades SET traded_at = CAST(REPLACE(timestamp, 'T', ' ') AS DATETIME(6))
+                        WHERE id BETWEEN %s AND %s AND traded_at IS NULL
+                    ''', (start, end))
+            conn.commit()
+            Log.recordLog(Log.INFO, "Backfill trades.traded_at", f"id {start}~{min(end, last_id)} / {last_id}")
+
+        # backfill 중에 추가된 행 반영
+        c.execute('''
+                    UPDATE trades SET traded_at = CAST(REPLACE(timestamp, 'T', ' ') AS DATETIME(6))
+                    WHERE traded_at IS NULL
+                ''')
+        conn.commit()
+
+        c.execute("SELECT id, timestamp FROM trades WHERE traded_at IS NULL LIMIT 10")
+        invalid = c.fetchall()
+        if invalid:
+            raise ValueError(f"Unparseable trades.timestamp values : {invalid}")
+
+        c.execute("ALTER TABLE trades DROP COLUMN timestamp")
+        c.execute("ALTER TABLE trades CHANGE COLUMN traded_at timestamp DATETIME(6) NOT NULL")
+        conn.commit()
+
+    ### 2. 조회 조건에 사용하는 보조 인덱스 추가
+    def add_indexes(conn):
+        c = conn.cursor()
+        for index, columns in Migration.INDEXES.items():
+            if not Migration._index_exists(conn, "trades", index):
+                c.execute(f"CREATE INDEX {index} ON trades {columns}")
+                conn.commit()
+
+    ### (버전, 이름, 함수) 목록, 각 단계는 이미 적용된 상태면 아무것도 하지 않음
+    STEPS = [
+        (1, "timestamp_to_datetime", timestamp_to_datetime),
+        (2, "add_indexes", add_indexes),
+    ]
+
+    ### 적용되지 않은 단계를 순서대로 실행
+    def run(conn):
+        Migration.ensure_history(conn)
+        applied = Migration.applied_versions(conn)
+        for version, name, step in Migration.STEPS:
+            if version in applied:
+                continue
+            start = time.monotonic()
+            step(conn)
+            c = conn.cursor()
+            c.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            conn.commit()
+            Log.recordLog(Log.INFO, "Migration applied", f"{version} {name} ({time.monotonic() - start:.1f}s)")
@@ -0,0 +1,84 @@
+from util.log import Log
+from util.ratelimit import RateLimiter
+from util.trace import Trace
+import os
+import time
+
+
+### 주문 체결 추적
+### 주문 uuid 로 상태를 조회하여 종료 상태(done / cancel)가 될 때까지 대기 (조회 간격은 점점 늘어남)
+### 시장가 매수는 남은 금액이 취소되며 cancel 상태로 끝나는 경우가 있으므로 체결 수량으로 성공 여부 판단
+class OrderTracker:
+    DONE = "done"
+    CANCEL = "cancel"
+    TIMEOUT = "timeout"
+    ERROR = "error"
+
+    ### 최대 대기 시간 (초)
+    TIMEOUT_SECONDS = float(os.getenv("ORDER_TRACK_TIMEOUT", "15"))
+
+    ### 조회 간격 : 처음 INITIAL_DELAY 초에서 BACKOFF 배씩 늘려 최대 MAX_DELAY 초
+    INITIAL_DELAY = 0.2
+    MAX_DELAY = 2.0
+    BACKOFF = 1.6
+
+    def __init__(self, upbit, timeout=TIMEOUT_SECONDS):
+        self.upbit = upbit
+        self.timeout = timeout
+
+    ### 주문 결과 조회 : 체결 수량 / 평균 체결가 / 수수료
+    ### order : buy_market_order / sell_market_order 반환값
+    def track(self, order):
+        start = time.monotonic()
+        if not order or "uuid" not in order:
+            return OrderTracker._result(order, OrderTracker.ERROR, start, 0)
+
+        delay = OrderTracker.INITIAL_DELAY
+        polls = 0
+        detail = order
+        while True:
+            time.sleep(min(delay, max(self.timeout - (time.monotonic() - start), 0)))
+            RateLimiter.wait("exchange")
+            polls += 1
+            try:
+                response = self.upbit.get_order(order["uuid"])
+                if response and "error" not in response:
+                    detail = response
+            except Exception as e:
+                Log.recordLog(Log.WARNING, "Order lookup failed", f"{order['uuid']} : {e}")
+
+            state = detail.get("state")
+            if state in (OrderTracker.DONE, OrderTracker.CANCEL):
+                return OrderTracker._result(detail, state, start, polls)
+            if time.monotonic() - start >= self.timeout:
+                Trace.count("order_timeouts")
+                return OrderTracker._result(detail, OrderTracker.TIMEOUT, start, polls)
+            delay = min(delay * OrderTracker.BACKOFF, OrderTracker.MAX_DELAY)
+
+    def _result(detail, status, start, polls):
+        Trace.count("order_polls", polls)
+        Trace.observe("order_fill_seconds", time.monotonic() - start)
+        detail = detail or {}
+        trades = detail.get("trades") or []
+        volume = sum(float(trade["volume"]) for trade in trades)
+        funds = sum(float(trade["funds"]) for trade in trades)
+        if not trades:
+            volume = float(detail.get("executed_volume") or 0)
+
+        return {
+            "uuid": detail.get("uuid"),
+            "side": detail.get("side"),
+            "status": status,
+            "executed_volume": volume,
+            "avg_price": funds / volume if funds and volume else None,
+            "executed_funds": funds,
+            "paid_fee": float(detail.get("paid_fee") or 0),
+            "polls": polls,
+            "elapsed": round(time.monotonic() - start, 3),
+            "error": detail.get("error"),
+        }
+
+    ### 체결된 수량이 있는지 여부 (TIMEOUT 인 주문은 이후에 체결될 수 있음)
+    ### ExecutionEngine.execute 결과에도 사용 (같은 executed_volume 키)
+    def is_filled(result):
+        return result["executed_volume"] > 0
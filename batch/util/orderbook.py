@@ -0,0 +1,120 @@
+import numpy as np
+
+
+### 호가 분석 (pyupbit.get_orderbook 결과의 orderbook_units 를 numpy 배열로 변환)
+### 누적 잔량, 매수/매도 잔량 비율, 스프레드, 시장가 주문의 예상 체결가(VWAP)와 슬리피지 계산
+class OrderBook:
+    def __init__(self, ask_price, ask_size, bid_price, bid_size, market=None):
+        self.market = market
+        self.ask_price = np.asarray(ask_price, dtype=np.float64)
+        self.ask_size = np.asarray(ask_size, dtype=np.float64)
+        self.bid_price = np.asarray(bid_price, dtype=np.float64)
+        self.bid_size = np.asarray(bid_size, dtype=np.float64)
+        # 호가 단계별 누적 잔량 (수량 / KRW)
+        self.ask_volume = np.cumsum(self.ask_size)
+        self.bid_volume = np.cumsum(self.bid_size)
+        self.ask_krw = np.cumsum(self.ask_price * self.ask_size)
+        self.bid_krw = np.cumsum(self.bid_price * self.bid_size)
+
+    ### pyupbit.get_orderbook 결과 (dict 또는 dict 목록) -> OrderBook, 호가가 없으면 None
+    def parse(orderbook):
+        if isinstance(orderbook, list):
+            orderbook = orderbook[0] if orderbook else None
+        if not orderbook or not orderbook.get("orderbook_units"):
+            return None
+        units = orderbook["orderbook_units"]
+        return OrderBook(
+            [unit["ask_price"] for unit in units],
+            [unit["ask_size"] for unit in units],
+            [unit["bid_price"] for unit in units],
+            [unit["bid_size"] for unit in units],
+            market=orderbook.get("market"),
+        )
+
+    @property
+    def best_ask(self):
+        return float(self.ask_price[0])
+
+    @property
+    def best_bid(self):
+        return float(self.bid_price[0])
+
+    @property
+    def mid(self):
+        return (self.best_ask + self.best_bid) / 2
+
+    def spread_bps(self):
+        return (self.best_ask - self.best_bid) / self.mid * 10000
+
+    ### 상위 levels 단계의 누적 KRW 잔량 (bid, ask)
+    def depth_krw(self, levels=None):
+        return float(self.bid_krw[:levels][-1]), float(self.ask_krw[:levels][-1])
+
+    ### 매수/매도 잔량 비율 (-1 : 매도 잔량만, +1 : 매수 잔량만), 상위 levels 단계 수량 기준
+    def imbalance(self, levels=None):
+        bid = self.bid_volume[:levels][-1]
+        ask = self.ask_volume[:levels][-1]
+        return float((bid - ask) / (bid + ask)) if bid + ask else 0.0
+
+    ### 시장가 매수 예상 체결 : krw 만큼 매도 호가를 순서대로 소진
+    ### filled : 호가 잔량 안에서 체결 가능한 비율 (1.0 미만이면 보이는 호가로는 부족)
+    def buy_estimate(self, krw):
+        return OrderBook._walk(self.ask_price, self.ask_krw, krw, self.best_ask, self.mid, by_krw=True)
+
+    ### 시장가 매도 예상 체결 : volume 만큼 매수 호가를 순서대로 소진
+    def sell_estimate(self, volume):
+        return OrderBook._walk(self.bid_price, self.bid_volume, volume, self.best_bid, self.mid, by_krw=False)
+
+    def _walk(price, cumulative, amount, best, mid, by_krw):
+        if amount <= 0:
+            return {"vwap": best, "slippage_bps": 0.0, "impact_bps": 0.0, "levels": 0, "filled": 1.0}
+
+        # amount 를 모두 채우는 첫 호가 단계
+        level = int(np.searchsorted(cumulative, amount, side="left"))
+        filled = 1.0
+        if level >= len(price):
+            level = len(price) - 1
+            filled = float(cumulative[-1] / amount)
+            amount = float(cumulative[-1])
+
+        # 앞 단계는 전량, 마지막 단계는 남은 만큼만 체결
+        previous = cumulative[level - 1] if level > 0 else 0.0
+        full = np.diff(np.concatenate(([0.0], cumulative[:level])))
+        if by_krw:
+            volume = (full / price[:level]).sum() + (amount - previous) / price[level]
+            krw = amount
+        else:
+            volume = amount
+            krw = (full * price[:level]).sum() + (amount - previous) * price[level]
+
+        vwap = krw / volume
+        return {
+            "vwap": float(vwap),
+            # 최우선 호가 대비 불리한 정도 (bps)
+            "slippage_bps": float(abs(vwap - best) / best * 10000),
+            # 중간 가격 대비 불리한 정도 (스프레드 포함, bps)
+            "impact_bps": float(abs(vwap - mid) / mid * 10000),
+            "levels": level + 1,
+            "filled": filled,
+        }
+
+    ### 프롬프트용 요약
+    ### notional : 슬리피지를 추정할 주문 금액 (KRW)
+    def features(self, depth=5, notional=None):
+        bid_krw, ask_krw = self.depth_krw(depth)
+        features = {
+            "best_bid": self.best_bid,
+            "best_ask": self.best_ask,
+            "spread_bps": round(self.spread_bps(), 2),
+            f"bid_depth{depth}_krw": round(bid_krw),
+            f"ask_depth{depth}_krw": round(ask_krw),
+            f"imbalance{depth}": round(self.imbalance(depth), 3),
+            "imbalance": round(self.imbalance(), 3),
+        }
+        if notional:
+            buy = self.buy_estimate(notional)
+            sell = self.sell_estimate(notional / self.mid)
+            features["notional_krw"] = round(notional)
+            features["buy_slippage_bps"] = round(buy["slippage_bps"], 2)
+            features["sell_slippage_bps"] = round(sell["slippage_bps"], 2)
+        return features
@@ -0,0 +1,133 @@
+from util.log import Log
+from util.orderbook import OrderBook
+import json
+import math
+import os
+import pandas as pd
+import tiktoken
+
+
+### AI 프롬프트용 데이터 압축 인코더
+### DataFrame 은 반올림한 CSV 형태로, 시간은 마지막 행 기준 상대 시간으로 표현
+class Prompt:
+    ### 데이터 영역 전체의 최대 토큰 수
+    TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "8000"))
+
+    ### 토큰 계산에 사용할 인코딩 (모델을 모르는 tiktoken 버전이면 o200k_base)
+    DEFAULT_ENCODING = "o200k_base"
+
+    ### 인코딩 파일을 받을 수 없을 때 사용하는 토큰당 평균 글자 수
+    CHARS_PER_TOKEN = 4
+
+    _encodings = {}
+
+    def encoding(model):
+        if model not in Prompt._encodings:
+            try:
+                try:
+                    Prompt._encodings[model] = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    Prompt._encodings[model] = tiktoken.get_encoding(Prompt.DEFAULT_ENCODING)
+            except Exception as e:
+                # tiktoken 은 최초 사용 시 인코딩 파일을 내려받으므로 실패하면 글자 수로 추정
+                Log.recordLog(Log.WARNING, "Token encoding unavailable", f"{e}")
+                Prompt._encodings[model] = None
+        return Prompt._encodings[model]
+
+    def count_tokens(text, model):
+        encoding = Prompt.encoding(model)
+        if encoding is None:
+            return math.ceil(len(text) / Prompt.CHARS_PER_TOKEN)
+        return len(encoding.encode(text))
+
+    ### 값의 크기에 맞추어 소수점 자리수 결정 (유효숫자 약 4~5자리)
+    def _decimals(values):
+        finite = [abs(v) for v in values if v is not None and not math.isnan(v) and v != 0]
+        if not finite:
+            return 0
+        magnitude = math.floor(math.log10(sorted(finite)[len(finite) // 2]))
+        return max(0, 4 - magnitude)
+
+    def _format(value, decimals):
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return ""
+        if decimals == 0:
+            return str(int(round(value)))
+        return f"{value:.{decimals}f}".rstrip("0").rstrip(".")
+
+    ### DataFrame -> CSV 형태 표 (첫 컬럼은 마지막 행 기준 상대 시간)
+    ### unit : 상대 시간 단위 ("d" 일, "h" 시간)
+    def table(df, unit="h"):
+        if df is None or df.empty:
+            return "unavailable"
+
+        seconds = {"d": 86400, "h": 3600, "m": 60}[unit]
+        last = df.index[-1]
+        offsets = [int(round((ts - last).total_seconds() / seconds)) for ts in df.index]
+
+        columns = list(df.columns)
+        decimals = {column: Prompt._decimals(df[column].astype(float).tolist()) for column in columns}
+        lines = [f"t({unit}),{','.join(columns)}"]
+        for offset, row in zip(offsets, df.itertuples(index=False)):
+            values = [Prompt._format(float(value), decimals[column]) for column, value in zip(columns, row)]
+            lines.append(f"{offset},{','.join(values)}")
+        return f"last={last}\n" + "\n".join(lines)
+
+    ### epoch 초 단위 Timestamp 컬럼을 가진 blockchain.info 데이터 -> 표
+    def series_table(df, unit="d"):
+        if df is None or df.empty:
+            return "unavailable"
+        frame = df.set_index(pd.to_datetime(df["Timestamp"], unit="s")).drop(columns=["Timestamp"])
+        return Prompt.table(frame, unit)
+
+    ### 호가 요약 (최우선 호가, 스프레드, 상위 호가 누적 잔량, 매수/매도 잔량 비율)
+    ### notional : 이 금액(KRW)을 시장가로 주문할 때의 예상 슬리피지 포함
+    def orderbook_summary(orderbook, depth=5, notional=None):
+        book = OrderBook.parse(orderbook)
+        if book is None:
+            return "unavailable"
+        return json.dumps(book.features(depth, notional), separators=(",", ":"))
+
+    ### 잔고 요약 (필요한 필드만)
+    def balances_summary(balances):
+        return json.dumps([
+            {
+                "currency": balance["currency"],
+                "balance": balance["balance"],
+                "locked": balance.get("locked", "0"),
+                "avg_buy_price": balance.get("avg_buy_price", "0"),
+            }
+            for balance in balances
+        ], separators=(",", ":"))
+
+    ### 섹션들을 토큰 예산에 맞추어 조립
+    ### section : {"name", "render": rows -> str, "rows": 최대 행 수 (None 이면 고정 섹션), "min_rows"}
+    ### 예산을 넘으면 목록 뒤쪽(우선순위가 낮은) 섹션부터 오래된 행을 줄여 나감
+    def build(sections, model, budget=None):
+        budget = budget or Prompt.TOKEN_BUDGET
+        rows = {section["name"]: section.get("rows") for section in sections}
+
+        def render(section):
+            text = section["render"](rows[section["name"]])
+            return text, Prompt.count_tokens(text, model)
+
+        texts, tokens = {}, {}
+        for section in sections:
+            texts[section["name"]], tokens[section["name"]] = render(section)
+
+        while sum(tokens.values()) > budget:
+            trimmable = [
+                section for section in reversed(sections)
+                if rows[section["name"]] is not None and rows[section["name"]] > section.get("min_rows", 1)
+            ]
+            if not trimmable:
+                Log.recordLog(Log.WARNING, "Prompt over token budget", f"{sum(tokens.values())} > {budget}")
+                break
+            section = trimmable[0]
+            name = section["name"]
+            rows[name] = max(section.get("min_rows", 1), int(rows[name] * 0.75))
+            texts[name], tokens[name] = render(section)
+
+        content = "\n".join(texts[section["name"]] for section in sections)
+        report = {"total": sum(tokens.values()), "budget": budget, "sections": tokens, "rows": rows}
+        return content, report
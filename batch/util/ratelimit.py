@@ -0,0 +1,58 @@
+from util.trace import Trace
+import multiprocessing
+import time
+
+
+class RateLimiter:
+    ### Upbit API 요청 제한 (그룹별 초당 요청 수)
+    ### quotation : 시세 조회 (캔들, 호가, 현재가), exchange : 잔고 / 주문 조회, order : 주문 생성
+    QUOTAS = {
+        "quotation": 10,
+        "exchange": 30,
+        "order": 8,
+    }
+
+    ### 현재 프로세스에서 사용하는 limiter (설치하지 않으면 제한 없이 호출)
+    current = None
+
+    ### 토큰 버킷을 공유 메모리에 두어 워커 프로세스 전체가 같은 한도를 나누어 씀
+    def __init__(self, quotas=QUOTAS):
+        self.lock = multiprocessing.Lock()
+        self.rates = dict(quotas)
+        self.tokens = {group: multiprocessing.Value("d", rate, lock=False) for group, rate in quotas.items()}
+        self.updated = {group: multiprocessing.Value("d", time.monotonic(), lock=False) for group in quotas}
+
+    ### 요청 1건에 대한 토큰을 얻을 때까지 대기
+    def acquire(self, group):
+        rate = self.rates.get(group)
+        if rate is None:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                tokens = min(rate, self.tokens[group].value + (now - self.updated[group].value) * rate)
+                self.updated[group].value = now
+                if tokens >= 1:
+                    self.tokens[group].value = tokens - 1
+                    return
+                self.tokens[group].value = tokens
+                wait = (1 - tokens) / rate
+            time.sleep(wait)
+
+    ### 프로세스 풀 initializer 로 사용 (워커마다 부모의 limiter 를 설치)
+    def install(limiter):
+        RateLimiter.current = limiter
+
+    ### 설치된 limiter 가 있을 때만 대기
+    def wait(group, count=1):
+        Trace.count("api_calls", count, group=group)
+        if RateLimiter.current is not None:
+            for _ in range(count):
+                RateLimiter.current.acquire(group)
+
+    ### 함수 호출 전에 대기하도록 감싸기
+    def limited(group, func):
+        def wrapper(*args, **kwargs):
+            RateLimiter.wait(group)
+            return func(*args, **kwargs)
+        return wrapper
@@ -0,0 +1,162 @@
+from util.chatgpt import ChatGPT
+from util.db import DB
+from util.log import Log
+import io
+import json
+import os
+import time
+
+
+### 반성 일기 오프라인 생성 (OpenAI Batch API)
+### 1. submit : 종목별 최근 거래 기록으로 요청을 만들어 batch 로 제출 (제출 정보는 STATE_PATH 에 저장)
+### 2. poll : batch 가 끝났으면 결과를 내려받아 각 종목의 최근 거래 행 reflection 컬럼에 기록
+### 다음 거래 실행은 DB.get_latest_reflection 으로 기록된 반성 일기를 읽어 프롬프트에 포함
+class ReflectionBatch:
+    ### 제출한 batch 정보 (poll 이 다른 프로세스에서 실행되어도 이어서 처리)
+    STATE_PATH = os.getenv("REFLECTION_STATE_PATH", os.path.join("data", "reflection_batch.json"))
+
+    ### 반성 일기에 사용할 거래 기록 기간 (일)
+    DAYS = 7
+
+    ### batch 완료 기한 (OpenAI Batch API 는 24h 만 지원)
+    COMPLETION_WINDOW = "24h"
+
+    ENDPOINT = "/v1/chat/completions"
+
+    COMPLETED = "completed"
+    FAILED = ("failed", "expired", "cancelled")
+
+    ### memory : 거래 기억 (TradeMemory, 있으면 종목별 요약을 요청에 포함)
+    def __init__(self, openAiClient, state_path=STATE_PATH, memory=None):
+        self.client = openAiClient
+        self.state_path = state_path
+        self.memory = memory
+
+    def load_state(self):
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_state(self, state):
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(temp, "w") as f:
+            json.dump(state, f)
+        os.replace(temp, self.state_path)
+
+    def _clear_state(self):
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
+
+    ### 종목별 요청 (가장 최근 거래에 반성 일기가 이미 있으면 제외)
+    ### custom_id : "<종목>:<거래 id>"
+    def requests(conn, tickers, days=DAYS, memory=None):
+        trades = DB.get_recent_trades(conn, days)
+        requests = []
+        for ticker in tickers:
+            trades_df = trades[trades["ticker"] == ticker] if not trades.empty else trades
+            if trades_df.empty or trades_df.iloc[0]["reflection"]:
+                continue
+            latest = trades_df.iloc[0]
+            current_market_data = {
+                "ticker": ticker,
+                "price": float(latest["btc_krw_price"]),
+                "last_decision": latest["decision"],
+                "timestamp": str(latest["timestamp"]),
+            }
+            requests.append({
+                "custom_id": f"{ticker}:{int(latest['id'])}",
+                "method": "POST",
+                "url": ReflectionBatch.ENDPOINT,
+                "body": {
+                    "model": ChatGPT.REFLECTION_MODEL,
+                    "messages": ChatGPT.reflection_messages(
+                        trades_df, current_market_data, memory.context(ticker) if memory is not None else None
+                    ),
+                },
+            })
+        return requests
+
+    ### batch 제출 (이미 제출한 batch 가 있으면 새로 제출하지 않고 그 정보를 반환)
+    def submit(self, conn, tickers):
+        state = self.load_state()
+        if state is not None:
+            Log.recordLog(Log.INFO, "Reflection batch pending", state["batch_id"])
+            return state
+
+        requests = ReflectionBatch.requests(conn, tickers, memory=self.memory)
+        if not requests:
+            Log.recordLog(Log.INFO, "Reflection batch", "No trades without reflection")
+            return None
+
+        payload = "\n".join(json.dumps(request, ensure_ascii=False, default=str) for request in requests).encode("utf-8")
+        input_file = self.client.files.create(file=("reflection.jsonl", io.BytesIO(payload)), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=ReflectionBatch.ENDPOINT,
+            completion_window=ReflectionBatch.COMPLETION_WINDOW,
+            metadata={"job": "reflection"},
+        )
+        state = {"batch_id": batch.id, "submitted_at": time.time(), "requests": [request["custom_id"] for request in requests]}
+        self._save_state(state)
+        Log.recordLog(Log.INFO, "Reflection batch submitted", f"{batch.id} ({len(requests)} requests)")
+        return state
+
+    ### batch 상태 확인 후 끝났으면 결과 기록
+    ### 반환 : 기록한 반성 일기 수 (아직 진행 중이면 None)
+    def poll(self, conn):
+        state = self.load_state()
+        if state is None:
+            return 0
+
+        batch = self.client.batches.retrieve(state["batch_id"])
+        if batch.status in ReflectionBatch.FAILED:
+            Log.recordLog(Log.ERROR, "Reflection batch failed", f"{batch.id} {batch.status} : {getattr(batch, 'errors', None)}")
+            self._clear_state()
+            return 0
+        if batch.status != ReflectionBatch.COMPLETED:
+            Log.recordLog(Log.INFO, "Reflection batch in progress", f"{batch.id} {batch.status}")
+            return None
+
+        written = 0
+        if batch.output_file_id:
+            output = self.client.files.content(batch.output_file_id).text
+            for line in output.splitlines():
+                if line.strip():
+                    written += self._write(conn, json.loads(line))
+        if batch.error_file_id:
+            errors = self.client.files.content(batch.error_file_id).text
+            Log.recordLog(Log.WARNING, "Reflection batch errors", errors)
+        self._clear_state()
+        Log.recordLog(Log.INFO, "Reflection batch completed", f"{batch.id} : {written}/{len(state['requests'])} reflections written")
+        return written
+
+    ### 결과 한 줄 기록 (실패한 요청은 로그만 남김)
+    def _write(self, conn, result):
+        custom_id = result.get("custom_id", "")
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            Log.recordLog(Log.WARNING, "Reflection request failed", f"{custom_id} : {result.get('error') or response.get('status_code')}")
+            return 0
+        content = response["body"]["choices"][0]["message"]["content"]
+        if not content:
+            return 0
+        trade_id = int(custom_id.rsplit(":", 1)[1])
+        return DB.update_reflection(conn, trade_id, content)
+
+    ### 제출 후 완료될 때까지 대기 (wait 초를 넘기면 다음 실행에서 poll 로 이어서 처리)
+    def run(self, conn, tickers, wait=0, interval=30):
+        if self.submit(conn, tickers) is None:
+            return 0
+        deadline = time.monotonic() + wait
+        while True:
+            written = self.poll(conn)
+            if written is not None or time.monotonic() + interval > deadline:
+                return written
+            time.sleep(interval)
@@ -0,0 +1,28 @@
+import os
+
+
+class Rule:
+    ### Upbit KRW 마켓 거래 수수료율
+    FEE_RATE = 0.0005
+
+    ### 시장가 매수 시 수수료를 남겨두기 위해 주문 금액에 곱하는 비율
+    FEE_FACTOR = 0.9995
+
+    ### 최소 주문 금액 (KRW)
+    MIN_ORDER_KRW = 5000
+
+    ### 시장가 주문 허용 슬리피지 (최우선 호가 대비, bps), util/execution.py 에서 주문 크기 결정에 사용
+    MAX_SLIPPAGE_BPS = float(os.getenv('MAX_SLIPPAGE_BPS', '30'))
+
+    ### 보유 KRW 중 percentage 만큼의 매수 주문 금액
+    def buy_amount(krw, percentage):
+        return krw * (percentage / 100) * Rule.FEE_FACTOR
+
+    ### 보유 수량 중 percentage 만큼의 매도 수량
+    def sell_volume(volume, percentage):
+        return volume * (percentage / 100)
+
+    ### 최소 주문 금액을 넘는지 여부
+    def is_orderable(krw_amount):
+        return krw_amount > Rule.MIN_ORDER_KRW
+
@@ -0,0 +1,264 @@
+from util.log import Log
+from datetime import datetime, timedelta
+import json
+import os
+import random
+import threading
+import time
+
+
+### cron 형식 실행 주기 ("분 시 일 월 요일", 예: "0 11,23 * * *", "*/15 * * * *")
+### 각 필드는 *, 숫자, 범위(a-b), 목록(a,b), 간격(*/n, a-b/n) 지원, 요일은 0(일)~6(토)
+class Cron:
+    FIELDS = [("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 6)]
+
+    def __init__(self, expression):
+        self.expression = expression
+        parts = expression.split()
+        if len(parts) != len(Cron.FIELDS):
+            raise ValueError(f"Invalid cron expression : {expression}")
+
+        values = {}
+        for part, (name, low, high) in zip(parts, Cron.FIELDS):
+            values[name] = Cron._parse(part, low, high)
+        self.minutes = values["minute"]
+        self.hours = values["hour"]
+        self.days = values["day"]
+        self.months = values["month"]
+        self.weekdays = values["weekday"]
+        # 일 / 요일이 모두 지정되면 둘 중 하나만 맞아도 실행 (cron 규칙)
+        self.any_day = parts[2] == "*"
+        self.any_weekday = parts[4] == "*"
+
+    def _parse(field, low, high):
+        values = set()
+        for item in field.split(","):
+            step = 1
+            if "/" in item:
+                item, step = item.split("/")
+                step = int(step)
+            if item == "*":
+                start, end = low, high
+            elif "-" in item:
+                start, end = (int(value) for value in item.split("-"))
+            else:
+                start = end = int(item)
+                if step > 1:
+                    end = high
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid cron field : {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, dt):
+        day = dt.day in self.days
+        weekday = (dt.weekday() + 1) % 7 in self.weekdays
+        if self.any_day:
+            return weekday
+        if self.any_weekday:
+            return day
+        return day or weekday
+
+    ### dt 이후 첫 실행 시각
+    def next_after(self, dt):
+        dt = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # 4년 이내에 맞는 날이 없으면 (예: 2월 30일) 오류
+        limit = dt + timedelta(days=366 * 4)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(dt):
+                dt = (dt + timedelta(days=1)).replace(hour=0, minute=0)
+            elif dt.hour not in self.hours:
+                dt = (dt + timedelta(hours=1)).replace(minute=0)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+        raise ValueError(f"Cron expression never matches : {self.expression}")
+
+
+class Job:
+    def __init__(self, name, cron, func, args, kwargs, catchup, catchup_window, jitter):
+        self.name = name
+        self.cron = Cron(cron)
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.catchup = catchup
+        self.catchup_window = catchup_window
+        self.jitter = jitter
+
+        self.next_run = None
+        self.fire_at = None
+        self.last_run = None
+        self.thread = None
+        self.runs = 0
+        self.skipped = 0
+        self.drifts = []
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    ### 다음 실행 예약 (jitter 는 0 ~ jitter 초 사이 임의 지연)
+    def plan(self, scheduled):
+        self.next_run = scheduled
+        self.fire_at = scheduled + timedelta(seconds=random.uniform(0, self.jitter) if self.jitter else 0)
+
+
+### cron 주기 작업 실행기
+### 다음 실행 시각까지 대기 (1초마다 확인하지 않음)
+### catch-up : 재시작 등으로 놓친 실행 처리 (skip : 무시, once : 한 번만 실행, all : 놓친 횟수만큼 실행)
+### 이전 실행이 끝나지 않았으면 이번 실행은 건너뜀 (작업 단위 single-flight)
+class Scheduler:
+    SKIP = "skip"
+    ONCE = "once"
+    ALL = "all"
+
+    ### 마지막 실행 시각 저장 경로 (컨테이너 재시작 후에도 유지하려면 볼륨으로 마운트)
+    DEFAULT_STATE_PATH = os.getenv("SCHEDULER_STATE_PATH", os.path.join("data", "scheduler.json"))
+
+    ### all 정책에서 한 번에 실행할 최대 catch-up 횟수
+    MAX_CATCHUP = 10
+
+    ### 최대 대기 시간 (초), 시스템 시각이 바뀌어도 다음 실행 시각을 다시 계산하도록 함
+    MAX_SLEEP = 300
+
+    ### 작업별로 보관할 최근 drift 수
+    DRIFT_HISTORY = 100
+
+    def __init__(self, state_path=DEFAULT_STATE_PATH):
+        self.state_path = state_path
+        self.jobs = {}
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.state = self._load_state()
+
+    ### 작업 등록
+    ### catchup_window : 이 시간(초)보다 오래 전에 놓친 실행은 catch-up 하지 않음 (None 이면 제한 없음)
+    ### jitter : 실행 시각에 더하는 임의 지연의 최대값 (초)
+    def add(self, name, cron, func, *args, catchup=ONCE, catchup_window=None, jitter=0, **kwargs):
+        if catchup not in (Scheduler.SKIP, Scheduler.ONCE, Scheduler.ALL):
+            raise ValueError(f"Invalid catch-up policy : {catchup}")
+        job = Job(name, cron, func, args, kwargs, catchup, catchup_window, jitter)
+        self.jobs[name] = job
+        Log.recordLog(Log.INFO, "Job scheduled", f"{name} '{cron}' catchup={catchup} jitter={jitter}s")
+        return job
+
+    def _load_state(self):
+        try:
+            with open(self.state_path) as f:
+                return {name: datetime.fromisoformat(value) for name, value in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            Log.recordLog(Log.WARNING, "Scheduler state unreadable", f"{self.state_path} : {e}")
+            return {}
+
+    ### 마지막 실행 시각 저장 (임시 파일에 쓴 뒤 교체)
+    def _save_state(self):
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {name: value.isoformat() for name, value in self.state.items()}
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.state_path)
+
+    ### 마지막 실행 이후 놓친 실행 시각 목록
+    def missed_runs(self, job, now):
+        last = self.state.get(job.name)
+        if last is None or job.catchup == Scheduler.SKIP:
+            return []
+
+        missed = []
+        scheduled = job.cron.next_after(last)
+        while scheduled <= now:
+            if job.catchup_window is None or (now - scheduled).total_seconds() <= job.catchup_window:
+                missed.append(scheduled)
+            scheduled = job.cron.next_after(scheduled)
+
+        if job.catchup == Scheduler.ONCE:
+            return missed[-1:]
+        return missed[-Scheduler.MAX_CATCHUP:]
+
+    ### 작업 실행 (이전 실행이 진행 중이면 건너뜀)
+    def _run(self, job, scheduled, fire_at):
+        if job.is_running():
+            job.skipped += 1
+            Log.recordLog(Log.WARNING, "Job skipped", f"{job.name} {scheduled} : previous run still in progress")
+            return False
+
+        start = datetime.now()
+        drift = (start - fire_at).total_seconds()
+        job.drifts = (job.drifts + [drift])[-Scheduler.DRIFT_HISTORY:]
+        job.runs += 1
+        job.last_run = scheduled
+        # 실행 전에 저장 : 실행 중 재시작되어도 같은 주문을 다시 내지 않도록 함
+        self.state[job.name] = scheduled
+        self._save_state()
+        Log.recordLog(Log.INFO, "Job started", f"{job.name} scheduled={scheduled} drift={drift:.3f}s")
+
+        def target():
+            started = time.monotonic()
+            try:
+                job.func(*job.args, **job.kwargs)
+            except Exception as e:
+                Log.recordLog(Log.ERROR, f"Job failed : {job.name}", f"{e}")
+            finally:
+                Log.recordLog(Log.INFO, "Job finished", f"{job.name} {time.monotonic() - started:.1f}s")
+
+        job.thread = threading.Thread(target=target, name=f"job-{job.name}")
+        job.thread.start()
+        return True
+
+    ### 놓친 실행 처리 (순서대로, 이전 실행이 끝난 뒤 다음 실행)
+    def _catch_up(self, now):
+        for job in self.jobs.values():
+            missed = self.missed_runs(job, now)
+            if missed:
+                Log.recordLog(Log.INFO, "Catch-up", f"{job.name} {len(missed)} missed run(s) : {missed[0]} ~ {missed[-1]}")
+            for scheduled in missed:
+                if self._stop.is_set():
+                    return
+                self._run(job, scheduled, now)
+                job.thread.join()
+
+    ### 중지될 때까지 실행
+    def run_forever(self):
+        now = datetime.now()
+        self._catch_up(now)
+        for job in self.jobs.values():
+            job.plan(job.cron.next_after(datetime.now()))
+
+        while not self._stop.is_set():
+            job = min(self.jobs.values(), key=lambda job: job.fire_at)
+            wait = (job.fire_at - datetime.now()).total_seconds()
+            if wait > 0:
+                self._stop.wait(min(wait, Scheduler.MAX_SLEEP))
+                continue
+
+            self._run(job, job.next_run, job.fire_at)
+            job.plan(job.cron.next_after(max(job.next_run, datetime.now() - timedelta(minutes=1))))
+
+    def stop(self):
+        self._stop.set()
+
+    ### 작업별 실행 통계 (drift : 예정 시각 대비 실제 시작 지연, 초)
+    def stats(self):
+        result = {}
+        for job in self.jobs.values():
+            drifts = sorted(job.drifts)
+            result[job.name] = {
+                "runs": job.runs,
+                "skipped": job.skipped,
+                "next_run": job.next_run.isoformat() if job.next_run else None,
+                "drift_avg": sum(drifts) / len(drifts) if drifts else None,
+                "drift_max": drifts[-1] if drifts else None,
+                "drift_p50": drifts[len(drifts) // 2] if drifts else None,
+            }
+        return result
@@ -0,0 +1,196 @@
+from util.log import Log
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+
+
+### span 이 비활성화되었을 때 사용하는 context manager (로그의 stage 필드만 설정)
+class _StageSpan:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self._token = Log.set_stage(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        Log.reset_stage(self._token)
+        return False
+
+
+class _Span(_StageSpan):
+    def __init__(self, name, labels):
+        super().__init__(name)
+        self.labels = labels
+
+    def __enter__(self):
+        super().__enter__()
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.monotonic() - self.start
+        Trace._finish_span(self, elapsed, exc_type is not None)
+        Log.recordLog(Log.DEBUG, "Stage finished", self.name, latency=round(elapsed, 6))
+        return super().__exit__(exc_type, exc, tb)
+
+
+### 실행 단계별 소요 시간(span), 카운터, 지연 시간 히스토그램 수집
+### 실행(run) 단위로 초기화되며 종료 시 Prometheus text 형식과 JSON 요약으로 저장
+### TRACE_ENABLED=1 일 때만 수집 (비활성화 시 모든 호출은 바로 반환)
+class Trace:
+    ENABLED = os.getenv("TRACE_ENABLED", "0") == "1"
+
+    ### 저장 경로 : <TRACE_PATH>/<이름>.prom (마지막 실행 지표), <TRACE_PATH>/runs/<run_id>.json
+    PATH = os.getenv("TRACE_PATH", os.path.join("data", "trace"))
+
+    ### 지연 시간 히스토그램 구간 (초)
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    ### 지표 이름 접두어
+    PREFIX = "autotrade_"
+
+    _lock = threading.Lock()
+    run_id = None
+    run_labels = {}
+    _started = None
+    _started_at = None
+    _spans = []
+    _counters = {}
+    _histograms = {}
+
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    ### 실행 시작 (이전 실행의 수집 값 초기화, run_id 를 지정하지 않으면 로그의 run_id 를 사용)
+    def start_run(run_id=None, **labels):
+        if not Trace.ENABLED:
+            return None
+        with Trace._lock:
+            Trace.run_id = run_id or Log.run_id() or uuid.uuid4().hex[:12]
+            Trace.run_labels = labels
+            Trace._started = time.monotonic()
+            Trace._started_at = time.time()
+            Trace._spans = []
+            Trace._counters = {}
+            Trace._histograms = {}
+        return Trace.run_id
+
+    ### 단계 측정 (with Trace.span("llm"): ...)
+    def span(name, **labels):
+        if not Trace.ENABLED:
+            return _StageSpan(name)
+        return _Span(name, labels)
+
+    def _finish_span(span, elapsed, failed):
+        with Trace._lock:
+            Trace._spans.append({
+                "name": span.name,
+                "labels": span.labels,
+                "offset": round(span.start - (Trace._started or span.start), 6),
+                "seconds": round(elapsed, 6),
+                "error": failed,
+            })
+        Trace.observe("stage_seconds", elapsed, stage=span.name, **span.labels)
+
+    ### 카운터 증가 (API 호출 수, 재시도, 토큰, 캐시 적중 등)
+    def count(name, value=1, **labels):
+        if not Trace.ENABLED:
+            return
+        key = Trace._key(name, labels)
+        with Trace._lock:
+            Trace._counters[key] = Trace._counters.get(key, 0) + value
+
+    ### 지연 시간 기록 (초)
+    def observe(name, seconds, **labels):
+        if not Trace.ENABLED:
+            return
+        key = Trace._key(name, labels)
+        with Trace._lock:
+            histogram = Trace._histograms.get(key)
+            if histogram is None:
+                histogram = Trace._histograms[key] = {"buckets": [0] * len(Trace.BUCKETS), "sum": 0.0, "count": 0}
+            index = bisect.bisect_left(Trace.BUCKETS, seconds)
+            if index < len(Trace.BUCKETS):
+                histogram["buckets"][index] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+
+    def _labels(labels, extra=None):
+        items = list(labels) + list((extra or {}).items())
+        if not items:
+            return ""
+        escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in items)
+        return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(items, escaped)) + "}"
+
+    ### Prometheus text 형식 (실행 라벨은 모든 지표에 추가)
+    def prometheus():
+        run = tuple(sorted(Trace.run_labels.items()))
+        lines = []
+        with Trace._lock:
+            counters = dict(Trace._counters)
+            histograms = {key: dict(value, buckets=list(value["buckets"])) for key, value in Trace._histograms.items()}
+
+        for name in sorted({name for name, _ in counters}):
+            metric = f"{Trace.PREFIX}{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (key, labels), value in sorted(counters.items()):
+                if key == name:
+                    lines.append(f"{metric}{Trace._labels(run + labels)} {value}")
+
+        for name in sorted({name for name, _ in histograms}):
+            metric = f"{Trace.PREFIX}{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            for (key, labels), histogram in sorted(histograms.items()):
+                if key != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(Trace.BUCKETS, histogram["buckets"]):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{Trace._labels(run + labels, {'le': bound})} {cumulative}")
+                lines.append(f"{metric}_bucket{Trace._labels(run + labels, {'le': '+Inf'})} {histogram['count']}")
+                lines.append(f"{metric}_sum{Trace._labels(run + labels)} {histogram['sum']:.6f}")
+                lines.append(f"{metric}_count{Trace._labels(run + labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    ### 실행 요약 (단계별 소요 시간, 가장 느린 단계, 카운터)
+    def summary():
+        with Trace._lock:
+            spans = list(Trace._spans)
+            counters = {
+                name + Trace._labels(labels): value for (name, labels), value in sorted(Trace._counters.items())
+            }
+        slowest = max(spans, key=lambda span: span["seconds"]) if spans else None
+        return {
+            "run_id": Trace.run_id,
+            "labels": Trace.run_labels,
+            "started_at": Trace._started_at,
+            "seconds": round(time.monotonic() - Trace._started, 6) if Trace._started else None,
+            "slowest_stage": slowest["name"] if slowest else None,
+            "spans": spans,
+            "counters": counters,
+        }
+
+    ### 실행 종료 : 요약 로그 출력 후 파일 저장 (name : .prom 파일 이름)
+    def finish_run(name="autotrade"):
+        if not Trace.ENABLED or Trace.run_id is None:
+            return None
+        summary = Trace.summary()
+        Log.recordLog(Log.INFO, "Run trace", f"{summary['run_id']} {summary['seconds']}s slowest={summary['slowest_stage']}")
+        try:
+            Trace._write(os.path.join(Trace.PATH, "runs", f"{summary['run_id']}.json"), json.dumps(summary, indent=1))
+            Trace._write(os.path.join(Trace.PATH, f"{name}.prom"), Trace.prometheus())
+        except OSError as e:
+            Log.recordLog(Log.WARNING, "Trace write failed", f"{e}")
+        return summary
+
+    ### 임시 파일에 쓴 뒤 교체 (수집기가 쓰다 만 파일을 읽지 않도록 함)
+    def _write(path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "w") as f:
+            f.write(text)
+        os.replace(temp, path)
@@ -2,6 +2,7 @@ from util.init import Init
 from util.aws import AWS
 from util.crypt import Crypt
 from util.db import DB
+from util.trade_cache import TradeCache
 import pyupbit
 import streamlit as st
 import pandas as pd
@@ -11,26 +12,28 @@ import plotly.express as px
 env = Init.set_env()
 
 # 데이터 로드 함수
-def load_data(conn):
-    # conn = get_connection()
-    query = "SELECT * FROM trades"
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+# 이미 읽은 거래 내역은 프로세스 캐시에 두고, 새로 추가된 행만 조회
+def load_data(dbUrlParameter, dbPasswordParameter):
+    return TradeCache.load(lambda: DB.connection(dbUrlParameter, dbPasswordParameter))
+
+# 거래 통계 조회 함수 (DB 집계 쿼리)
+def load_stats(dbUrlParameter, dbPasswordParameter):
+    with DB.connection(dbUrlParameter, dbPasswordParameter) as conn:
+        return DB.get_trade_stats(conn)
 
 # 초기 투자 금액 계산 함수
-def calculate_initial_investment(df):
-    initial_krw_balance = df.iloc[0]['krw_balance']
-    initial_btc_balance = df.iloc[0]['btc_balance']
-    initial_btc_price = df.iloc[0]['btc_krw_price']
+def calculate_initial_investment(stats):
+    initial_krw_balance = stats['first']['krw_balance']
+    initial_btc_balance = stats['first']['btc_balance']
+    initial_btc_price = stats['first']['btc_krw_price']
     initial_total_investment = initial_krw_balance + (initial_btc_balance * initial_btc_price)
     return initial_total_investment
 
 # 현재 투자 금액 계산 함수
-def calculate_current_investment(df):
-    current_krw_balance = df.iloc[-1]['krw_balance']
-    current_btc_balance = df.iloc[-1]['btc_balance']
-    btc_avg_buy_price = df.iloc[-1]['btc_avg_buy_price']
+def calculate_current_investment(stats):
+    current_krw_balance = stats['last']['krw_balance']
+    current_btc_balance = stats['last']['btc_balance']
+    btc_avg_buy_price = stats['last']['btc_avg_buy_price']
     current_btc_price = pyupbit.get_current_price("KRW-BTC")  # 현재 BTC 가격 가져오기
     btc_purchase_price = current_btc_balance * btc_avg_buy_price
     profit = (current_btc_balance * current_btc_price) - btc_purchase_price
@@ -51,21 +54,21 @@ def main():
     # 데이터 베이스 연결
     dbUrlParameter = AWS.get_parameter(assume_session, env, 'db/url')
     dbPasswordParameter = AWS.get_parameter(assume_session, env, 'db/password')
-    conn = DB.get_db_connection(dbUrlParameter, dbPasswordParameter)
-
-    # 데이터 로드
-    df = load_data(conn)
+    # 데이터 로드 (연결은 풀에서 빌려 쓰고 반납)
+    if st.button('Refresh'):
+        TradeCache.invalidate()
+    stats = load_stats(dbUrlParameter, dbPasswordParameter)
 
-    if df.empty:
+    if stats['count'] == 0:
         st.warning('No trade data available.')
         return
 
     # 초기 투자 금액 계산
-    initial_investment = calculate_initial_investment(df)
+    initial_investment = calculate_initial_investment(stats)
     initial_investment_fstring = f"{initial_investment:,} 원"
 
     # 현재 투자 금액 계산
-    current_investment = calculate_current_investment(df)
+    current_investment = calculate_current_investment(stats)
     current_investment_fstring = f"{current_investment:,} 원"
 
     # 수익률 계산
@@ -78,13 +81,14 @@ def main():
 
     # 기본 통계
     st.header('Basic Statistics')
-    st.write(f"Total number of trades: {len(df)}")
-    st.write(f"First trade date: {df['timestamp'].min()}")
-    st.write(f"Last trade date: {df['timestamp'].max()}")
+    st.write(f"Total number of trades: {stats['count']}")
+    st.write(f"First trade date: {stats['first_timestamp']}")
+    st.write(f"Last trade date: {stats['last_timestamp']}")
+    st.write(", ".join(f"{decision}: {count}" for decision, count in sorted(stats['decisions'].items(), key=lambda item: str(item[0]))))
 
     # 거래 내역 표시
     st.header("Trade History")
-    st.dataframe(df)
+    st.dataframe(load_data(dbUrlParameter, dbPasswordParameter))
 
 
 if __name__ == "__main__":
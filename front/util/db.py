@@ -1,9 +1,18 @@
 from util.crypt import Crypt 
+from util.pool import ConnectionPool
+from decimal import Decimal
 import mysql.connector
 import mysql
+import os
 import pandas as pd
 
 class DB:
+    ### 연결 풀 최대 연결 수
+    POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '4'))
+
+    ### 프로세스 단위 연결 풀 (Streamlit rerun 사이에도 유지)
+    pool = None
+
     ### SQLite DB 연결
     def get_db_connection(dbUrlParameter, dbPasswordParameter):
 
@@ -12,4 +21,42 @@ class DB:
             user="application",
             password=Crypt.decrypt_env_value(dbPasswordParameter),
             database="bitcoin_trades"
-        )
\ No newline at end of file
+        )
+
+    ### 연결 풀 조회 (없으면 생성)
+    def get_pool(dbUrlParameter, dbPasswordParameter):
+        if DB.pool is None or DB.pool.pid != os.getpid():
+            DB.pool = ConnectionPool(
+                lambda: DB.get_db_connection(dbUrlParameter, dbPasswordParameter),
+                size=DB.POOL_SIZE,
+            )
+        return DB.pool
+
+    ### 풀에서 연결을 빌려 사용 후 반납 (with 문으로 사용)
+    def connection(dbUrlParameter, dbPasswordParameter):
+        return DB.get_pool(dbUrlParameter, dbPasswordParameter).connection()
+
+    ### 거래 통계 조회 (집계는 DB 에서 수행, 인덱스 (ticker, timestamp) 사용)
+    ### first / last : 첫 거래, 마지막 거래의 잔고 정보
+    def get_trade_stats(conn, ticker='KRW-BTC'):
+        c = conn.cursor(dictionary=True)
+        c.execute("""SELECT COUNT(*) AS count, MIN(timestamp) AS first_timestamp, MAX(timestamp) AS last_timestamp
+                    FROM trades WHERE ticker = %s""", (ticker,))
+        stats = c.fetchone()
+
+        c.execute("""SELECT decision, COUNT(*) AS count FROM trades
+                    WHERE ticker = %s GROUP BY decision""", (ticker,))
+        stats['decisions'] = {row['decision']: row['count'] for row in c.fetchall()}
+
+        columns = "timestamp, krw_balance, btc_balance, btc_avg_buy_price, btc_krw_price"
+        c.execute(f"SELECT {columns} FROM trades WHERE ticker = %s ORDER BY timestamp ASC, id ASC LIMIT 1", (ticker,))
+        stats['first'] = DB._to_float(c.fetchone())
+        c.execute(f"SELECT {columns} FROM trades WHERE ticker = %s ORDER BY timestamp DESC, id DESC LIMIT 1", (ticker,))
+        stats['last'] = DB._to_float(c.fetchone())
+        return stats
+
+    ### DECIMAL 값을 float 로 변환 (현재가(float) 와 계산하기 위함)
+    def _to_float(row):
+        if row is None:
+            return None
+        return {key: float(value) if isinstance(value, Decimal) else value for key, value in row.items()}
@@ -0,0 +1,136 @@
+from contextlib import contextmanager
+import os
+import queue
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    ### factory : 새 연결을 만드는 함수
+    ### size : 최대 연결 수, timeout : 연결을 빌릴 때 최대 대기 시간 (초)
+    ### ping_interval : 이 시간 이상 쉬고 있던 연결은 사용 전에 ping 으로 확인 후 재연결
+    def __init__(self, factory, size=4, timeout=10, ping_interval=30):
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self.pid = os.getpid()
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.created = 0
+
+        # 대기 시간 지표
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.reconnects = 0
+
+    ### 연결 빌리기 (최대 연결 수에 도달하면 반납될 때까지 대기)
+    def acquire(self):
+        start = time.monotonic()
+        conn, last_used = self._checkout(start)
+        try:
+            if time.monotonic() - last_used > self.ping_interval:
+                conn = self._check(conn)
+        except Exception:
+            self.discard(conn)
+            raise
+
+        waited = time.monotonic() - start
+        with self.lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        return conn
+
+    def _checkout(self, start):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            can_create = self.created < self.size
+            if can_create:
+                self.created += 1
+        if can_create:
+            try:
+                return self.factory(), time.monotonic()
+            except Exception:
+                with self.lock:
+                    self.created -= 1
+                raise
+
+        try:
+            return self.idle.get(timeout=max(self.timeout - (time.monotonic() - start), 0))
+        except queue.Empty:
+            with self.lock:
+                self.timeouts += 1
+            raise PoolTimeout(f"No connection available within {self.timeout}s (size={self.size})")
+
+    ### 오래 쉬고 있던 연결 확인 (끊어졌으면 재연결)
+    def _check(self, conn):
+        try:
+            conn.ping(reconnect=True, attempts=2, delay=1)
+            return conn
+        except Exception:
+            with self.lock:
+                self.reconnects += 1
+            self._close(conn)
+            return self.factory()
+
+    ### 연결 반납 (끝나지 않은 트랜잭션은 롤백)
+    def release(self, conn):
+        try:
+            conn.rollback()
+        except Exception:
+            self.discard(conn)
+            return
+        self.idle.put((conn, time.monotonic()))
+
+    ### 사용할 수 없는 연결 폐기
+    def discard(self, conn):
+        self._close(conn)
+        with self.lock:
+            self.created -= 1
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    ### 쉬고 있는 연결 모두 닫기
+    def close_all(self):
+        while True:
+            try:
+                conn, _ = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            self.discard(conn)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "size": self.size,
+                "created": self.created,
+                "idle": self.idle.qsize(),
+                "checkouts": self.checkouts,
+                "wait_avg": self.wait_total / self.checkouts if self.checkouts else 0.0,
+                "wait_max": self.wait_max,
+                "timeouts": self.timeouts,
+                "reconnects": self.reconnects,
+            }
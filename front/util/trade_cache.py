@@ -0,0 +1,50 @@
+import os
+import threading
+import time
+import pandas as pd
+
+
+class TradeCache:
+    ### 전체 재조회 주기 (초) : 이미 읽은 행이 수정된 경우(reflection 등)를 반영
+    TTL = int(os.getenv('TRADE_CACHE_TTL', '3600'))
+
+    ### 증분 조회 최소 간격 (초) : 위젯 조작마다 DB 를 조회하지 않도록 함
+    REFRESH_INTERVAL = int(os.getenv('TRADE_CACHE_REFRESH', '10'))
+
+    ### 프로세스 단위 캐시 (Streamlit rerun, 세션 간 공유)
+    _lock = threading.Lock()
+    _df = None
+    _watermark = 0
+    _loaded_at = 0.0
+    _refreshed_at = 0.0
+
+    ### 거래 내역 조회
+    ### connect : 연결을 빌려주는 context manager 를 반환하는 함수 (필요할 때만 호출)
+    def load(connect):
+        with TradeCache._lock:
+            now = time.monotonic()
+            if TradeCache._df is None or now - TradeCache._loaded_at > TradeCache.TTL:
+                with connect() as conn:
+                    df = pd.read_sql_query("SELECT * FROM trades ORDER BY id", conn)
+                TradeCache._df = df
+                TradeCache._loaded_at = now
+                TradeCache._refreshed_at = now
+            elif now - TradeCache._refreshed_at >= TradeCache.REFRESH_INTERVAL:
+                # 마지막으로 읽은 id 이후의 행만 조회
+                with connect() as conn:
+                    df = pd.read_sql_query(
+                        "SELECT * FROM trades WHERE id > %s ORDER BY id", conn, params=(TradeCache._watermark,)
+                    )
+                if not df.empty:
+                    TradeCache._df = pd.concat([TradeCache._df, df], ignore_index=True)
+                TradeCache._refreshed_at = now
+
+            if not TradeCache._df.empty:
+                TradeCache._watermark = int(TradeCache._df['id'].iloc[-1])
+            return TradeCache._df
+
+    ### 캐시 무효화 (다음 조회 시 전체 재조회)
+    def invalidate():
+        with TradeCache._lock:
+            TradeCache._df = None
+            TradeCache._watermark = 0
@@ -0,0 +1,76 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch"))
+
+from fake_aws_server import FakeAWSServer
+
+# 로컬 STS / SSM 대체 서버로 Assume Role 세션 캐시와 파라미터 일괄 조회 확인
+# 실행 : python test/aws_check.py
+
+ENV = "test"
+NAMES = [f"key/test-{i:02d}" for i in range(23)]
+
+
+### 세션 만료 판단에 쓰는 현재 시각을 조절하기 위한 시계
+class FakeClock(datetime):
+    offset = timedelta(0)
+
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) + cls.offset
+
+
+if __name__ == "__main__":
+    parameters = {f"/{ENV}/{name}": f"value-{name}" for name in NAMES}
+    server = FakeAWSServer(parameters, duration=3600).start()
+    os.environ.update({
+        "AWS_ENDPOINT_URL_STS": server.endpoint_url,
+        "AWS_ENDPOINT_URL_SSM": server.endpoint_url,
+        "AWS_ACCESS_KEY_ID": "test",
+        "AWS_SECRET_ACCESS_KEY": "test",
+        "AWS_DEFAULT_REGION": "ap-northeast-2",
+    })
+    import util.aws
+    from util.aws import AWS
+    util.aws.datetime = FakeClock
+
+    try:
+        # 만료 REFRESH_MARGIN 초 전까지는 같은 세션 재사용
+        session = AWS.get_assume_role(ENV)
+        assert AWS.get_assume_role(ENV) is session and server.assume_calls == 1
+        expiration = AWS._sessions[ENV][1]
+        FakeClock.offset = expiration - datetime.now(expiration.tzinfo) - timedelta(seconds=AWS.REFRESH_MARGIN + 1)
+        assert AWS.get_assume_role(ENV) is session and server.assume_calls == 1
+
+        # 만료까지 REFRESH_MARGIN 초보다 적게 남으면 새로 Assume Role
+        FakeClock.offset = expiration - datetime.now(expiration.tzinfo) - timedelta(seconds=AWS.REFRESH_MARGIN - 1)
+        refreshed = AWS.get_assume_role(ENV)
+        assert refreshed is not session and server.assume_calls == 2
+        FakeClock.offset = timedelta(0)
+        assert AWS.get_assume_role(ENV) is refreshed and server.assume_calls == 2
+
+        # 10 개를 넘는 이름은 PARAMETER_BATCH_SIZE 개씩 나누어 조회
+        values = AWS.get_parameters(refreshed, ENV, NAMES)
+        assert values == {name: f"value-{name}" for name in NAMES}
+        assert [len(names) for names in server.parameter_calls] == [10, 10, 3], server.parameter_calls
+        assert sorted(name for names in server.parameter_calls for name in names) == sorted(parameters)
+
+        # 이미 조회한 값은 다시 요청하지 않고, 새 이름만 조회
+        assert AWS.get_parameter(refreshed, ENV, NAMES[5]) == f"value-{NAMES[5]}"
+        assert len(server.parameter_calls) == 3
+        try:
+            AWS.get_parameters(refreshed, ENV, NAMES[:2] + ["key/missing"])
+            raise AssertionError("missing parameter not reported")
+        except KeyError as e:
+            assert f"/{ENV}/key/missing" in str(e)
+        assert server.parameter_calls[-1] == [f"/{ENV}/key/missing"]
+
+        # bootstrap 은 캐시된 세션 / 파라미터만 사용
+        AWS.bootstrap(ENV, NAMES)
+        assert server.assume_calls == 2 and len(server.parameter_calls) == 4
+        print(f"assume_role {server.assume_calls} calls, get_parameters {[len(names) for names in server.parameter_calls]}")
+    finally:
+        server.stop()
+    print("OK")
@@ -0,0 +1,81 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch"))
+
+import numpy as np
+import pandas as pd
+from util.backtest import Backtest, ReplayStrategy, RuleStrategy
+from util.rule import Rule
+
+# 백테스트 자산 / 손익 / 낙폭, 수수료와 최소 주문 금액, 전략 판단 확인 (손으로 계산한 값과 비교)
+# 실행 : python test/backtest_check.py
+
+INITIAL_KRW = 1_000_000
+
+# 보조지표 산출 전 19 개 캔들 (판단하지 않음) + 판단할 6 개 캔들
+WARMUP = [100.0, 101.0] * 9 + [101.0]
+PRICES = [100.0, 120.0, 90.0, 110.0, 110.0, 130.0]
+INDEX = pd.date_range("2025-01-01", periods=len(WARMUP) + len(PRICES), freq="h")
+SCRIPT = dict(zip(INDEX[len(WARMUP):], [
+    {"decision": "buy", "percentage": 50, "reason": "enter"},
+    {"decision": "hold", "percentage": 0, "reason": "wait"},
+    {"decision": "hold", "percentage": 0, "reason": "wait"},
+    {"decision": "sell", "percentage": 100, "reason": "exit"},
+    {"decision": "buy", "percentage": 0.4, "reason": "too small"},
+    {"decision": "sell", "percentage": 50, "reason": "nothing held"},
+]))
+
+
+if __name__ == "__main__":
+    df = pd.DataFrame({"close": WARMUP + PRICES}, index=INDEX)
+    result = Backtest(df, lambda features, balances: SCRIPT[features.index[-1]], initial_krw=INITIAL_KRW, every=1).run()
+    curve = result.curve()
+    assert list(curve.index) == list(SCRIPT), curve.index
+
+    # 1. 50% 매수 : 주문 금액 = 보유 KRW x 50% x 0.9995, 수수료 0.05% 는 KRW 에서 차감
+    amount = INITIAL_KRW * 0.5 * Rule.FEE_FACTOR
+    volume = amount / 100.0
+    krw = INITIAL_KRW - amount * (1 + Rule.FEE_RATE)
+    assert np.isclose(amount, 499_750) and np.isclose(krw, 500_000.125)
+    # 2~3. 보유 중 가격 변화만 반영
+    # 4. 전량 매도 : 매도 금액에서 수수료 차감
+    sold_krw = krw + volume * 110.0 * (1 - Rule.FEE_RATE)
+    expected = [krw + volume * 100.0, krw + volume * 120.0, krw + volume * 90.0, sold_krw, sold_krw, sold_krw]
+    assert np.allclose(curve["equity"], expected, rtol=0, atol=1e-6), curve["equity"].tolist()
+    assert np.isclose(expected[0], 999_750.125) and np.isclose(sold_krw, 1_049_450.2625)
+    assert np.allclose(curve["pnl"], np.array(expected) - INITIAL_KRW)
+
+    # 최대 낙폭 : 120 에서의 고점 대비 90 에서의 자산
+    assert np.isclose(result.summary()["max_drawdown_pct"], (expected[2] / expected[1] - 1) * 100)
+    assert curve["drawdown"].iloc[0] == 0 and curve["drawdown"].iloc[1] == 0
+
+    # 5. 최소 주문 금액(5000 KRW) 미만 매수, 6. 보유 수량 없는 매도는 체결하지 않음 (percentage 0 으로 기록)
+    assert Rule.buy_amount(sold_krw, 0.4) < Rule.MIN_ORDER_KRW
+    assert result.decisions["percentage"].tolist() == [50, 0, 0, 100, 0, 0]
+
+    # buy and hold 기준 : 첫 판단 시점 가격 대비
+    assert np.allclose(curve["buy_and_hold"], [INITIAL_KRW * price / 100.0 for price in PRICES])
+    summary = result.summary()
+    assert np.isclose(summary["buy_and_hold_pct"], 30.0) and np.isclose(summary["return_pct"], (sold_krw / INITIAL_KRW - 1) * 100)
+    assert summary["decisions"] == 6 and summary["trades"] == 2
+    print(summary)
+
+    # 규칙 전략 : 과매도 + 하단 밴드 이탈 시 매수, 과매수 + 상단 밴드 돌파 시 매도
+    strategy = RuleStrategy(percentage=40)
+    row = lambda close, rsi: pd.DataFrame([{"close": close, "rsi": rsi, "bb_bbl": 95.0, "bb_bbh": 105.0}])
+    assert strategy(row(94.0, 25.0), [])["decision"] == "buy" and strategy(row(94.0, 25.0), [])["percentage"] == 40
+    assert strategy(row(106.0, 75.0), [])["decision"] == "sell"
+    assert strategy(row(94.0, 45.0), [])["decision"] == "hold"
+
+    # 기록 재생 : 판단 시점 이전의 가장 최근 기록을 한 번만 적용, 새 기록이 없으면 hold
+    trades = pd.DataFrame([
+        {"timestamp": "2025-01-01T02:30:00", "decision": "sell", "percentage": 10, "reason": "second"},
+        {"timestamp": "2025-01-01T00:30:00", "decision": "buy", "percentage": 20, "reason": "first"},
+        {"timestamp": "2025-01-01T02:45:00", "decision": "buy", "percentage": 30, "reason": "third"},
+    ])
+    replay = ReplayStrategy(trades)
+    bars = pd.date_range("2025-01-01", periods=5, freq="h")
+    decisions = [replay(pd.DataFrame({"close": [1.0]}, index=[ts]), [])["reason"] for ts in bars]
+    assert decisions == ["No recorded decision", "first", "No recorded decision", "third", "No recorded decision"], decisions
+    print("OK")
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch"))
+
+from util.decision import DecisionError, DecisionParser, DecisionStream, parse_decision
+
+# 스트리밍 투자 판단 파서 확인 (조각 경계, 조기 반환, 스키마 위반 시 즉시 실패)
+# 실행 : python test/decision_check.py
+
+RESPONSE = '```json\n{\n  "decision": "buy",\n  "percentage": 30,\n  "reason": "RSI {oversold} \\"rebound\\" \\\\ \\u00e9 keeps going"\n}\n```'
+
+
+### 응답을 size 글자씩 나누어 전달 (각 조각 사이 delay 초 대기)
+def chunks(text, size, delay=0.0, log=None):
+    for i in range(0, len(text), size):
+        if log is not None:
+            log.append(i)
+        if delay:
+            time.sleep(delay)
+        yield text[i:i + size]
+
+
+def expect_error(text, size=3):
+    parser = DecisionParser()
+    try:
+        for piece in chunks(text, size):
+            parser.feed(piece)
+        parser.finish()
+    except DecisionError as e:
+        return str(e)
+    raise AssertionError(f"accepted invalid response : {text}")
+
+
+if __name__ == "__main__":
+    expected = {"decision": "buy", "percentage": 30, "reason": 'RSI {oversold} "rebound" \\ é keeps going'}
+
+    # 모든 조각 크기에서 같은 결과 (이스케이프, 중괄호가 조각 경계에서 잘려도 동일)
+    for size in range(1, len(RESPONSE) + 1):
+        parser = DecisionParser()
+        for piece in chunks(RESPONSE, size):
+            parser.feed(piece)
+        assert parser.finish() == expected, (size, parser.values)
+    assert parse_decision(RESPONSE) == expected
+
+    # decision, percentage 가 확정되면 나머지 응답을 받기 전에 반환
+    sent = []
+    start = time.monotonic()
+    decision = DecisionStream(chunks(RESPONSE, 4, delay=0.01, log=sent)).decide()
+    early = time.monotonic() - start
+    assert (decision.decision, decision.percentage) == ("buy", 30)
+    assert len(sent) < len(RESPONSE) // 4, len(sent)
+    assert decision.reason(5) == expected["reason"] and decision.error is None
+    print(f"decision after {early * 1000:.0f} ms ({len(sent)} chunks), reason after {(time.monotonic() - start) * 1000:.0f} ms")
+
+    # 스키마 위반은 해당 필드에서 바로 실패
+    for text in (
+        '{"decision": "short", "percentage": 10, "reason": ""}',
+        '{"decision": "hold", "percentage": 20, "reason": ""}',
+        '{"decision": "buy", "percentage": 0, "reason": ""}',
+        '{"decision": "buy", "percentage": 101, "reason": ""}',
+        '{"decision": "buy", "percentage": 12.5, "reason": ""}',
+        '{"decision": "buy", "percentage": "30", "reason": ""}',
+        '{"decision": "buy", "confidence": 0.9}',
+        '{"decision": "buy", "decision": "sell"}',
+        '{"decision": "buy", "percentage": 30}',
+        '{"decision": "buy", "percentage": 30, "reason": "cut',
+        "I cannot provide financial advice. " * 10,
+    ):
+        print(f"rejected : {expect_error(text)}")
+
+    # 잘못된 필드 이후의 응답은 받지 않음
+    sent = []
+    try:
+        DecisionStream(chunks('{"decision": "short", "percentage": 10, "reason": "' + "x" * 500 + '"}', 4, log=sent)).decide()
+        raise AssertionError("accepted invalid decision")
+    except DecisionError:
+        assert len(sent) < 10, len(sent)
+    print("OK")
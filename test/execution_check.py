@@ -0,0 +1,68 @@
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch"))
+
+from util.execution import ExecutionEngine, SimulatedExchange
+from util.orderbook import OrderBook
+from util.rule import Rule
+
+# 모의 거래소에서 한 번에 주문할 때와 나누어 주문할 때의 체결가 비교
+# 실행 : python test/execution_check.py
+
+
+### BTC 가격 수준의 15단계 호가 (단계마다 잔량 증가)
+def sample_book(mid=140_000_000, tick=1000, size=0.02):
+    levels = np.arange(15)
+    return OrderBook(
+        mid + tick / 2 + levels * tick, size * (1 + levels * 0.5),
+        mid - tick / 2 - levels * tick, size * (1 + levels * 0.5),
+        market="KRW-BTC",
+    )
+
+
+def run(side, amount, **options):
+    exchange = SimulatedExchange(sample_book())
+    if options.pop("single", False):
+        fill = exchange.buy("KRW-BTC", amount) if side == "buy" else exchange.sell("KRW-BTC", amount)
+        arrival = sample_book().mid
+        sign = 1 if side == "buy" else -1
+        return {"children": 1, "slippage_bps": (fill["avg_price"] - arrival) / arrival * 10000 * sign,
+                "executed_volume": fill["executed_volume"], "executed_funds": fill["executed_funds"], "status": "done"}
+    return ExecutionEngine(exchange, sleep=lambda seconds: None, **options).execute("KRW-BTC", side, amount)
+
+
+if __name__ == "__main__":
+    for side, amount in (("buy", 30_000_000), ("sell", 0.2)):
+        single = run(side, amount, single=True)
+        twap = run(side, amount, strategy=ExecutionEngine.TWAP, slices=4)
+        depth = run(side, amount, strategy=ExecutionEngine.DEPTH, max_slippage_bps=0.1)
+        for name, result in (("single", single), ("twap", twap), ("depth", depth)):
+            print(f"{side:4} {name:6} children={result['children']:2} slippage={result['slippage_bps']:7.3f} bps "
+                  f"volume={result['executed_volume']:.8f} funds={result['executed_funds']:,.0f} {result['status']}")
+        assert twap["slippage_bps"] < single["slippage_bps"]
+        assert depth["slippage_bps"] < single["slippage_bps"]
+        filled = depth["executed_funds"] if side == "buy" else depth["executed_volume"]
+        assert np.isclose(filled, amount), "parent order not fully filled"
+
+    # 최소 주문 금액 : 나누면 5000 KRW 미만이 되는 주문은 한 번에 실행
+    small = run("buy", 12_000, strategy=ExecutionEngine.TWAP, slices=4)
+    assert small["children"] == 2 and small["executed_funds"] >= Rule.MIN_ORDER_KRW, small
+
+    # 두 번째 주문 요청에서 연결 오류 : 첫 주문의 체결은 PARTIAL 결과로 남음
+    exchange = SimulatedExchange(sample_book())
+    buy = exchange.buy
+
+    def failing_buy(ticker, krw):
+        if exchange.orders >= 1:
+            raise ConnectionError("connection reset")
+        return buy(ticker, krw)
+
+    exchange.buy = failing_buy
+    partial = ExecutionEngine(exchange, strategy=ExecutionEngine.TWAP, slices=4, sleep=lambda seconds: None).execute("KRW-BTC", "buy", 30_000_000)
+    assert partial["status"] == ExecutionEngine.PARTIAL and partial["children"] == 2, partial
+    assert np.isclose(partial["executed_funds"], 7_500_000) and partial["executed_volume"] > 0
+    assert partial["uuids"] == ["sim-1", None] and np.isclose(partial["progress"], 0.25)
+    print(f"partial after error : {partial['progress']:.0%} filled, {partial['children']} children")
+    print("OK")
@@ -0,0 +1,133 @@
+import argparse
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+from xml.sax.saxutils import escape
+
+# 로컬 AWS 대체 테스트 서버 (STS AssumeRole, SSM GetParameters)
+# 실행 : python test/fake_aws_server.py [--port 8766] [--parameters parameters.json]
+# 사용 : AWS_ENDPOINT_URL_STS=http://127.0.0.1:8766 AWS_ENDPOINT_URL_SSM=http://127.0.0.1:8766 \
+#        AWS_ACCESS_KEY_ID=test AWS_SECRET_ACCESS_KEY=test AWS_DEFAULT_REGION=ap-northeast-2 python batch/o1_autotrade.py ...
+#
+# parameters  : {"/<env>/<keyPath>": "값"} (없는 이름은 InvalidParameters 로 반환)
+# duration    : AssumeRole 자격 증명 유효 시간 (초)
+# 호출 기록 : assume_calls (AssumeRole 횟수), parameter_calls (GetParameters 요청별 Names 목록)
+
+
+class FakeAWSServer:
+    def __init__(self, parameters=None, duration=3600, host="127.0.0.1", port=0):
+        self.parameters = parameters or {}
+        self.duration = duration
+        self.lock = threading.Lock()
+        self.assume_calls = 0
+        self.parameter_calls = []
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def endpoint_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fake-aws", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def assume_role(self):
+        with self.lock:
+            self.assume_calls += 1
+        expiration = datetime.now(timezone.utc) + timedelta(seconds=self.duration)
+        return f'''<AssumeRoleResponse xmlns="https://sts.amazonaws.com/doc/2011-06-15/">
+  <AssumeRoleResult>
+    <Credentials>
+      <AccessKeyId>ASIA{uuid.uuid4().hex[:16].upper()}</AccessKeyId>
+      <SecretAccessKey>{uuid.uuid4().hex}</SecretAccessKey>
+      <SessionToken>{uuid.uuid4().hex}</SessionToken>
+      <Expiration>{expiration.strftime("%Y-%m-%dT%H:%M:%SZ")}</Expiration>
+    </Credentials>
+    <AssumedRoleUser>
+      <AssumedRoleId>AROATEST:choon-session</AssumedRoleId>
+      <Arn>arn:aws:sts::000000000000:assumed-role/test/choon-session</Arn>
+    </AssumedRoleUser>
+  </AssumeRoleResult>
+  <ResponseMetadata><RequestId>{uuid.uuid4()}</RequestId></ResponseMetadata>
+</AssumeRoleResponse>'''
+
+    def get_parameters(self, names):
+        with self.lock:
+            self.parameter_calls.append(list(names))
+        found = [name for name in names if name in self.parameters]
+        return {
+            "Parameters": [
+                {"Name": name, "Type": "SecureString", "Value": self.parameters[name], "Version": 1,
+                 "LastModifiedDate": time.time(), "ARN": f"arn:aws:ssm:ap-northeast-2:000000000000:parameter{name}", "DataType": "text"}
+                for name in found
+            ],
+            "InvalidParameters": [name for name in names if name not in self.parameters],
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, content_type):
+                body = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+
+                # SSM : JSON 1.1 (X-Amz-Target 헤더로 작업 구분)
+                target = self.headers.get("X-Amz-Target", "")
+                if target:
+                    if target != "AmazonSSM.GetParameters":
+                        return self._send(400, json.dumps({"__type": "UnsupportedOperation", "message": target}), "application/x-amz-json-1.1")
+                    request = json.loads(body or b"{}")
+                    return self._send(200, json.dumps(server.get_parameters(request.get("Names", []))), "application/x-amz-json-1.1")
+
+                # STS : query 형식 (Action 파라미터로 작업 구분)
+                action = parse_qs(body.decode()).get("Action", [""])[0]
+                if action != "AssumeRole":
+                    error = f"<ErrorResponse><Error><Code>InvalidAction</Code><Message>{escape(action)}</Message></Error></ErrorResponse>"
+                    return self._send(400, error, "text/xml")
+                return self._send(200, server.assume_role(), "text/xml")
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--parameters")
+    parser.add_argument("--duration", type=int, default=3600)
+    args = parser.parse_args()
+
+    parameters = None
+    if args.parameters:
+        with open(args.parameters) as f:
+            parameters = json.load(f)
+    server = FakeAWSServer(parameters, args.duration, args.host, args.port)
+    print(f"Fake AWS server : {server.endpoint_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
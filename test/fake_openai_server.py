@@ -0,0 +1,257 @@
+import argparse
+import json
+import threading
+import time
+import uuid
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 로컬 OpenAI 호환 테스트 서버 (chat completions (stream 포함), files, batches)
+# 실행 : python test/fake_openai_server.py [--port 8765] [--scenario scenario.json]
+# 사용 : OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python batch/o1_autotrade.py ...
+#
+# 모델별 동작 (scenario JSON : {"모델 이름" 또는 "*": {...}})
+#   content     : 응답 본문
+#   delay       : 첫 응답까지 대기 (초)
+#   chunk_delay : stream 조각 사이 대기 (초)
+#   chunk_size  : stream 조각 크기 (글자 수)
+#   fail        : 앞쪽 요청부터 차례로 돌려줄 오류 상태 코드 목록 (예: [429, 500])
+#   retry_after : 오류 응답의 Retry-After 헤더 (초)
+# batch 동작 ("batch": {...})
+#   delay       : 제출 후 완료까지 걸리는 시간 (초), 그동안 status 는 in_progress
+#   status      : 완료 시 상태 (completed / failed / expired)
+
+DEFAULT_CONTENT = json.dumps({
+    "decision": "hold",
+    "percentage": 0,
+    "reason": "Indicators are mixed and the orderbook is balanced, so waiting for a clearer signal is preferable.",
+}, indent=2)
+
+DEFAULT_BEHAVIOR = {"content": DEFAULT_CONTENT, "delay": 0.0, "chunk_delay": 0.0, "chunk_size": 8, "fail": [], "retry_after": None}
+DEFAULT_BATCH = {"delay": 0.0, "status": "completed"}
+
+
+class FakeOpenAIServer:
+    def __init__(self, scenario=None, host="127.0.0.1", port=0):
+        self.scenario = scenario or {}
+        self.requests = []
+        self.lock = threading.Lock()
+        self.failures = {}
+        self.files = {}
+        self.batches = {}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fake-openai", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def behavior(self, model):
+        return dict(DEFAULT_BEHAVIOR, **self.scenario.get("*", {}), **self.scenario.get(model, {}))
+
+    ### 모델별 n 번째 요청이 실패해야 하는지 (fail 목록의 상태 코드)
+    def next_failure(self, model, behavior):
+        with self.lock:
+            index = self.failures.get(model, 0)
+            self.failures[model] = index + 1
+        fail = behavior["fail"]
+        return fail[index] if index < len(fail) else None
+
+    def completion(self, model, content):
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": len(content) // 4, "total_tokens": 100 + len(content) // 4},
+        }
+
+    def add_file(self, content, filename, purpose):
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        self.files[file_id] = {
+            "content": content,
+            "object": {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                       "filename": filename, "purpose": purpose, "status": "processed"},
+        }
+        return self.files[file_id]["object"]
+
+    ### batch 조회 : 완료 시간이 지났으면 입력 파일의 요청을 처리하여 결과 파일 생성
+    def batch(self, batch_id):
+        with self.lock:
+            batch = self.batches.get(batch_id)
+            if batch is None:
+                return None
+            settings = dict(DEFAULT_BATCH, **self.scenario.get("batch", {}))
+            if batch["status"] == "in_progress" and time.time() >= batch["created_at"] + settings["delay"]:
+                if settings["status"] != "completed":
+                    batch["status"] = settings["status"]
+                    batch["errors"] = {"object": "list", "data": [{"code": settings["status"], "message": "Simulated batch failure"}]}
+                else:
+                    lines = []
+                    for line in self.files[batch["input_file_id"]]["content"].decode().splitlines():
+                        request = json.loads(line)
+                        model = request["body"].get("model", "")
+                        body = self.completion(model, self.behavior(model)["content"])
+                        lines.append(json.dumps({"id": f"batch_req_{uuid.uuid4().hex[:24]}", "custom_id": request["custom_id"],
+                                                 "response": {"status_code": 200, "request_id": uuid.uuid4().hex, "body": body},
+                                                 "error": None}))
+                    output = self.add_file("\n".join(lines).encode(), f"{batch_id}_output.jsonl", "batch_output")
+                    batch.update(status="completed", output_file_id=output["id"], completed_at=int(time.time()),
+                                 request_counts={"total": len(lines), "completed": len(lines), "failed": 0})
+            return dict(batch)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _not_found(self):
+                return self._json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+            def do_GET(self):
+                parts = self.path.strip("/").split("/")
+                if parts[:2] == ["v1", "batches"] and len(parts) == 3:
+                    batch = server.batch(parts[2])
+                    return self._json(200, batch) if batch else self._not_found()
+                if parts[:2] == ["v1", "files"] and len(parts) == 4 and parts[3] == "content" and parts[2] in server.files:
+                    content = server.files[parts[2]]["content"]
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Content-Length", str(len(content)))
+                    self.end_headers()
+                    self.wfile.write(content)
+                    return
+                return self._not_found()
+
+            ### multipart 업로드 (purpose, file)
+            def _upload(self, body):
+                message = BytesParser(policy=policy.default).parsebytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+                )
+                fields = {}
+                for part in message.iter_parts():
+                    name = part.get_param("name", header="content-disposition")
+                    fields[name] = (part.get_filename(), part.get_payload(decode=True))
+                filename, content = fields["file"]
+                return self._json(200, server.add_file(content, filename or "upload.jsonl", fields["purpose"][1].decode()))
+
+            def _create_batch(self, request):
+                if request.get("input_file_id") not in server.files:
+                    return self._json(400, {"error": {"message": "Unknown input_file_id", "type": "invalid_request_error"}})
+                batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+                batch = {
+                    "id": batch_id, "object": "batch", "endpoint": request.get("endpoint"),
+                    "input_file_id": request["input_file_id"], "completion_window": request.get("completion_window"),
+                    "status": "in_progress", "created_at": int(time.time()), "output_file_id": None, "error_file_id": None,
+                    "errors": None, "metadata": request.get("metadata"),
+                    "request_counts": {"total": 0, "completed": 0, "failed": 0},
+                }
+                with server.lock:
+                    server.batches[batch_id] = batch
+                return self._json(200, batch)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                path = self.path.rstrip("/")
+                if path == "/v1/files":
+                    return self._upload(body)
+                request = json.loads(body or b"{}")
+                if path == "/v1/batches":
+                    return self._create_batch(request)
+                if path != "/v1/chat/completions":
+                    return self._not_found()
+
+                model = request.get("model", "")
+                behavior = server.behavior(model)
+                with server.lock:
+                    server.requests.append({"model": model, "stream": bool(request.get("stream")), "at": time.monotonic()})
+                time.sleep(behavior["delay"])
+
+                status = server.next_failure(model, behavior)
+                if status is not None:
+                    headers = {"Retry-After": str(behavior["retry_after"])} if behavior["retry_after"] is not None else None
+                    return self._json(status, {"error": {"message": f"Simulated {status}", "type": "server_error", "code": status}}, headers)
+
+                try:
+                    if request.get("stream"):
+                        self._stream(model, behavior, request.get("stream_options") or {})
+                    else:
+                        self._complete(model, behavior)
+                except (BrokenPipeError, ConnectionResetError):
+                    # 클라이언트가 요청을 취소한 경우
+                    pass
+
+            def _complete(self, model, behavior):
+                self._json(200, server.completion(model, behavior["content"]))
+
+            def _stream(self, model, behavior, options):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+                content = behavior["content"]
+
+                def send(choices, usage=None):
+                    chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": model, "choices": choices}
+                    if usage is not None:
+                        chunk["usage"] = usage
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+
+                for i in range(0, len(content), behavior["chunk_size"]):
+                    if i:
+                        time.sleep(behavior["chunk_delay"])
+                    send([{"index": 0, "delta": {"content": content[i:i + behavior["chunk_size"]]}, "finish_reason": None}])
+                send([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+                if options.get("include_usage"):
+                    send([], {"prompt_tokens": 100, "completion_tokens": len(content) // 4, "total_tokens": 100 + len(content) // 4})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scenario")
+    args = parser.parse_args()
+
+    scenario = None
+    if args.scenario:
+        with open(args.scenario) as f:
+            scenario = json.load(f)
+    server = FakeOpenAIServer(scenario, args.host, args.port)
+    print(f"Fake OpenAI server : {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
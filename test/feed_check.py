@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch"))
+
+from util.candle import CandleStore
+from util.feed import TickFeed, ReplaySource
+
+# 기록된 체결 메시지 재생으로 로컬 분봉을 만들고 pandas resample 결과와 비교
+# 실행 : python test/feed_check.py [기록 파일]   (파일을 지정하지 않으면 랜덤 체결 생성)
+
+TICKER = "KRW-BTC"
+
+
+### Upbit trade 메시지 형태의 랜덤 체결 (3시간)
+def random_trades(path, count=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    start = int(pd.Timestamp("2024-01-01 00:00:00", tz="Asia/Seoul").timestamp() * 1000)
+    ts = start + np.sort(rng.integers(0, 3 * 3600 * 1000, count))
+    price = np.round(140_000_000 * np.exp(np.cumsum(rng.normal(0, 0.0002, count))), -3)
+    volume = np.round(rng.exponential(0.01, count), 8)
+    with open(path, "w") as f:
+        for t, p, v in zip(ts, price, volume):
+            f.write(json.dumps({"type": "trade", "code": TICKER, "trade_timestamp": int(t),
+                                "trade_price": float(p), "trade_volume": float(v)}) + "\n")
+
+
+def expected_candles(path, minutes):
+    df = pd.read_json(path, lines=True)
+    df.index = pd.to_datetime(df["trade_timestamp"], unit="ms", utc=True).dt.tz_convert("Asia/Seoul").dt.tz_localize(None)
+    df["value"] = df["trade_price"] * df["trade_volume"]
+    grouped = df.resample(f"{minutes}min")
+    expected = pd.DataFrame({
+        "open": grouped["trade_price"].first(),
+        "high": grouped["trade_price"].max(),
+        "low": grouped["trade_price"].min(),
+        "close": grouped["trade_price"].last(),
+        "volume": grouped["trade_volume"].sum(),
+        "value": grouped["value"].sum(),
+    })
+    return expected.dropna()
+
+
+if __name__ == "__main__":
+    directory = tempfile.mkdtemp()
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(directory, "trades.jsonl")
+    if len(sys.argv) <= 1:
+        random_trades(path)
+
+    feed = TickFeed([TICKER]).start(ReplaySource(path))
+    feed.join()
+    print(f"replayed {feed.stats()}")
+
+    for minutes in TickFeed.INTERVALS:
+        actual = feed.ohlcv(TICKER, f"minute{minutes}")
+        expected = expected_candles(path, minutes).tail(len(actual))
+        assert list(actual.index) == list(expected.index), f"minute{minutes} index differs"
+        assert np.allclose(actual.to_numpy(), expected.to_numpy(), rtol=1e-9), f"minute{minutes} values differ"
+        print(f"minute{minutes} : {len(actual)} candles OK")
+
+    # 저장소 캔들과 이어 붙이기
+    store = CandleStore(os.path.join(directory, "candles.db"))
+    hourly = expected_candles(path, 60)
+    store.save(TICKER, "minute60", hourly.iloc[:1])
+    merged = feed.get_ohlcv(store, TICKER, "minute60", 10)
+    assert np.allclose(merged.to_numpy(), hourly.to_numpy()), "merged candles differ"
+
+    ts, price, volume = feed.rings[TICKER].last(5)
+    print(f"last ticks : {price.tolist()}")
+    print(f"price : {feed.price(TICKER)}")
+    feed.stop()
+    print("OK")
@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch"))
+
+from util.indicator import add_indicators
+from util.kernel import IndicatorKernel
+
+# NumPy 배치 커널과 기존 ta 경로 (종목별 add_indicators) 의 속도 비교
+# 실행 : python test/indicator_bench.py [종목 수] [캔들 수]
+
+TICKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+CANDLES = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+REPEAT = 5
+
+
+def best_of(func):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+rng = np.random.default_rng(0)
+close = 100_000_000 * np.exp(np.cumsum(rng.normal(0, 0.01, (TICKERS, CANDLES)), axis=1))
+index = pd.date_range("2024-01-01", periods=CANDLES, freq="h")
+frames = [pd.DataFrame({"close": row}, index=index) for row in close]
+
+ta_seconds, ta_result = best_of(lambda: [add_indicators(df.copy()) for df in frames])
+kernel_seconds, kernel_result = best_of(lambda: IndicatorKernel.compute(close))
+
+# 결과 일치 확인
+mapping = {
+    "bb_bbm": "bb_bbm_20_2", "bb_bbh": "bb_bbh_20_2", "bb_bbl": "bb_bbl_20_2",
+    "rsi": "rsi_14", "sma_5": "sma_5", "ema_7": "ema_7",
+}
+for ta_column, kernel_column in mapping.items():
+    expected = np.stack([df[ta_column].to_numpy() for df in ta_result])
+    np.testing.assert_allclose(kernel_result[kernel_column], expected, rtol=1e-9, equal_nan=True)
+
+# 여러 window 설정을 한 번에 계산하는 경우
+multi_seconds, multi_result = best_of(lambda: IndicatorKernel.compute(
+    close, bb=((20, 2), (20, 3), (50, 2)), rsi=(7, 14, 21), sma=(5, 20, 60), ema=(7, 12, 26)
+))
+
+print(f"tickers={TICKERS} candles={CANDLES}")
+print(f"ta (per ticker)          : {ta_seconds * 1000:8.2f} ms")
+print(f"kernel (default windows) : {kernel_seconds * 1000:8.2f} ms  x{ta_seconds / kernel_seconds:.1f}")
+print(f"kernel ({len(multi_result)} columns)     : {multi_seconds * 1000:8.2f} ms")
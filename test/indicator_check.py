@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch"))
+
+from util.indicator import IndicatorEngine, IndicatorStore, add_indicators
+
+# 증분 지표 엔진 결과를 ta 라이브러리 결과와 비교
+# 실행 : python test/indicator_check.py
+
+TOLERANCE = 1e-6
+
+
+### BTC 가격 수준의 랜덤 워크 시간봉
+def random_candles(count, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 140_000_000 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+    index = pd.date_range("2024-01-01", periods=count, freq="h")
+    return pd.DataFrame({"close": close}, index=index)
+
+
+def compare(expected, actual, columns):
+    worst = 0.0
+    for column in columns:
+        e = expected[column].to_numpy()
+        a = actual[column].to_numpy()
+        assert np.array_equal(np.isnan(e), np.isnan(a)), f"{column} warm-up rows differ"
+        mask = ~np.isnan(e)
+        diff = np.max(np.abs(e[mask] - a[mask]) / np.maximum(np.abs(e[mask]), 1)) if mask.any() else 0.0
+        worst = max(worst, diff)
+        print(f"{column:8s} max relative diff : {diff:.3e}")
+    assert worst < TOLERANCE, f"max relative diff {worst} exceeds {TOLERANCE}"
+
+
+# 1. 한 캔들씩 반영한 결과가 전체 재계산 결과와 같은지 확인
+df = random_candles(5000)
+expected = add_indicators(df.copy())
+
+engine = IndicatorEngine("KRW-BTC", "minute60")
+rows = [engine.update(ts, close) for ts, close in df["close"].items()]
+actual = pd.DataFrame(rows, index=df.index)
+compare(expected, actual, engine.columns())
+
+# 2. 진행 중인 캔들을 여러 번 갱신해도 마지막 값 기준으로 계산되는지 확인
+engine = IndicatorEngine("KRW-BTC", "minute60")
+rows = []
+for ts, close in df["close"].items():
+    engine.update(ts, close * 1.01)
+    engine.update(ts, close * 0.99)
+    rows.append(engine.update(ts, close))
+actual = pd.DataFrame(rows, index=df.index)
+compare(expected, actual, engine.columns())
+
+# 3. 저장소에 상태를 저장하고 다음 실행에서 새 캔들만 반영해도 같은지 확인
+with tempfile.TemporaryDirectory() as directory:
+    store = IndicatorStore(os.path.join(directory, "candles.db"))
+    store.apply("KRW-BTC", "minute60", df.iloc[:4000].copy())
+    for end in range(4001, 5001, 37):
+        window = df.iloc[end - 200:end].copy()
+        result = store.apply("KRW-BTC", "minute60", window)
+    compare(expected.loc[result.index], result, engine.columns())
+
+    # 지표 값은 마지막 요청 범위만 보관 (오래된 값은 삭제)
+    conn = store._connect()
+    count, oldest = conn.execute("SELECT COUNT(DISTINCT ts), MIN(ts) FROM indicator_values").fetchone()
+    conn.close()
+    assert count == len(window) and pd.Timestamp(oldest) == window.index[0], (count, oldest)
+
+    # 보관 범위보다 앞선 캔들을 요청하면 처음부터 다시 계산
+    longer = df.iloc[4500:5000].copy()
+    result = store.apply("KRW-BTC", "minute60", longer)
+    compare(add_indicators(longer.copy()), result, engine.columns())
+
+print("OK")
@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch"))
+
+from openai import OpenAI
+from fake_openai_server import FakeOpenAIServer
+from util.chatgpt import ChatGPT, ResponseCache
+from util.llm import LLMRequest
+
+# 로컬 OpenAI 호환 서버로 deadline / hedging / 재시도 확인
+# 실행 : python test/llm_check.py
+
+MESSAGES = [{"role": "user", "content": "Decide."}]
+BUY = '{"decision": "buy", "percentage": 40, "reason": "hedge answer"}'
+
+
+def run(scenario, messages=MESSAGES, **options):
+    server = FakeOpenAIServer(scenario).start()
+    ChatGPT.cache = ResponseCache(tempfile.mkdtemp(prefix="llm-check-"))
+    ChatGPT.llm = LLMRequest(**options)
+    LLMRequest.RETRY_BASE = 0.05
+    client = OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+    start = time.monotonic()
+    try:
+        decision = ChatGPT(None, "test").decide(client, "o4-mini", messages)
+        return decision, time.monotonic() - start, server.requests
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    # primary 가 느리면 hedge_delay 후 다른 모델로 요청하고 먼저 온 응답 사용
+    decision, elapsed, requests = run(
+        {"o4-mini": {"delay": 3.0}, "gpt-4.1-mini": {"content": BUY}},
+        deadline=5, hedge_delay=0.3, hedge_model="gpt-4.1-mini",
+    )
+    assert decision.decision == "buy" and elapsed < 1.5, (decision, elapsed)
+    assert [r["model"] for r in requests] == ["o4-mini", "gpt-4.1-mini"]
+    assert decision.reason(2) == "hedge answer"
+    # hedge 모델의 응답은 요청한 모델의 캐시 키로 저장하지 않음
+    assert ChatGPT.cache.get(ResponseCache.key("o4-mini", MESSAGES, {})) is None
+    print(f"hedge won after {elapsed:.2f}s")
+
+    # primary 모델의 응답은 캐시되어 다시 요청하지 않음
+    decision, elapsed, requests = run({"o4-mini": {"content": BUY}}, deadline=5, hedge_delay=-1)
+    assert decision.reason(2) == "hedge answer" and decision.finished
+    assert ChatGPT.cache.get(ResponseCache.key("o4-mini", MESSAGES, {})) == BUY
+
+    # 429 / 500 은 backoff 후 재시도
+    decision, elapsed, requests = run({"*": {"fail": [429, 500]}}, deadline=5, hedge_delay=-1)
+    assert decision.decision == "hold" and len(requests) == 3, (decision, requests)
+    print(f"retried {len(requests) - 1} times, {elapsed:.2f}s")
+
+    # 400 은 재시도하지 않고, hedge 를 기다리지 않고 바로 시작
+    decision, elapsed, requests = run(
+        {"o4-mini": {"fail": [400]}, "gpt-4.1-mini": {"content": BUY}},
+        messages=[{"role": "user", "content": "Decide again."}], deadline=5, hedge_delay=3, hedge_model="gpt-4.1-mini",
+    )
+    assert decision.decision == "buy" and elapsed < 1.5 and len(requests) == 2, (decision, elapsed, requests)
+    print(f"primary rejected, hedge after {elapsed:.2f}s")
+
+    # 스키마에 맞지 않는 응답은 해당 경로의 실패
+    decision, elapsed, requests = run(
+        {"o4-mini": {"content": '{"decision": "maybe"}'}, "gpt-4.1-mini": {"content": BUY}},
+        messages=[{"role": "user", "content": "Decide once more."}], deadline=5, hedge_delay=3, hedge_model="gpt-4.1-mini",
+    )
+    assert decision.decision == "buy" and elapsed < 1.5, (decision, elapsed)
+    print(f"invalid primary, hedge after {elapsed:.2f}s")
+
+    # 두 요청 모두 응답이 없으면 deadline 에 None
+    decision, elapsed, requests = run({"*": {"delay": 5.0}}, messages=[{"role": "user", "content": "Hang."}], deadline=1, hedge_delay=0.3)
+    assert decision is None and elapsed < 1.3 and len(requests) == 2, (decision, elapsed, requests)
+    print(f"deadline reached after {elapsed:.2f}s")
+    print("OK")
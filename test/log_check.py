@@ -0,0 +1,49 @@
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch"))
+
+from util.log import Log
+
+# 워커 프로세스 로그가 부모 프로세스의 파일 하나로 모이는지 확인
+# 실행 : python test/log_check.py
+
+RECORDS = 200
+
+
+def work(ticker):
+    Log.start_run(ticker=ticker)
+    for i in range(RECORDS):
+        Log.recordLog(Log.INFO, "Worker record", {"index": i, "pid": os.getpid()}, latency=0.001)
+    Log.recordLog(Log.WARNING, "Worker object", object())
+    Log.flush()
+    return os.getpid()
+
+
+if __name__ == "__main__":
+    # setup 전에는 파일을 만들지 않음
+    assert Log.listener is None and not os.path.exists(os.path.join("data", "logs"))
+
+    file = os.path.join(tempfile.mkdtemp(prefix="log-check-"), "autotrade.log")
+    Log.setup(file)
+    Log.recordLog(Log.INFO, "Parent record", "start")
+    tickers = ["KRW-BTC", "KRW-ETH", "KRW-XRP"]
+    with ProcessPoolExecutor(max_workers=3, initializer=Log.setup_worker, initargs=(Log.worker_pipe(),)) as executor:
+        pids = set(executor.map(work, tickers))
+    Log.shutdown()
+
+    with open(file, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    workers = [entry for entry in entries if entry["title"] == "Worker record"]
+    assert len(workers) == RECORDS * len(tickers), len(workers)
+    assert {entry["ticker"] for entry in workers} == set(tickers)
+    assert {entry["message"]["pid"] for entry in workers} <= pids and all(entry["run_id"] for entry in workers)
+    assert len([entry for entry in entries if entry["title"] == "Worker object"]) == len(tickers)
+    assert entries[0]["title"] == "Parent record"
+    # 다른 프로세스가 같은 파일을 열지 않음 (교체된 파일 없음)
+    assert os.listdir(os.path.dirname(file)) == ["autotrade.log"]
+    print(f"{len(entries)} records from {len(pids)} workers in {file}")
+    print("OK")
@@ -0,0 +1,70 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch"))
+
+import numpy as np
+import pandas as pd
+from util.indicator import add_indicators
+from util.memory import TradeMemory
+
+# 거래 기억 확인 : 결과 평가, 국면별 누적, 기록 수와 관계없는 갱신 시간 / 요약 크기
+# 실행 : python test/memory_check.py
+
+
+def daily(trend):
+    index = pd.date_range("2025-01-01", periods=60, freq="D")
+    close = 100_000_000 * (1 + trend * np.arange(60)) + np.sin(np.arange(60)) * 500_000
+    return add_indicators(pd.DataFrame({"open": close, "high": close * 1.01, "low": close * 0.99, "close": close, "volume": 1.0}, index=index))
+
+
+if __name__ == "__main__":
+    memory = TradeMemory(os.path.join(tempfile.mkdtemp(prefix="memory-check-"), "memory.db"))
+    assert memory.context("KRW-BTC") is None
+
+    # 국면 판단
+    assert TradeMemory.regime(daily(0.01)).startswith("up_")
+    assert TradeMemory.regime(daily(-0.01)).startswith("down_")
+    assert TradeMemory.regime(pd.DataFrame()) == TradeMemory.UNKNOWN
+
+    # buy 후 상승 -> 적중, sell 후 상승 -> 실패, hold 는 가격 변화만 기록
+    memory.record("KRW-BTC", "buy", 30, 100.0, "up_low_vol")
+    memory.record("KRW-BTC", "sell", 20, 110.0, "up_low_vol")
+    memory.record("KRW-BTC", "hold", 0, 121.0, "down_high_vol")
+    memory.record("KRW-BTC", "buy", 10, 108.9, "down_high_vol")
+    stats = memory.stats("KRW-BTC")
+    assert stats["*"]["buy"] == {"count": 2, "evaluated": 1, "wins": 1, "avg_return": stats["*"]["buy"]["avg_return"], "ewm_return": stats["*"]["buy"]["ewm_return"]}
+    assert np.isclose(stats["up_low_vol"]["buy"]["avg_return"], 0.10)
+    assert stats["up_low_vol"]["sell"]["wins"] == 0 and np.isclose(stats["up_low_vol"]["sell"]["avg_return"], -0.10)
+    assert np.isclose(stats["down_high_vol"]["hold"]["avg_return"], -0.10)
+    assert [row[1] for row in memory.recent("KRW-BTC")] == ["buy", "hold", "sell", "buy"]
+    # 종목별로 따로 평가
+    memory.record("KRW-ETH", "buy", 50, 5_000_000.0)
+    assert memory.stats("KRW-ETH")["unknown"]["buy"]["evaluated"] == 0
+    print(memory.context("KRW-BTC", "down_high_vol"))
+
+    # 기록이 늘어도 저장된 행 수와 요약 크기는 일정 (종목 x 국면 x 판단별 누적 1행, 최근 판단은 RECENT 개만 보관)
+    # 갱신 시간은 디스크 상태에 따라 달라지므로 참고용으로만 출력
+    regimes = TradeMemory.REGIMES
+    decisions = TradeMemory.DECISIONS
+    sizes, rows, timings = [], [], []
+    rng = np.random.default_rng(7)
+    price = 100_000_000.0
+    for batch in range(4):
+        start = time.perf_counter()
+        for i in range(500):
+            price *= 1 + rng.normal(0, 0.01)
+            memory.record("KRW-XRP", decisions[i % 3], 10, price, regimes[(i // 7) % 4])
+        timings.append((time.perf_counter() - start) / 500)
+        sizes.append(len(memory.context("KRW-XRP", regimes[0])))
+        conn = memory._connect()
+        rows.append(tuple(conn.execute(f"SELECT COUNT(*) FROM {table} WHERE ticker = ?", ("KRW-XRP",)).fetchone()[0]
+                          for table in ("memory_stats", "memory_recent")))
+        conn.close()
+    assert rows == [((len(regimes) + 1) * len(decisions), TradeMemory.RECENT)] * 4, rows
+    assert memory.stats("KRW-XRP")[TradeMemory.ALL]["buy"]["count"] == 4 * 167
+    assert max(sizes) - min(sizes) < 40 and max(sizes) < 1500, sizes
+    print(f"record {[f'{t * 1000:.2f}ms' for t in timings]}, context {sizes} chars, rows {rows[-1]} after 500-2000 trades")
+    print("OK")
@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch"))
+
+import pandas as pd
+from openai import OpenAI
+from fake_openai_server import FakeOpenAIServer
+from util.db import DB
+from util.reflection import ReflectionBatch
+
+# 로컬 OpenAI 호환 서버의 Batch API 로 반성 일기 제출 / 조회 / 기록 확인
+# trades 테이블 대신 메모리의 DataFrame 사용
+# 실행 : python test/reflection_check.py
+
+REFLECTION = "Entries after oversold RSI worked; exits were late. Tighten sell thresholds when the fear index turns greedy."
+
+
+def trades():
+    now = datetime.now()
+    rows = []
+    for i, ticker in enumerate(["KRW-BTC", "KRW-BTC", "KRW-ETH", "KRW-XRP"]):
+        rows.append({
+            "id": i + 1, "timestamp": now - timedelta(hours=i), "decision": "buy", "percentage": 30, "reason": "test",
+            "btc_balance": 0.01, "krw_balance": 1_000_000.0, "btc_avg_buy_price": 140_000_000.0,
+            "btc_krw_price": 141_000_000.0 + i, "reflection": "done" if ticker == "KRW-XRP" else "", "ticker": ticker,
+        })
+    return pd.DataFrame(rows)
+
+
+class TradeTable:
+    def __init__(self):
+        self.df = trades()
+
+    def get_recent_trades(self, conn, days=7):
+        return self.df.sort_values("timestamp", ascending=False).reset_index(drop=True)
+
+    def update_reflection(self, conn, trade_id, reflection):
+        self.df.loc[self.df["id"] == trade_id, "reflection"] = reflection
+        return 1
+
+
+def job(server, table):
+    DB.get_recent_trades = table.get_recent_trades
+    DB.update_reflection = table.update_reflection
+    client = OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+    return ReflectionBatch(client, os.path.join(tempfile.mkdtemp(prefix="reflection-check-"), "batch.json"))
+
+
+if __name__ == "__main__":
+    server = FakeOpenAIServer({"*": {"content": REFLECTION}, "batch": {"delay": 1}}).start()
+    try:
+        table = TradeTable()
+        batch = job(server, table)
+
+        # 반성 일기가 없는 종목의 가장 최근 거래만 요청 (KRW-XRP 는 이미 있음)
+        state = batch.submit(None, ["KRW-BTC", "KRW-ETH", "KRW-XRP"])
+        assert state["requests"] == ["KRW-BTC:1", "KRW-ETH:3"], state
+        # 제출 중인 batch 가 있으면 다시 제출하지 않음
+        assert batch.submit(None, ["KRW-BTC"])["batch_id"] == state["batch_id"]
+
+        # 완료 전에는 None, 완료 후 결과 기록
+        assert batch.poll(None) is None
+        written = batch.run(None, ["KRW-BTC", "KRW-ETH"], wait=5, interval=0.2)
+        assert written == 2, written
+        assert table.df.set_index("id").loc[[1, 3], "reflection"].tolist() == [REFLECTION, REFLECTION]
+        assert table.df.set_index("id").loc[2, "reflection"] == ""
+        assert batch.load_state() is None
+        print(f"batch {state['batch_id']} : {written} reflections written")
+
+        # 모두 기록되었으면 제출하지 않음
+        assert batch.run(None, ["KRW-BTC", "KRW-ETH"]) == 0
+    finally:
+        server.stop()
+
+    # batch 실패 시 상태를 지우고 다음 실행에서 다시 제출
+    server = FakeOpenAIServer({"batch": {"status": "expired"}}).start()
+    try:
+        table = TradeTable()
+        batch = job(server, table)
+        assert batch.run(None, ["KRW-BTC"], wait=2, interval=0.2) == 0
+        assert batch.load_state() is None and table.df["reflection"].iloc[0] == ""
+    finally:
+        server.stop()
+    print("OK")
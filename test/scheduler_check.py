@@ -0,0 +1,142 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "batch"))
+
+import util.scheduler
+from util.scheduler import Cron, Scheduler
+
+# cron 실행 시각 계산, catch-up 정책, 마지막 실행 시각 저장 / 복원 확인 (시계는 고정 시각 사용)
+# 실행 : python test/scheduler_check.py
+
+
+def at(text):
+    return datetime.fromisoformat(text)
+
+
+def next_runs(expression, start, count):
+    cron, runs, dt = Cron(expression), [], at(start)
+    for _ in range(count):
+        dt = cron.next_after(dt)
+        runs.append(dt.isoformat(sep=" ", timespec="minutes"))
+    return runs
+
+
+### datetime.now() 를 고정 시각으로 대체
+class FakeClock(datetime):
+    current = None
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+def scheduler(catchup, last=None, window=None, calls=None):
+    path = os.path.join(tempfile.mkdtemp(prefix="scheduler-check-"), "scheduler.json")
+    if last:
+        with open(path, "w") as f:
+            json.dump({"trade": last}, f)
+    instance = Scheduler(path)
+    func = (lambda: calls.append(instance.jobs["trade"].last_run)) if calls is not None else (lambda: None)
+    instance.add("trade", "0 11,23 * * *", func, catchup=catchup, catchup_window=window)
+    return instance
+
+
+if __name__ == "__main__":
+    # 기본 거래 주기 : 매일 11시 / 23시, 정각에는 다음 실행으로 넘어감, 연도 경계
+    assert next_runs("0 11,23 * * *", "2026-10-17 10:59", 3) == ["2026-10-17 11:00", "2026-10-17 23:00", "2026-10-18 11:00"]
+    assert next_runs("0 11,23 * * *", "2026-10-17 11:00:30", 1) == ["2026-10-17 23:00"]
+    assert next_runs("0 11,23 * * *", "2026-12-31 23:00", 1) == ["2027-01-01 11:00"]
+
+    # 간격 / 범위 / 목록
+    assert next_runs("*/15 * * * *", "2026-10-17 10:07", 4) == ["2026-10-17 10:15", "2026-10-17 10:30", "2026-10-17 10:45", "2026-10-17 11:00"]
+    assert Cron("10-20/5 * * * *").minutes == {10, 15, 20}
+    assert Cron("5/20 * * * *").minutes == {5, 25, 45}
+    assert Cron("0 1,3-5,22-23 * * *").hours == {1, 3, 4, 5, 22, 23}
+    assert next_runs("30 */6 * * *", "2026-10-17 18:31", 2) == ["2026-10-18 00:30", "2026-10-18 06:30"]
+
+    # 월 / 일 경계 : 31일이 없는 달은 건너뜀, 윤년 2월 29일, 12월 -> 다음 해 1월
+    assert next_runs("0 0 31 * *", "2026-04-01 00:00", 2) == ["2026-05-31 00:00", "2026-07-31 00:00"]
+    assert next_runs("0 0 29 2 *", "2026-03-01 00:00", 1) == ["2028-02-29 00:00"]
+    assert next_runs("0 12 1 1,7 *", "2026-10-17 00:00", 2) == ["2027-01-01 12:00", "2027-07-01 12:00"]
+
+    # 요일 : 0 = 일요일, 주중만 실행, 일 / 요일 모두 지정하면 둘 중 하나만 맞아도 실행
+    assert next_runs("0 9 * * 1-5", "2026-10-16 09:00", 2) == ["2026-10-19 09:00", "2026-10-20 09:00"]
+    assert next_runs("0 9 * * 0", "2026-10-16 09:00", 1) == ["2026-10-18 09:00"]
+    assert next_runs("0 0 13 * 5", "2026-02-12 00:00", 3) == ["2026-02-13 00:00", "2026-02-20 00:00", "2026-02-27 00:00"]
+    assert next_runs("0 0 13 * 5", "2026-03-06 00:00", 2) == ["2026-03-13 00:00", "2026-03-20 00:00"]
+
+    # 잘못된 식
+    for expression in ["* * *", "60 * * * *", "0 24 * * *", "5-1 * * * *", "*/0 * * * *", "0 0 * * 7"]:
+        try:
+            Cron(expression)
+            raise AssertionError(f"accepted invalid expression {expression}")
+        except ValueError:
+            pass
+    try:
+        Cron("0 0 30 2 *").next_after(at("2026-01-01 00:00"))
+        raise AssertionError("2/30 should never match")
+    except ValueError:
+        pass
+
+    # catch-up : 16일 11시 실행 후 17일 12시에 재시작 -> 16일 23시, 17일 11시를 놓침
+    now = at("2026-10-17 12:00")
+    last = "2026-10-16T11:00:00"
+    missed = [at("2026-10-16 23:00"), at("2026-10-17 11:00")]
+    assert scheduler(Scheduler.SKIP, last).missed_runs(scheduler(Scheduler.SKIP, last).jobs["trade"], now) == []
+    for policy, window, expected in [
+        (Scheduler.ONCE, None, missed[-1:]),
+        (Scheduler.ALL, None, missed),
+        (Scheduler.ALL, 3600, missed[-1:]),
+        (Scheduler.ONCE, 1800, []),
+    ]:
+        instance = scheduler(policy, last, window)
+        assert instance.missed_runs(instance.jobs["trade"], now) == expected, (policy, window)
+    # 실행 기록이 없으면 catch-up 하지 않음, all 은 최근 MAX_CATCHUP 회까지만
+    instance = scheduler(Scheduler.ALL)
+    assert instance.missed_runs(instance.jobs["trade"], now) == []
+    instance = scheduler(Scheduler.ALL, "2026-10-01T11:00:00")
+    runs = instance.missed_runs(instance.jobs["trade"], now)
+    assert len(runs) == Scheduler.MAX_CATCHUP and runs[-1] == missed[-1]
+
+    # 놓친 실행을 순서대로 실행하고 실행 전에 저장 -> 새 Scheduler 가 복원하여 다시 실행하지 않음
+    calls = []
+    instance = scheduler(Scheduler.ALL, last, calls=calls)
+    instance._catch_up(now)
+    assert calls == missed, calls
+    restored = Scheduler(instance.state_path)
+    assert restored.state == {"trade": missed[-1]}
+    restored.add("trade", "0 11,23 * * *", lambda: None, catchup=Scheduler.ALL)
+    assert restored.missed_runs(restored.jobs["trade"], now) == []
+
+    # 읽을 수 없는 상태 파일은 무시
+    with open(instance.state_path, "w") as f:
+        f.write("{broken")
+    assert Scheduler(instance.state_path).state == {}
+
+    # run_forever : 고정 시각에서 catch-up 1회 실행 후 다음 실행(17일 23시) 예약
+    util.scheduler.datetime = FakeClock
+    FakeClock.current = now
+    calls = []
+    instance = scheduler(Scheduler.ONCE, last, calls=calls)
+    instance.jobs["trade"].func = lambda: (calls.append(instance.jobs["trade"].last_run), instance.stop())
+    instance.run_forever()
+    assert calls == missed[-1:] and instance.jobs["trade"].next_run == at("2026-10-17 23:00")
+    assert instance.stats()["trade"]["runs"] == 1
+    util.scheduler.datetime = datetime
+
+    # 이전 실행이 끝나지 않았으면 건너뜀
+    release = threading.Event()
+    instance = scheduler(Scheduler.ONCE)
+    instance.jobs["trade"].func = release.wait
+    job = instance.jobs["trade"]
+    assert instance._run(job, at("2026-10-17 11:00"), datetime.now())
+    assert not instance._run(job, at("2026-10-17 23:00"), datetime.now())
+    release.set()
+    job.thread.join()
+    assert job.runs == 1 and job.skipped == 1 and instance.state["trade"] == at("2026-10-17 11:00")
+    print("OK")